@@ -1,24 +1,38 @@
 import time
 import json
+import asyncio
+import threading
 import re
+import hashlib
 import requests
 import questionary
-from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from .ui import console, configure_questionary_style
 from .config import (
     AUTH_TOKEN, API_URL, TOKEN_INCREMENT, MODEL, MAX_TOKENS, TEMPERATURE,
-    USE_EMOJIS, logger, DEBUG
+    USE_EMOJIS, logger, DEBUG, COMMIT_CACHE, COMMIT_CACHE_TTL,
+    MAP_REDUCE_ENABLED, MAP_REDUCE_THRESHOLD, MAP_REDUCE_CHUNK_TOKENS, MAP_REDUCE_CONCURRENCY,
+    COMMIT_CANDIDATES, HTTP_POOL_SIZE
 )
-from .git_utils import parse_diff
+from .diff_model import parse_diff_text
+from .diff_budget import pack_diff
+from .commit_ranker import rank_commit_messages
+from .concurrency import map_bounded
+from .map_reduce import summarize_diff, format_summaries, group_by_tokens, SUMMARY_MAX_TOKENS
+from .git_utils import get_staged_tree_oids
 from .ui import printer
 from .prompts import SYSTEM_MESSAGE, USER_MSG_APPENDIX, SYSTEM_MESSAGE_EMOJI, SUMMARIZE_COMMIT_PROMPT, USER_MSG_APPENDIX_EMOJI
+from .prompts import COMMIT_GROUP_SUMMARY_PROMPT
 
-# If an actual "count_tokens_in_string" is needed, import from a local module:
-from count_tokens import count_tokens_in_string
+from .tokens import count_tokens, TokenBudget
 
 # Import the new LLM helper function.
-from .llm import get_chat_completion
+from .llm import get_chat_completion, get_chat_completion_async, CancelToken, CompletionCancelled
 def extract_from_codeblocks(text: str) -> str:
     """
     Extract text from code blocks enclosed within triple backticks or more.
@@ -26,6 +40,70 @@ def extract_from_codeblocks(text: str) -> str:
     pattern = r"```commit(?:`{3,})?(.*?)```(?:`{3,})?"
     matches = re.findall(pattern, text, re.DOTALL)
     return "\n".join(matches)
+class CommitBlockDetector:
+    """
+    Incremental detector for a complete commit block in a streamed response.
+
+    feed() takes each streamed delta and returns True once a closed
+    <COMMIT_MESSAGE>...</COMMIT_MESSAGE> or ```commit ... ``` block has been
+    received outside of a <think> section. Only a short window of recent
+    text is scanned, so tags split across chunks are still found without
+    rescanning the whole response.
+    """
+
+    _WINDOW = 32  # longer than any marker below
+
+    def __init__(self):
+        self._tail = ""
+        self._length = 0
+        self._started = False
+        self._thinking = False
+        self._open_end: Optional[int] = None  # absolute offset just past the opening marker
+        self._close_marker = ""
+        self.complete = False
+
+    def _find(self, window: str, window_start: int, marker: str, after: int = 0) -> Optional[int]:
+        index = window.find(marker, max(0, after - window_start))
+        return None if index == -1 else window_start + index
+
+    def feed(self, delta: str) -> bool:
+        if self.complete:
+            return True
+        window_start = self._length - len(self._tail)
+        window = self._tail + delta
+        lowered = window.lower()
+        self._length += len(delta)
+        self._tail = window[-self._WINDOW:]
+
+        if not self._started:
+            head = lowered.lstrip()
+            if not head or (len(head) < len("<think>") and "<think>".startswith(head)):
+                # Too early to tell whether a <think> section is opening
+                return False
+            self._started = True
+            self._thinking = head.startswith("<think>")
+        if self._thinking:
+            end = self._find(lowered, window_start, "</think>")
+            if end is None:
+                return False
+            self._thinking = False
+            lowered = lowered[end + len("</think>") - window_start:]
+            window_start = end + len("</think>")
+
+        if self._open_end is None:
+            tag = self._find(lowered, window_start, "<commit_message>")
+            fence = self._find(lowered, window_start, "```commit")
+            if tag is not None and (fence is None or tag < fence):
+                self._open_end, self._close_marker = tag + len("<commit_message>"), "</commit_message>"
+            elif fence is not None:
+                self._open_end, self._close_marker = fence + len("```commit"), "```"
+            else:
+                return False
+
+        if self._find(lowered, window_start, self._close_marker, after=self._open_end) is not None:
+            self.complete = True
+        return self.complete
+
 def extract_tag_value(text: str, tag: str) -> str:
     """
     Extract the value enclosed within specified XML-like or bracket-like tags, case-insensitive.
@@ -45,38 +123,65 @@ def extract_tag_value(text: str, tag: str) -> str:
         console.log(f"Could not extract `{tag}` because {str(e)}\n")
         return ""
 
+def stream_status_callback(status, limit: int = 2000):
+    """
+    Build a get_chat_completion status callback that shows the tail of the
+    streamed text and the running token count in a Rich status. Only the
+    last `limit` characters are kept, so each re-render stays cheap.
+    """
+    from rich.text import Text
+
+    tail = [""]
+
+    def update(delta: str, token_count: int):
+        tail[0] = (tail[0] + delta)[-limit:]
+        status.update(Text(tail[0]) + Text(f"\n{token_count} tokens", style="dim"))
+
+    return update
+
+def _escape_codeblocks(text: str) -> str:
+    """Escape existing code blocks in the diff."""
+    return text.replace("```", "\\`\\`\\`")
+
+def _file_block_header(file_diff, file_counter: int) -> List[str]:
+    header = []
+    if file_counter > 1:
+        # Add division between files
+        header.append("\n---\n")
+    header.append(f"### File: {file_diff.path} (+{file_diff.additions}, -{file_diff.deletions})")
+    header.append(f"```diff-file-{file_counter}")
+    return header
+
+def count_diff_prompt_tokens(diff: str) -> int:
+    """
+    Tokens of the diff as formatted by format_diff_with_codeblocks, counted
+    per file block so unchanged files are not re-tokenized between calls.
+    """
+    return sum(count_tokens(block) for block in format_diff_blocks(diff))
+
 def truncate_diff(diff: str, system_message: str, user_msg_appendix: str, max_tokens: int) -> str:
     """
-    Truncate the diff to ensure total token count doesn't exceed max_tokens.
+    Fit the diff into what is left of max_tokens after the system message
+    and `user_msg_appendix` (everything else in the request).
+
+    Files and hunks are kept by how much they say about the change (see
+    diff_budget.pack_diff); every dropped file still gets a one-line
+    summary. Pieces are measured escaped and with their per-file headers,
+    so one pass lands inside the budget.
     """
-    from math import floor, ceil
-    def count_tokens(text: str) -> int:
-        return len(text.split())
-    total_allowed_tokens = max_tokens - count_tokens(system_message) - count_tokens(user_msg_appendix)
-    current_tokens = count_tokens(diff)
-    if current_tokens <= total_allowed_tokens:
+    budget = TokenBudget(max_tokens)
+    budget.reserve(system_message)
+    budget.reserve(user_msg_appendix)
+    current_tokens = count_diff_prompt_tokens(diff)
+    if current_tokens <= budget.remaining:
         return diff
     if DEBUG:
-        logger.debug(f"Truncating diff from {current_tokens} to {total_allowed_tokens} tokens.")
-    diff_lines = diff.splitlines()
-    avg_tokens_per_line = current_tokens / max(len(diff_lines), 1)
-    lines_to_keep = floor(total_allowed_tokens / avg_tokens_per_line)
-    lines_to_keep = max(1, lines_to_keep)
-    if lines_to_keep < len(diff_lines):
-        head = diff_lines[: max(floor(lines_to_keep / 2), 1)]
-        tail = diff_lines[-max(ceil(lines_to_keep / 2), 1) :]
-        truncated_diff = "\n".join(head + ["..."] + tail)
-        logger.debug("Diff truncated to preserve context at both ends.")
-    else:
-        truncated_diff = diff
-    final_tokens = count_tokens(system_message + truncated_diff + user_msg_appendix)
-    if final_tokens > max_tokens:
-        if DEBUG:
-            logger.warning(
-                f"Truncated diff still exceeds max tokens ({final_tokens}/{max_tokens}). "
-                "Further truncation may be required."
-            )
-    return truncated_diff
+        logger.debug(f"Truncating diff from {current_tokens} to {budget.remaining} tokens.")
+
+    def file_overhead(file_diff, file_counter: int) -> int:
+        return count_tokens("\n".join(_file_block_header(file_diff, file_counter) + ["```"]))
+
+    return pack_diff(diff, budget.remaining, file_overhead=file_overhead, escape=_escape_codeblocks)
 
 
 def calculate_dynamic_max_tokens(
@@ -108,188 +213,450 @@ def calculate_dynamic_max_tokens(
     dynamic_max = min(request_tokens + increment, max_tokens)
     return dynamic_max
 
+def format_diff_blocks(diff: str) -> List[str]:
+    """
+    Format the diff as a list of blocks: any preamble, then one escaped,
+    fenced block per file. Joined with newlines they form the prompt text.
+    """
+    if not diff:
+        return []
+
+    parsed = parse_diff_text(diff)
+    blocks = []
+    preamble = _escape_codeblocks(parsed.preamble).splitlines()
+    if preamble:
+        blocks.append("\n".join(preamble))
+    for file_counter, file_diff in enumerate(parsed, start=1):
+        block = _file_block_header(file_diff, file_counter)
+        block.extend(_escape_codeblocks(parsed.text(file_diff)).splitlines())
+        block.append("```")
+        blocks.append("\n".join(block))
+    return blocks
+
 def format_diff_with_codeblocks(diff: str) -> str:
     """
     Format diff by escaping code blocks and wrapping each file diff in unique code blocks.
     """
     if not diff:
         return diff
-    
-    # Escape existing code blocks in the diff
-    escaped_diff = diff.replace("```", "\\`\\`\\`")
-    
-    # Split diff by files and wrap each in unique code blocks
-    file_pattern = re.compile(r"diff --git a/(.+?) b/(.+)")
-    lines = escaped_diff.splitlines()
-    formatted_lines = []
-    current_file_lines = []
-    file_counter = 0
-    
-    def count_additions_deletions(file_lines):
-        """Count additions and deletions in a file's diff lines."""
-        additions = 0
-        deletions = 0
-        for line in file_lines:
-            if line.startswith("+") and not line.startswith("+++"):
-                additions += 1
-            elif line.startswith("-") and not line.startswith("---"):
-                deletions += 1
-        return additions, deletions
-    
-    for line in lines:
-        match = file_pattern.match(line)
-        if match:
-            # Close previous file block if exists
-            if current_file_lines:
-                # Count additions/deletions for the previous file
-                additions, deletions = count_additions_deletions(current_file_lines)
-                # Extract filename from the first diff line of previous file
-                first_diff_line = next((line for line in current_file_lines if line.startswith("diff --git")), "")
-                if first_diff_line:
-                    prev_match = file_pattern.match(first_diff_line)
-                    if prev_match:
-                        prev_filename = prev_match.group(2)
-                        formatted_lines.append(f"### File: {prev_filename} (+{additions}, -{deletions})")
-                
-                current_file_lines.append("```")
-                formatted_lines.extend(current_file_lines)
-                current_file_lines = []
-                # Add division between files
-                formatted_lines.append("\n---\n")
-            
-            # Start new file block
-            file_counter += 1
-            current_file_lines = [f"```diff-file-{file_counter}", line]
-        else:
-            if current_file_lines:
-                current_file_lines.append(line)
+    return "\n".join(format_diff_blocks(diff))
+
+def get_commit_cache_key(model: str, instruct_prompt: str, custom_notes: Optional[str] = None) -> Optional[str]:
+    """
+    Build the commit-message cache key for the currently staged changes.
+
+    The staged diff is fully determined by HEAD's tree and the index tree
+    (`git write-tree`); model, prompt variant and custom notes complete the
+    key. Returns None when the staged tree cannot be determined.
+    """
+    trees = get_staged_tree_oids()
+    if trees is None:
+        return None
+    appendix = USER_MSG_APPENDIX_EMOJI if USE_EMOJIS else USER_MSG_APPENDIX
+    # Hash the prompt text itself so editing the prompts invalidates old entries
+    variant = hashlib.sha256((instruct_prompt + appendix).encode("utf-8")).hexdigest()
+    parts = [trees[0] or "", trees[1], model, variant, custom_notes or ""]
+    return "commit:" + hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+def summarize_oversized_diff(
+    MODEL: str,
+    diff: str,
+    quiet: bool = False,
+    cancel_token: Optional[CancelToken] = None
+) -> Optional[List]:
+    """
+    Map step for diffs far over the token limit: summarize the diff in
+    parallel chunks (see map_reduce.py). Returns (part, summary) pairs, or
+    None if summarizing failed and the caller should fall back to truncation.
+    quiet=True shows no progress, for work running in the background.
+    CompletionCancelled is raised when `cancel_token` is cancelled.
+    """
+    try:
+        if quiet:
+            return summarize_diff(MODEL, diff, format_diff=format_diff_with_codeblocks, cancel_token=cancel_token)
+        with console.status("[bold green]Summarizing a large diff in parts...[/bold green]") as status:
+            def progress(done: int, total: int):
+                status.update(f"> Summarizing a large diff with {clean_model_name(MODEL)}: {done}/{total} parts")
+
+            return summarize_diff(
+                MODEL, diff, format_diff=format_diff_with_codeblocks, on_progress=progress, cancel_token=cancel_token
+            )
+    except CompletionCancelled:
+        raise
+    except Exception as e:
+        if DEBUG:
+            logger.error(f"Failed to summarize the diff in parts: {e}")
+        if not quiet:
+            console.print(f"[bold yellow]Could not summarize the diff in parts ({e}); truncating it instead.[/bold yellow]")
+        return None
+
+@dataclass(frozen=True)
+class PreparedPrompt:
+    """
+    A commit-message request assembled once per model, staged diff and notes:
+    the messages with their token count, plus the diff stats used for the
+    sanity warnings. Retries reuse it as is.
+    """
+    model: str
+    custom_notes: Optional[str]
+    messages: Tuple[Dict[str, str], ...]
+    request_tokens: int
+    max_tokens: int
+    additions: int
+    deletions: int
+
+# Most recently prepared prompts, so a Retry of the same diff reuses the work.
+# Entries are futures, so a caller that asks while the same prompt is still
+# being prepared (e.g. by the speculative request) waits for it instead.
+_PREPARED_CACHE_SIZE = 4
+_prepared_prompts: "OrderedDict[str, Future]" = OrderedDict()
+_prepared_lock = threading.Lock()
+
+def prepare_commit_prompt(
+    MODEL: str,
+    diff: str,
+    custom_notes: Optional[str] = None,
+    quiet: bool = False,
+    cancel_token: Optional[CancelToken] = None
+) -> PreparedPrompt:
+    """
+    Build the commit-message request for a diff: format, count and, if
+    needed, summarize or truncate it. Memoized per model, diff, notes and
+    prompt variant; concurrent calls for the same key prepare it once.
+    quiet=True prints nothing (background preparation); `cancel_token`
+    stops the summarization requests of a diff that needs them.
+    """
+    INSTRUCT_PROMPT = SYSTEM_MESSAGE_EMOJI if USE_EMOJIS else SYSTEM_MESSAGE
+    memo_key = hashlib.sha256(
+        "\0".join([MODEL, INSTRUCT_PROMPT, custom_notes or "", diff]).encode("utf-8", errors="surrogatepass")
+    ).hexdigest()
+
+    while True:
+        with _prepared_lock:
+            future = _prepared_prompts.get(memo_key)
+            owner = future is None
+            if owner:
+                future = Future()
+                _prepared_prompts[memo_key] = future
+                while len(_prepared_prompts) > _PREPARED_CACHE_SIZE:
+                    _prepared_prompts.popitem(last=False)
             else:
-                # Line before any file diff
-                formatted_lines.append(line)
-    
-    # Close final file block if exists
-    if current_file_lines:
-        # Count additions/deletions for the last file
-        additions, deletions = count_additions_deletions(current_file_lines)
-        # Extract filename from the first diff line
-        first_diff_line = next((line for line in current_file_lines if line.startswith("diff --git")), "")
-        if first_diff_line:
-            match = file_pattern.match(first_diff_line)
-            if match:
-                filename = match.group(2)
-                formatted_lines.append(f"### File: {filename} (+{additions}, -{deletions})")
-        current_file_lines.append("```")
-        formatted_lines.extend(current_file_lines)
-    
-    return "\n".join(formatted_lines)
+                _prepared_prompts.move_to_end(memo_key)
+        if owner:
+            break
+        if not future.done() and not quiet:
+            logger.debug("Waiting for the commit prompt being prepared in the background.")
+            with console.status("[bold green]Preparing the commit request...[/bold green]"):
+                prepared = _wait_prepared(future)
+        else:
+            prepared = _wait_prepared(future)
+        if prepared is not None:
+            logger.debug("Reusing the prepared commit prompt.")
+            return prepared
+        # The other preparation failed and dropped its entry: prepare it here
+
+    def forget():
+        with _prepared_lock:
+            if _prepared_prompts.get(memo_key) is future:
+                del _prepared_prompts[memo_key]
+
+    try:
+        prepared, memoize = _build_commit_prompt(MODEL, INSTRUCT_PROMPT, diff, custom_notes, quiet, cancel_token)
+    except BaseException as e:
+        forget()
+        future.set_exception(e)
+        raise
+    if not memoize:
+        forget()
+    future.set_result(prepared)
+    return prepared
+
+def _wait_prepared(future: Future) -> Optional[PreparedPrompt]:
+    """Result of another caller's preparation, or None if it failed."""
+    try:
+        return future.result()
+    except Exception:
+        return None
+
+def _build_commit_prompt(
+    MODEL: str,
+    INSTRUCT_PROMPT: str,
+    diff: str,
+    custom_notes: Optional[str],
+    quiet: bool,
+    cancel_token: Optional[CancelToken]
+) -> Tuple[PreparedPrompt, bool]:
+    """The prepared request, and whether it may be memoized."""
+    # User content is the escaped and formatted diff, plus optional custom notes after diff
+    user_prefix = "START BY CAREFULLY REVIEWING THE FOLLOWING DIFF(S):\n\n"
+    user_suffix = ""
+    if custom_notes:
+        user_suffix += "\n\n## Custom User Notes\n```\n" + custom_notes + "\n```\n"
+    user_suffix += (USER_MSG_APPENDIX if not USE_EMOJIS else USER_MSG_APPENDIX_EMOJI)
+    fixed_tokens = count_tokens(INSTRUCT_PROMPT) + count_tokens(user_prefix) + count_tokens(user_suffix)
+
+    request_tokens = fixed_tokens + count_diff_prompt_tokens(diff)
+    logger.debug(f"request_tokens {request_tokens}")
+
+    max_tokens = calculate_dynamic_max_tokens(request_tokens, MAX_TOKENS)
+    logger.debug(f"max_tokens {max_tokens}")
+
+    # A prompt built after the map step failed is not memoized, so Retry tries it again
+    memoize = True
+    diff_content = None
+    if MAP_REDUCE_ENABLED and request_tokens > MAP_REDUCE_THRESHOLD * MAX_TOKENS:
+        # Far too large to truncate usefully: summarize it in parts, then write the message from those
+        summaries = summarize_oversized_diff(MODEL, diff, quiet=quiet, cancel_token=cancel_token)
+        if summaries:
+            user_prefix = "START BY CAREFULLY REVIEWING THE FOLLOWING SUMMARIES OF THE STAGED DIFF, ONE PER PART:\n\n"
+            diff_content = format_summaries(summaries)
+            request_tokens = (
+                count_tokens(INSTRUCT_PROMPT) + count_tokens(user_prefix)
+                + count_tokens(diff_content) + count_tokens(user_suffix)
+            )
+            max_tokens = calculate_dynamic_max_tokens(request_tokens, MAX_TOKENS)
+        else:
+            memoize = False
+
+    prompt_diff = diff
+    if diff_content is None and request_tokens > max_tokens:
+        if DEBUG:
+            logger.warning(f"Request exceeds max tokens ({request_tokens}/{max_tokens})\nTruncating...")
+        # Counts come from the same tokenizer as the request, so one pass is enough
+        prompt_diff = truncate_diff(diff, INSTRUCT_PROMPT, user_prefix + user_suffix, max_tokens)
+        request_tokens = fixed_tokens + count_diff_prompt_tokens(prompt_diff)
+        if DEBUG:
+            logger.debug(f"After truncation, request tokens are {request_tokens}/{max_tokens}.")
+
+    parsed_diff = parse_diff_text(diff)
+    prepared = PreparedPrompt(
+        model=MODEL,
+        custom_notes=custom_notes,
+        messages=(
+            {"role": "system", "content": INSTRUCT_PROMPT},
+            {"role": "user", "content": user_prefix + (diff_content or format_diff_with_codeblocks(prompt_diff)) + user_suffix},
+        ),
+        request_tokens=request_tokens,
+        max_tokens=max_tokens,
+        additions=sum(file_diff.additions for file_diff in parsed_diff),
+        deletions=sum(file_diff.deletions for file_diff in parsed_diff)
+    )
+    return prepared, memoize
+
+def confirm_prepared_prompt(prepared: PreparedPrompt) -> bool:
+    """Ask the user to confirm over-budget requests and deletion-heavy diffs."""
+    if prepared.request_tokens > prepared.max_tokens:
+        warning_message = (
+            f"The generated commit message exceeds the maximum token limit of {prepared.max_tokens} tokens. "
+            "Do you want to proceed?"
+        )
+        if not questionary.confirm(warning_message, style=configure_questionary_style()).ask():
+            return False
+
+    deletions, additions = prepared.deletions, prepared.additions
+    logger.debug(f"deletions: {deletions}, additions: {additions}")
+    if additions > 0:
+        if deletions > 2 * additions:
+            warning_message = (
+                f"The commit message indicates a high number of deletions ({deletions}) "
+                f"relative to additions ({additions}). Do you want to proceed?"
+            )
+            if not questionary.confirm(warning_message, style=configure_questionary_style()).ask():
+                return False
+    elif deletions > 0:
+        warning_message = (
+            f"The commit message indicates {deletions} deletions with no additions. "
+            "Do you want to proceed?"
+        )
+        if not questionary.confirm(warning_message, style=configure_questionary_style()).ask():
+            return False
+    return True
+
+def parse_commit_response(commit_response: str) -> Optional[str]:
+    """Extract the commit message from a model response, or None if it is not well formed."""
+    if "</think>" in commit_response:
+        commit_response = commit_response.split("</think>")[1]
+    if "<COMMIT_MESSAGE>" in commit_response:
+        return extract_tag_value(commit_response, "COMMIT_MESSAGE") or None
+    if "```commit" in commit_response:
+        return extract_from_codeblocks(commit_response) or None
+    return None
+
+class SpeculativeCommit:
+    """
+    Commit message generation started in the background as soon as the
+    staged diff is known, before the user has decided on custom notes.
+
+    It always generates for "no notes": generate_commit_message uses its
+    result when the notes stay empty, and the caller cancels it otherwise.
+    cancel() aborts the in-flight request right away.
+    """
+
+    def __init__(self, MODEL: str, diff: str):
+        self.model = MODEL
+        self.diff = diff
+        self._cancel_token = CancelToken()
+        self._future: Future = Future()
+        threading.Thread(target=self._run, name="gitsmart-speculative-commit", daemon=True).start()
+
+    def _run(self):
+        if not self._future.set_running_or_notify_cancel():
+            return
+        try:
+            self._future.set_result(self._generate())
+        except BaseException as e:
+            self._future.set_exception(e)
+
+    def _generate(self) -> Optional[str]:
+        prepared = prepare_commit_prompt(self.model, self.diff, quiet=True, cancel_token=self._cancel_token)
+        response = get_chat_completion(
+            model=self.model,
+            messages=list(prepared.messages),
+            max_tokens=prepared.max_tokens,
+            temperature=TEMPERATURE,
+            stream=True,
+            timeout=60,
+            cancel_token=self._cancel_token,
+            stop_when=CommitBlockDetector().feed
+        )
+        return parse_commit_response(response)
+
+    def matches(self, MODEL: str, diff: str, custom_notes: Optional[str]) -> bool:
+        return not custom_notes and MODEL == self.model and diff == self.diff and not self.cancelled
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_token.cancelled
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancel(self):
+        self._cancel_token.cancel()
+        self._future.cancel()
+
+    def result(self, timeout: Optional[float] = None) -> Optional[str]:
+        """The generated message, or None if generation failed or was cancelled."""
+        try:
+            return self._future.result(timeout)
+        except CompletionCancelled:
+            return None
+        except Exception as e:
+            if DEBUG:
+                logger.error(f"Speculative commit generation failed: {e}")
+            return None
+
+def start_speculative_commit(MODEL: str, diff: str, regenerate: bool = False) -> Optional[SpeculativeCommit]:
+    """
+    Start generating the commit message for `diff` in the background.
+    Returns None when there is nothing to gain: no diff, or a cached message.
+    """
+    if not diff:
+        return None
+    if COMMIT_CACHE_TTL > 0 and not regenerate:
+        INSTRUCT_PROMPT = SYSTEM_MESSAGE_EMOJI if USE_EMOJIS else SYSTEM_MESSAGE
+        cache_key = get_commit_cache_key(MODEL, INSTRUCT_PROMPT)
+        if cache_key and COMMIT_CACHE.get(cache_key):
+            return None
+    logger.debug("Starting speculative commit generation.")
+    return SpeculativeCommit(MODEL, diff)
 
-def generate_commit_message(MODEL: str, diff: str, custom_notes: Optional[str] = None) -> str:
+def generate_commit_message(
+    MODEL: str,
+    diff: str,
+    custom_notes: Optional[str] = None,
+    regenerate: bool = False,
+    speculative: Optional[SpeculativeCommit] = None
+) -> str:
     """
     Generate a commit message using an external service.
     Retries until a properly formatted commit message is received or max retries is reached.
+
+    `diff` must be the staged diff: messages are cached per staged tree, model,
+    prompt variant and notes. Pass regenerate=True to bypass the cached message.
+    The request itself is prepared once (prepare_commit_prompt) and reused by
+    every retry, including the Retry menu action.
+
+    A SpeculativeCommit started for the same diff is used when there are no
+    custom notes; if it failed, the message is requested again as usual.
+    It is cancelled whenever this returns or raises, whether or not its
+    result was used.
     """
-    max_tokens = MAX_TOKENS
+    try:
+        return _generate_commit_message(MODEL, diff, custom_notes, regenerate, speculative)
+    finally:
+        if speculative is not None:
+            speculative.cancel()
+
+def _generate_commit_message(
+    MODEL: str,
+    diff: str,
+    custom_notes: Optional[str],
+    regenerate: bool,
+    speculative: Optional[SpeculativeCommit]
+) -> str:
     logger.debug(USE_EMOJIS)
     INSTRUCT_PROMPT = SYSTEM_MESSAGE_EMOJI if USE_EMOJIS else SYSTEM_MESSAGE
     logger.debug("Entering generate_commit_message function.")
 
-    # Build user content with escaped and formatted diff, plus optional custom notes after diff
-    formatted_diff = format_diff_with_codeblocks(diff)
-    user_content = "START BY CAREFULLY REVIEWING THE FOLLOWING DIFF(S):\n\n" + formatted_diff
-    if custom_notes:
-        user_content += "\n\n## Custom User Notes\n```\n" + custom_notes + "\n```\n"
-    user_content += (USER_MSG_APPENDIX if not USE_EMOJIS else USER_MSG_APPENDIX_EMOJI)
-    
-    messages = [
-        {"role": "system", "content": INSTRUCT_PROMPT},
-        {"role": "user", "content": user_content},
-    ]
+    cache_key = get_commit_cache_key(MODEL, INSTRUCT_PROMPT, custom_notes) if COMMIT_CACHE_TTL > 0 else None
+    if cache_key and not regenerate:
+        cached_message = COMMIT_CACHE.get(cache_key)
+        if cached_message:
+            logger.debug("Commit message cache hit.")
+            console.print("[dim]Using the cached commit message for these staged changes (Retry regenerates it).[/dim]")
+            return cached_message
 
-    request_tokens = count_tokens_in_string(INSTRUCT_PROMPT + user_content)
-    logger.debug(f"request_tokens {request_tokens}")
+    if speculative is not None and not speculative.matches(MODEL, diff, custom_notes):
+        speculative.cancel()
+        speculative = None
 
+    prepared = prepare_commit_prompt(MODEL, diff, custom_notes)
+    if not confirm_prepared_prompt(prepared):
+        console.print("[bold red]Commit generation aborted by user.[/bold red]")
+        return ""
 
-    max_tokens =  calculate_dynamic_max_tokens(request_tokens,max_tokens)
+    if speculative is not None:
+        with console.status("[bold green]Waiting for response...[/bold green]") as status:
+            status.update(
+                f"> Analyzing changes to staged files with {clean_model_name(MODEL)} "
+                f"({prepared.request_tokens} tokens, started in the background)"
+            )
+            commit_message_text = speculative.result()
+        if commit_message_text:
+            if cache_key:
+                COMMIT_CACHE.set(cache_key, commit_message_text, expire=COMMIT_CACHE_TTL)
+            return commit_message_text
+        logger.debug("Speculative generation gave no message; requesting it again.")
 
     max_retries = 5
     retry_count = 0
-    logger.debug(f"max_tokens {max_tokens}")
 
     while retry_count < max_retries:
         logger.debug(f"attempt {retry_count}")
-        if request_tokens > max_tokens:
-            if DEBUG:
-                logger.warning(f"Request exceeds max tokens ({request_tokens}/{MAX_TOKENS})\nTruncating...")
-            truncated_diff = truncate_diff(diff, INSTRUCT_PROMPT, USER_MSG_APPENDIX, max_tokens)
-            # Rebuild user content with formatted truncated diff but preserve custom notes
-            formatted_truncated_diff = format_diff_with_codeblocks(truncated_diff)
-            truncated_user_content = "START BY CAREFULLY REVIEWING THE FOLLOWING DIFF(S):\n\n" + formatted_truncated_diff
-            if custom_notes:
-                truncated_user_content += "\n\n## Custom User Notes\n```\n" + custom_notes + "\n```\n"
-            truncated_user_content += (USER_MSG_APPENDIX if not USE_EMOJIS else USER_MSG_APPENDIX_EMOJI)
-            
-            messages = [
-                {"role": "system", "content": INSTRUCT_PROMPT},
-                {"role": "user", "content": truncated_user_content}
-            ]
-            request_tokens = count_tokens_in_string(INSTRUCT_PROMPT + truncated_user_content)
-            if DEBUG:
-                logger.debug(f"After truncation, request tokens are {request_tokens}/{max_tokens}.")
-
-        if request_tokens > max_tokens:
-            warning_message = (
-                f"The generated commit message exceeds the maximum token limit of {max_tokens} tokens. "
-                "Do you want to proceed?"
-            )
-            if not questionary.confirm(warning_message, style=configure_questionary_style()).ask():
-                console.print("[bold red]Commit generation aborted by user.[/bold red]")
-                return ""
-
-        deletions = sum(change["deletions"] for change in parse_diff(diff))
-        additions = sum(change["additions"] for change in parse_diff(diff))
-        logger.debug(f"deletions: {deletions}, additions: {additions}")
-        if additions > 0:
-            if deletions > 2 * additions:
-                warning_message = (
-                    f"The commit message indicates a high number of deletions ({deletions}) "
-                    f"relative to additions ({additions}). Do you want to proceed?"
-                )
-                if not questionary.confirm(warning_message, style=configure_questionary_style()).ask():
-                    console.print("[bold red]Commit generation aborted by user.[/bold red]")
-                    return ""
-        elif deletions > 0:
-            warning_message = (
-                f"The commit message indicates {deletions} deletions with no additions. "
-                "Do you want to proceed?"
-            )
-            if not questionary.confirm(warning_message, style=configure_questionary_style()).ask():
-                console.print("[bold red]Commit generation aborted by user.[/bold red]")
-                return ""
-
         try:
             with console.status("[bold green]Waiting for response...[/bold green]") as status:
-                prepend_msg = f"> Analyzing changes to staged files with {clean_model_name(MODEL)} ({request_tokens} tokens)"
+                prepend_msg = (
+                    f"> Analyzing changes to staged files with {clean_model_name(MODEL)} "
+                    f"({prepared.request_tokens} tokens)"
+                )
                 status.update(prepend_msg)
                 # Stream the commit message from the LLM provider using the new helper.
                 commit_response = get_chat_completion(
                     model=MODEL,
-                    messages=messages,
-                    max_tokens=max_tokens,
+                    messages=list(prepared.messages),
+                    max_tokens=prepared.max_tokens,
                     temperature=TEMPERATURE,
                     stream=True,
                     timeout=60,
-                    status_callback=lambda text: status.update(text)
+                    status_callback=stream_status_callback(status),
+                    # Stop streaming as soon as the commit block is closed
+                    stop_when=CommitBlockDetector().feed
                 )
-                if "</think>" in commit_response:
-                    commit_response = commit_response.split("</think>")[1]
-
-                commit_message_text = None
-                if "<COMMIT_MESSAGE>" in commit_response:
-                    commit_message_text = extract_tag_value(commit_response, "COMMIT_MESSAGE")
-                elif "```commit" in commit_response:
-                    commit_message_text = extract_from_codeblocks(commit_response)
-
+                commit_message_text = parse_commit_response(commit_response)
                 if commit_message_text:
+                    if cache_key:
+                        COMMIT_CACHE.set(cache_key, commit_message_text, expire=COMMIT_CACHE_TTL)
                     return commit_message_text
                 else:
                     if DEBUG:
@@ -313,6 +680,216 @@ def generate_commit_message(MODEL: str, diff: str, custom_notes: Optional[str] =
     console.print("[bold red]Failed to generate a properly formatted commit message after multiple attempts.[/bold red]")
     return ""
 
+async def generate_commit_message_async(
+    MODEL: str,
+    diff: str,
+    custom_notes: Optional[str] = None,
+    regenerate: bool = False,
+    deadline: Optional[float] = None,
+    cancel_token: Optional[CancelToken] = None
+) -> str:
+    """
+    Non-interactive generate_commit_message for asyncio callers (the MCP server).
+
+    Uses the same commit cache and prepared prompts. Git calls and prompt
+    preparation run on a worker thread, the request itself on the event
+    loop. Over-budget and deletion-heavy diffs are logged instead of asked
+    about. `deadline` is the number of seconds the whole generation may
+    take; running out of time, cancelling `cancel_token` or cancelling the
+    task stops the request and any chunk summaries in flight.
+    Returns "" when no well-formed message was received.
+    """
+    INSTRUCT_PROMPT = SYSTEM_MESSAGE_EMOJI if USE_EMOJIS else SYSTEM_MESSAGE
+    token = cancel_token or CancelToken()
+    loop = asyncio.get_event_loop()
+    started = time.monotonic()
+
+    def remaining() -> Optional[float]:
+        if deadline is None:
+            return None
+        left = deadline - (time.monotonic() - started)
+        if left <= 0:
+            raise CompletionCancelled(f"Commit generation deadline of {deadline}s exceeded")
+        return left
+
+    async def in_thread(fn, *args):
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(None, partial(fn, *args)), remaining())
+        except asyncio.TimeoutError:
+            raise CompletionCancelled(f"Commit generation deadline of {deadline}s exceeded")
+
+    try:
+        cache_key = None
+        if COMMIT_CACHE_TTL > 0:
+            cache_key = await in_thread(get_commit_cache_key, MODEL, INSTRUCT_PROMPT, custom_notes)
+        if cache_key and not regenerate:
+            cached_message = COMMIT_CACHE.get(cache_key)
+            if cached_message:
+                logger.debug("Commit message cache hit.")
+                return cached_message
+
+        prepared = await in_thread(prepare_commit_prompt, MODEL, diff, custom_notes, True, token)
+        if prepared.request_tokens > prepared.max_tokens:
+            logger.warning(f"Commit request exceeds max tokens ({prepared.request_tokens}/{prepared.max_tokens})")
+
+        max_retries = 5
+        for attempt in range(max_retries):
+            logger.debug(f"async attempt {attempt}")
+            try:
+                commit_response = await get_chat_completion_async(
+                    model=MODEL,
+                    messages=list(prepared.messages),
+                    max_tokens=prepared.max_tokens,
+                    temperature=TEMPERATURE,
+                    stream=True,
+                    timeout=60,
+                    cancel_token=token,
+                    deadline=remaining(),
+                    stop_when=CommitBlockDetector().feed
+                )
+            except CompletionCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to generate commit message: {e}")
+                await asyncio.sleep(min(2, remaining() or 2))
+                continue
+            commit_message_text = parse_commit_response(commit_response)
+            if commit_message_text:
+                if cache_key:
+                    COMMIT_CACHE.set(cache_key, commit_message_text, expire=COMMIT_CACHE_TTL)
+                return commit_message_text
+            logger.warning("Could not extract COMMIT_MESSAGE tags. Retrying...")
+        logger.error("Failed to generate a properly formatted commit message after multiple attempts.")
+        return ""
+    except BaseException:
+        # Stops map-reduce requests still running on the worker thread
+        token.cancel()
+        raise
+
+def iter_commit_candidates(
+    MODEL: str,
+    diff: str,
+    prepared: PreparedPrompt,
+    count: int = COMMIT_CANDIDATES
+) -> Iterator[List[str]]:
+    """
+    Request `count` commit messages for a prepared prompt concurrently (at
+    most HTTP_POOL_SIZE at a time, the size of the shared connection pool)
+    and yield the usable ones ranked best first each time a request
+    completes, so callers can show candidates as they arrive.
+
+    A failed request only loses its own candidate. Closing the generator
+    cancels the requests still in flight.
+    """
+    paths = [file_diff.path for file_diff in parse_diff_text(diff)]
+    cancel_token = CancelToken()
+
+    def request_candidate() -> Optional[str]:
+        try:
+            response = get_chat_completion(
+                model=MODEL,
+                messages=list(prepared.messages),
+                max_tokens=prepared.max_tokens,
+                temperature=TEMPERATURE,
+                stream=True,
+                timeout=60,
+                cancel_token=cancel_token,
+                stop_when=CommitBlockDetector().feed
+            )
+            return parse_commit_response(response)
+        except Exception as e:
+            if DEBUG:
+                logger.error(f"Commit candidate request failed: {e}")
+            return None
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(count, HTTP_POOL_SIZE)))
+    futures = [executor.submit(request_candidate) for _ in range(count)]
+    candidates: List[str] = []
+    try:
+        for future in as_completed(futures):
+            candidate = future.result()
+            if candidate:
+                candidates.append(candidate)
+            yield rank_commit_messages(candidates, paths)
+    finally:
+        cancel_token.cancel()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+def _render_candidates(ranked: List[str], status: str):
+    """The candidates received so far, best first, above a spinner line."""
+    from rich.console import Group
+    from rich.panel import Panel
+    from rich.spinner import Spinner
+
+    panels = [
+        Panel(candidate, title=f"{index}. {'recommended' if index == 1 else f'candidate {index}'}",
+              border_style="#ffffff", style="#ffffff on #0D1116")
+        for index, candidate in enumerate(ranked, start=1)
+    ]
+    return Group(*panels, Spinner("dots", text=status, style="bold green"))
+
+def generate_commit_candidates(
+    MODEL: str,
+    diff: str,
+    custom_notes: Optional[str] = None,
+    regenerate: bool = False,
+    count: int = COMMIT_CANDIDATES
+) -> List[str]:
+    """
+    Request `count` commit messages concurrently and return them ranked best
+    first by commit_ranker (conventional header, line lengths, files named).
+
+    Candidates are shown, ranked, as they arrive; Ctrl-C stops waiting and
+    keeps the ones received so far (or cancels if there are none). All
+    requests share one PreparedPrompt. If every request fails,
+    generate_commit_message's retry loop takes over. The best candidate of
+    a complete run is what gets cached for the staged tree.
+    """
+    from rich.live import Live
+
+    INSTRUCT_PROMPT = SYSTEM_MESSAGE_EMOJI if USE_EMOJIS else SYSTEM_MESSAGE
+    cache_key = get_commit_cache_key(MODEL, INSTRUCT_PROMPT, custom_notes) if COMMIT_CACHE_TTL > 0 else None
+    if cache_key and not regenerate:
+        cached_message = COMMIT_CACHE.get(cache_key)
+        if cached_message:
+            logger.debug("Commit message cache hit.")
+            console.print("[dim]Using the cached commit message for these staged changes (Retry regenerates it).[/dim]")
+            return [cached_message]
+
+    prepared = prepare_commit_prompt(MODEL, diff, custom_notes)
+    if not confirm_prepared_prompt(prepared):
+        console.print("[bold red]Commit generation aborted by user.[/bold red]")
+        return []
+
+    def status(done: int) -> str:
+        return (
+            f"> Generating {count} commit messages with {clean_model_name(MODEL)} "
+            f"({prepared.request_tokens} tokens): {done}/{count} received (Ctrl-C to choose now)"
+        )
+
+    ranked: List[str] = []
+    complete = False
+    try:
+        with Live(_render_candidates(ranked, status(0)), console=console, refresh_per_second=10, transient=True) as live:
+            for done, ranked in enumerate(iter_commit_candidates(MODEL, diff, prepared, count), start=1):
+                live.update(_render_candidates(ranked, status(done)))
+        complete = True
+    except KeyboardInterrupt:
+        if not ranked:
+            raise
+        console.print(f"[dim]Stopped waiting; choosing among {len(ranked)} received candidate(s).[/dim]")
+
+    if not ranked:
+        console.print("[bold yellow]No usable commit message among the candidates; retrying one at a time.[/bold yellow]")
+        message = generate_commit_message(MODEL, diff, custom_notes=custom_notes, regenerate=True)
+        return [message] if message else []
+
+    if cache_key and complete:
+        COMMIT_CACHE.set(cache_key, ranked[0], expire=COMMIT_CACHE_TTL)
+    return ranked
+
 def generate_summary(text: str) -> Optional[str]:
     """
     Generate a summary for the provided text using the external API.
@@ -323,7 +900,7 @@ def generate_summary(text: str) -> Optional[str]:
             {"role": "user", "content": text}
         ]
         with console.status("[bold green]Analyzing changes to staged files...[/bold green]") as status:
-            prepend_msg = f"Sending {count_tokens_in_string(text)} tokens to "
+            prepend_msg = f"Sending {count_tokens(text)} tokens to "
             status.update(f"{prepend_msg} {clean_model_name(MODEL)} ({TEMPERATURE})")
             summary = get_chat_completion(
                 model=MODEL,
@@ -332,7 +909,7 @@ def generate_summary(text: str) -> Optional[str]:
                 temperature=TEMPERATURE,
                 stream=True,
                 timeout=60,
-                status_callback=lambda text: status.update(text)
+                status_callback=stream_status_callback(status)
             )
             if summary:
                 if DEBUG:
@@ -349,6 +926,53 @@ def generate_summary(text: str) -> Optional[str]:
         console.print(f"[bold red]Failed to generate summary: {e}[/bold red]")
         return None
 
+def summarize_commits(commit_texts: List[str]) -> Optional[str]:
+    """
+    Summarize commit messages into release notes.
+
+    Commits that fit in one request go straight to generate_summary. Longer
+    histories are split into groups of at most map_reduce_chunk_tokens tokens,
+    condensed in parallel (map_reduce_concurrency at a time), and the
+    condensed notes are then summarized in one final request.
+    """
+    groups = group_by_tokens(commit_texts, MAP_REDUCE_CHUNK_TOKENS)
+    if len(groups) <= 1:
+        return generate_summary("\n\n---\n\n".join(commit_texts))
+
+    def condense(group: List[str]) -> str:
+        messages = [
+            {"role": "system", "content": COMMIT_GROUP_SUMMARY_PROMPT},
+            {"role": "user", "content": "\n\n---\n\n".join(group)}
+        ]
+        notes = get_chat_completion(
+            model=MODEL,
+            messages=messages,
+            max_tokens=SUMMARY_MAX_TOKENS,
+            temperature=TEMPERATURE,
+            stream=True,
+            timeout=60
+        )
+        if "</think>" in notes:
+            notes = notes.split("</think>")[1]
+        return notes.strip()
+
+    try:
+        with console.status("[bold green]Condensing commits...[/bold green]") as status:
+            def progress(done: int, total: int):
+                status.update(
+                    f"> Condensing {len(commit_texts)} commits with {clean_model_name(MODEL)}: {done}/{total} groups"
+                )
+
+            progress(0, len(groups))
+            partials = map_bounded(condense, groups, MAP_REDUCE_CONCURRENCY, on_done=progress)
+    except Exception as e:
+        if DEBUG:
+            logger.error(f"Failed to condense commit groups: {e}")
+        console.print(f"[bold red]Failed to generate summary: {e}[/bold red]")
+        return None
+
+    return generate_summary("\n\n---\n\n".join(partial for partial in partials if partial))
+
 def clean_model_name(model_name):
     """
     Clean or strip unwanted tokens from the model's display name.
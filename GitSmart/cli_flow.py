@@ -30,11 +30,13 @@ fancy_questionary_style = Style([
     ("count", "bold")                     # For bold file counts in menus
 ])
 
-from .config import logger, MODEL_CACHE, MODEL, DEFAULT_MODEL, DEBUG
+from .config import (
+    logger, MODEL_CACHE, MODEL, DEFAULT_MODEL, DEBUG, SPECULATIVE_GENERATION, COMMIT_CANDIDATES,
+    DIFF_PAGE_FILES, DIFF_PAGE_LINES, DIFF_HIGHLIGHT_MAX_LINES, DIFF_COLLAPSE_GENERATED
+)
 from .ui import console, printer, create_styled_table, configure_questionary_style
 from .git_utils import (
-    parse_diff,
-    get_git_diff,
+    get_change_summary,
     get_file_diff,
     stage_files,
     unstage_files,
@@ -45,7 +47,12 @@ from .git_utils import (
     get_all_branches,
     push_to_remote
 )
-from .ai_utils import generate_commit_message, generate_summary, extract_tag_value
+from .diff_model import parse_diff_text
+from .diff_budget import is_generated_file
+from .ai_utils import (
+    generate_commit_message, generate_commit_candidates, start_speculative_commit,
+    summarize_commits, extract_tag_value
+)
 
 """
 cli_flow.py
@@ -69,8 +76,6 @@ def main_menu_prompt(MODEL: str, title: str, choices: list) -> str:
     Always shows "Generate Commit" first when available, with colored additions and deletions.
     Additions are consistently shown in green (+) and deletions in red (-) for better visibility.
     """
-    # Check for staged changes to highlight 'Generate Commit'
-    _, _, staged_changes, unstaged_changes = get_status()
     styled_choices = []
     commit_option = None
     default_choice = None
@@ -81,8 +86,9 @@ def main_menu_prompt(MODEL: str, title: str, choices: list) -> str:
             commit_option = c
             break
 
-    # Add the generate commit option first if it exists
-    if commit_option and staged_changes:
+    # Add the generate commit option first if it exists.
+    # get_menu_options only offers it when staged changes exist.
+    if commit_option:
         styled_choices.append(
             questionary.Choice(
                 title=f"🌟 {commit_option}", # Style will be handled by 'highlighted' in fancy_questionary_style
@@ -260,14 +266,37 @@ def handle_stage_files(unstaged_changes: List[Dict[str, Any]]) -> str:
 def handle_unstage_files(staged_changes: List[Dict[str, Any]]) -> str:
     return handle_files(staged_changes, "unstage")
 
+def plain_diff_text(diff_lines: List[str]):
+    """
+    Color a diff by line prefix only. Used instead of Syntax for large files,
+    where full highlighting with line numbers is slow to build and render.
+    """
+    from rich.text import Text
+
+    text = Text(no_wrap=False)
+    for line in diff_lines:
+        if line.startswith("+") and not line.startswith("+++"):
+            style = "bright_green"
+        elif line.startswith("-") and not line.startswith("---"):
+            style = "bright_red"
+        elif line.startswith("@@"):
+            style = "cyan"
+        else:
+            style = ""
+        text.append(line + "\n", style=style)
+    return text
+
 def display_diff_panel(
     filename: str,
     diff_lines: List[str],
     file_changes: List[Dict[str, Any]],
-    panel_width: int = 100
+    panel_width: int = 100,
+    highlight: Optional[bool] = None
 ):
     """
     Show a single file's diff in a Rich Panel.
+    Syntax highlighting is skipped above diff_highlight_max_lines unless
+    `highlight` says otherwise.
     """
     from rich.panel import Panel
     from rich.syntax import Syntax
@@ -281,7 +310,12 @@ def display_diff_panel(
 
     is_staged = any(ch["file"] == filename for ch in file_changes)
     title = f"[bold blue]{filename}[/bold blue] [{'Staged' if is_staged else 'Unstaged'}]"
-    syntax = Syntax(diff_text, "diff", theme="github-dark", line_numbers=True)
+    if highlight is None:
+        highlight = len(diff_lines) <= DIFF_HIGHLIGHT_MAX_LINES
+    if highlight:
+        syntax = Syntax(diff_text, "diff", theme="github-dark", line_numbers=True)
+    else:
+        syntax = plain_diff_text(diff_lines or [diff_text])
 
     changes = next((ch for ch in file_changes if ch["file"] == filename), {})
     additions = changes.get("additions", 0)
@@ -330,6 +364,32 @@ def get_diff_summary_panel(
         table.add_row(ch["file"], f"+{ch['additions']}", f"-{ch['deletions']}")
     return table
 
+def iter_diff_pages(parsed, page_files: int = DIFF_PAGE_FILES, page_lines: int = DIFF_PAGE_LINES):
+    """
+    Yield lists of FileDiffs, one list per page: at most page_files files and
+    about page_lines diff lines (a bigger file still gets a page of its own).
+    """
+    page, lines = [], 0
+    for file_diff in parsed:
+        file_lines = parsed.buffer.count("\n", file_diff.start, file_diff.end)
+        if page and (len(page) >= page_files or lines + file_lines > page_lines):
+            yield page
+            page, lines = [], 0
+        page.append(file_diff)
+        lines += file_lines
+    if page:
+        yield page
+
+def collapse_reason(file_diff) -> Optional[str]:
+    """Why a file is shown as a single line instead of its diff, if it is."""
+    if file_diff.binary:
+        return "binary"
+    if file_diff.is_rename and not file_diff.hunks:
+        return f"renamed from {file_diff.old_path}"
+    if DIFF_COLLAPSE_GENERATED and is_generated_file(file_diff.path):
+        return "generated"
+    return None
+
 def display_file_diffs(
     diff: str,
     staged_file_changes: List[Dict[str, Any]],
@@ -337,43 +397,104 @@ def display_file_diffs(
     panel_width: int = 100
 ):
     """
-    For each file in the diff, display a separate Rich panel with syntax highlighting.
-    """
-    from rich.console import Group
-    import re
-
-    file_pattern = re.compile(r"diff --git a/(.+?) b/(.+)")
-    current_file = None
-    current_diff = []
-    panels = []
-
-    for line in diff.splitlines():
-        match = file_pattern.match(line)
-        if match:
-            if current_file:
-                panel = display_diff_panel(current_file, current_diff, staged_file_changes, panel_width=panel_width)
-                if panel:
-                    panels.append(panel)
-            current_file = match.group(2)
-            current_diff = [line]
-        else:
-            current_diff.append(line)
+    Display each file in the diff in its own Rich panel, a page at a time.
 
-    # Last file
-    if current_file:
-        panel = display_diff_panel(current_file, current_diff, staged_file_changes, panel_width=panel_width)
-        if panel:
-            panels.append(panel)
+    Panels are built and printed per file, so output starts right away;
+    binary, pure-rename and generated files are collapsed to one line, and
+    large files are shown without syntax highlighting. In a terminal the
+    user is asked before each further page.
+    """
+    from rich.align import Align
 
-    if panels:
-        grouped_panels = Group(*panels)
-        console.print(grouped_panels)
-    else:
+    parsed = parse_diff_text(diff)
+    if not parsed.files:
         console.print("[bold yellow]No diffs to display.[/bold yellow]")
+        return
 
-def handle_generate_commit(MODEL: str, diff: str, staged_changes: List[Dict[str, Any]]):
+    shown = 0
+    show_all = not console.is_terminal
+    for page in iter_diff_pages(parsed, DIFF_PAGE_FILES, DIFF_PAGE_LINES):
+        if shown and not show_all:
+            remaining = len(parsed.files) - shown
+            try:
+                action = questionary.select(
+                    f"{remaining} more file(s) in the diff:",
+                    choices=["Next page", "Show all", "Skip the rest"],
+                    style=configure_questionary_style()
+                ).unsafe_ask(patch_stdout=True)
+            except Exception as e:
+                # RefreshMenuException and other interruptions: stop paging
+                if DEBUG:
+                    logger.debug(f"Diff paging interrupted: {e}")
+                action = "Skip the rest"
+            if action == "Show all":
+                show_all = True
+            elif action != "Next page":
+                console.print(f"[dim]{remaining} file(s) not shown.[/dim]")
+                return
+
+        for file_diff in page:
+            reason = collapse_reason(file_diff)
+            if reason:
+                console.print(Align.center(
+                    f"[dim]{file_diff.path} ({reason}, +{file_diff.additions}, -{file_diff.deletions}) collapsed[/dim]",
+                    width=panel_width
+                ))
+            else:
+                console.print(display_diff_panel(
+                    file_diff.path, parsed.lines(file_diff), staged_file_changes, panel_width=panel_width
+                ))
+            shown += 1
+
+def choose_commit_candidate(candidates: List[str]) -> str:
+    """
+    Let the user pick one of several ranked commit messages (best first).
+    Returns "" if there are none or the choice is cancelled.
+    """
+    from rich.panel import Panel
+
+    if len(candidates) <= 1:
+        return candidates[0] if candidates else ""
+
+    for index, candidate in enumerate(candidates, start=1):
+        label = "recommended" if index == 1 else f"candidate {index}"
+        console.print(Panel(candidate, title=f"{index}. {label}", border_style="#ffffff", style="#ffffff on #0D1116"))
+
+    choices = [
+        questionary.Choice(
+            title=f"{index}. {candidate.strip().splitlines()[0]}" + (" (recommended)" if index == 1 else ""),
+            value=candidate
+        )
+        for index, candidate in enumerate(candidates, start=1)
+    ]
+    try:
+        selected = questionary.select(
+            "Choose a commit message:",
+            choices=choices,
+            style=configure_questionary_style()
+        ).unsafe_ask(patch_stdout=True)
+    except Exception as e:
+        # Handle RefreshMenuException and other interruptions: keep the best candidate
+        if DEBUG:
+            logger.debug(f"Candidate selection interrupted: {e}")
+        selected = candidates[0]
+    return selected or ""
+
+def handle_generate_commit(
+    MODEL: str,
+    diff: str,
+    staged_changes: List[Dict[str, Any]],
+    regenerate: bool = False
+):
     """
     Generate commit message with AI, let the user commit or edit the result.
+    Retry passes regenerate=True so a cached message is not shown again;
+    the prepared request is reused unless the notes change.
+
+    With speculative_generation enabled, the request starts in the background
+    before the diffs are rendered, and is cancelled if custom notes are added.
+    With commit_candidates > 1, that many messages are requested at once,
+    shown ranked as they arrive, and the user picks one from the list.
     """
     from rich.panel import Panel
     from rich.padding import Padding
@@ -383,44 +504,59 @@ def handle_generate_commit(MODEL: str, diff: str, staged_changes: List[Dict[str,
         console.print("[bold red]No staged changes found.[/bold red]")
         return
 
-    display_file_diffs(diff, staged_changes, subtitle="Changes: Additions and Deletions")
+    speculative = None
+    if SPECULATIVE_GENERATION and COMMIT_CANDIDATES == 1:
+        speculative = start_speculative_commit(MODEL, diff, regenerate=regenerate)
 
-    # Prompt for custom notes
+    # However this block is left, the background request must not keep running
     try:
-        add_notes = questionary.text(
-            "Add custom notes to guide the commit message? (y/n, Enter to skip):",
-            style=configure_questionary_style()
-        ).unsafe_ask(patch_stdout=True)
+        display_file_diffs(diff, staged_changes, subtitle="Changes: Additions and Deletions")
 
-        custom_notes = None
-        if add_notes and add_notes.strip().lower() == "y":
-            notes = questionary.text(
-                "Enter your custom notes (Markdown supported):",
-                multiline=True,
+        # Prompt for custom notes
+        try:
+            add_notes = questionary.text(
+                "Add custom notes to guide the commit message? (y/n, Enter to skip):",
                 style=configure_questionary_style()
             ).unsafe_ask(patch_stdout=True)
-            if notes:
-                # Escape triple backticks
-                notes = notes.replace("```", "\\`\\`\\`")
-                custom_notes = notes
-    except KeyboardInterrupt:
-        console.print("[bold yellow]⚠️  Cancelled commit generation[/bold yellow]")
-        raise MenuNavigationException("User cancelled commit generation")
-    except Exception as e:
-        # Handle RefreshMenuException and other interruptions during commit generation
-        if "RefreshMenuException" in str(type(e)):
-            console.print("[bold yellow]⚠️  Auto-refresh disabled during commit generation[/bold yellow]")
-            # Continue with empty notes
-            custom_notes = None
-        else:
-            console.print(f"[bold yellow]⚠️  Input error: {e}[/bold yellow]")
+
             custom_notes = None
+            if add_notes and add_notes.strip().lower() == "y":
+                notes = questionary.text(
+                    "Enter your custom notes (Markdown supported):",
+                    multiline=True,
+                    style=configure_questionary_style()
+                ).unsafe_ask(patch_stdout=True)
+                if notes:
+                    # Escape triple backticks
+                    notes = notes.replace("```", "\\`\\`\\`")
+                    custom_notes = notes
+        except KeyboardInterrupt:
+            console.print("[bold yellow]⚠️  Cancelled commit generation[/bold yellow]")
+            raise MenuNavigationException("User cancelled commit generation")
+        except Exception as e:
+            # Handle RefreshMenuException and other interruptions during commit generation
+            if "RefreshMenuException" in str(type(e)):
+                console.print("[bold yellow]⚠️  Auto-refresh disabled during commit generation[/bold yellow]")
+                # Continue with empty notes
+                custom_notes = None
+            else:
+                console.print(f"[bold yellow]⚠️  Input error: {e}[/bold yellow]")
+                custom_notes = None
 
-    try:
-        commit_message = generate_commit_message(MODEL, diff, custom_notes=custom_notes)
-    except KeyboardInterrupt:
-        console.print("[bold yellow]⚠️  Cancelled commit generation[/bold yellow]")
-        raise MenuNavigationException("User cancelled commit generation")
+        try:
+            if COMMIT_CANDIDATES > 1:
+                candidates = generate_commit_candidates(MODEL, diff, custom_notes=custom_notes, regenerate=regenerate)
+                commit_message = choose_commit_candidate(candidates)
+            else:
+                commit_message = generate_commit_message(
+                    MODEL, diff, custom_notes=custom_notes, regenerate=regenerate, speculative=speculative
+                )
+        except KeyboardInterrupt:
+            console.print("[bold yellow]⚠️  Cancelled commit generation[/bold yellow]")
+            raise MenuNavigationException("User cancelled commit generation")
+    finally:
+        if speculative is not None:
+            speculative.cancel()
 
     if commit_message:
         printer.print_divider()
@@ -515,7 +651,7 @@ def handle_generate_commit(MODEL: str, diff: str, staged_changes: List[Dict[str,
             elif confirm_edit == "Retry":
                 if DEBUG:
                     logger.debug("Retrying commit message generation.")
-                return handle_generate_commit(MODEL, diff, staged_changes)
+                return handle_generate_commit(MODEL, diff, staged_changes, regenerate=True)
             else:
                 if DEBUG:
                     logger.debug("Commit aborted by user.")
@@ -524,7 +660,7 @@ def handle_generate_commit(MODEL: str, diff: str, staged_changes: List[Dict[str,
         elif action == "Retry":
             if DEBUG:
                 logger.debug("Retrying commit message generation.")
-            return handle_generate_commit(MODEL, diff, staged_changes)
+            return handle_generate_commit(MODEL, diff, staged_changes, regenerate=True)
 
         else:
             if DEBUG:
@@ -537,9 +673,7 @@ def handle_generate_commit(MODEL: str, diff: str, staged_changes: List[Dict[str,
 
 def handle_review_changes(
     staged_changes: List[Dict[str, Any]],
-    unstaged_changes: List[Dict[str, Any]],
-    diff: str,
-    unstaged_diff: str
+    unstaged_changes: List[Dict[str, Any]]
 ):
     """
     Let the user select files from both staged & unstaged sets to see diffs individually.
@@ -628,8 +762,13 @@ def get_diff_summary_table(file_changes: List[Dict[str, Any]], color: str):
         return table
 
     for ch in file_changes:
+        label = ch["file"]
+        if ch.get("old_file"):
+            label = f"{ch['old_file']} → {label}"
+        if ch.get("binary"):
+            label += " [dim](binary)[/dim]"
         table.add_row(
-            Padding(ch["file"], (0, 2)),
+            Padding(label, (0, 2)),
             Padding(f"[dim]([/dim][bright_green]+{ch['additions']}[/][dim])[/dim]", (0, 2)),
             Padding(f"[dim]([/dim][bright_red]-{ch['deletions']}[/][dim])[/dim]", (0, 2))
         )
@@ -684,25 +823,24 @@ def display_status(
     elif staged:
         console.print("[dim]No staged changes[/dim]")
 
-def get_status() -> Tuple[str, str, List[Dict[str, Any]], List[Dict[str, Any]]]:
+def get_status() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
-    Return diffs for staged and unstaged changes, plus parse them into lists.
+    Return the staged and unstaged file lists with per-file +/- counts.
+
+    Only file lists and numstat counts are collected here; full diff bodies
+    are fetched lazily with get_git_diff() by the flows that need them.
     """
-    diff = get_git_diff(staged=True)
-    unstaged_diff = get_git_diff(staged=False)
-    staged_changes = parse_diff(diff)
-    unstaged_changes = parse_diff(unstaged_diff)
-    return diff, unstaged_diff, staged_changes, unstaged_changes
+    return get_change_summary()
 
 def get_and_display_status():
     """
     Always show both Unstaged Changes and Staged Changes panels,
-    returning the raw diffs + parsed lists for further operations.
+    returning the parsed lists for further operations.
     """
-    diff, unstaged_diff, staged_changes, unstaged_changes = get_status()
+    staged_changes, unstaged_changes = get_status()
     # Force staged=True, unstaged=True so both panels appear every time
     display_status(unstaged_changes, staged_changes, staged=True, unstaged=True)
-    return diff, unstaged_diff, staged_changes, unstaged_changes
+    return staged_changes, unstaged_changes
 
 def select_model():
     """
@@ -1136,10 +1274,8 @@ def summarize_selected_commits():
         console.print("[bold yellow]No commits selected for summarization.[/bold yellow]")
         return
 
-    combined_messages = "\n\n---\n\n".join(
-        f"{c['hash']} {c['message']}\n{c['full_message']}"
-        for c in selected_commits
-    )
+    commit_texts = [f"{c['hash']} {c['message']}\n{c['full_message']}" for c in selected_commits]
+    combined_messages = "\n\n---\n\n".join(commit_texts)
     console.print(Panel(
         Markdown(combined_messages),
         title="Commit Messages",
@@ -1147,7 +1283,7 @@ def summarize_selected_commits():
         style="white on #0D1116"
     ))
 
-    summary = generate_summary(combined_messages)
+    summary = summarize_commits(commit_texts)
     if summary:
         console.print(
             Padding(Panel(
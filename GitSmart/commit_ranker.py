@@ -0,0 +1,81 @@
+import os
+import re
+from typing import Iterable, List, Tuple
+
+"""
+commit_ranker.py
+
+- Cheap local ranking of candidate commit messages, no model calls
+- Scores conventional-commit form of the header (an emoji prefix and a
+  "type, type(scope)" pair are accepted), line lengths under 74 characters,
+  the blank line after the header, and mentions of the touched files
+"""
+
+MAX_LINE_LENGTH = 74
+
+_HEADER = re.compile(
+    r"^(?:[^\w\s]\s*){0,8}"                   # optional emoji / symbol prefix
+    r"[a-z]+(?:\([^)]+\))?"                   # type(scope)
+    r"(?:\s*[,/&+]\s*[a-z]+(?:\([^)]+\))?)*"  # dual types
+    r"!?:\s+\S"
+)
+
+# Weights of the individual checks
+_WEIGHT_HEADER = 3.0
+_WEIGHT_HEADER_LENGTH = 1.0
+_WEIGHT_BODY_LENGTH = 1.0
+_WEIGHT_BLANK_LINE = 0.5
+_WEIGHT_FILES = 1.5
+
+
+def _mentioned_files(message: str, touched_paths: Iterable[str]) -> Tuple[int, int]:
+    """(touched files mentioned by name or stem, files worth mentioning)."""
+    lower = message.lower()
+    names = {os.path.basename(path).lower() for path in touched_paths if path}
+    mentioned = 0
+    for name in names:
+        stem = os.path.splitext(name)[0]
+        if name in lower or (len(stem) > 2 and stem in lower):
+            mentioned += 1
+    return mentioned, min(len(names), 3)
+
+
+def score_commit_message(message: str, touched_paths: Iterable[str] = ()) -> float:
+    """Score a commit message; higher is better."""
+    lines = message.strip().splitlines()
+    if not lines:
+        return 0.0
+    header, body = lines[0].strip(), lines[1:]
+
+    score = 0.0
+    if _HEADER.match(header):
+        score += _WEIGHT_HEADER
+    if len(header) <= MAX_LINE_LENGTH:
+        score += _WEIGHT_HEADER_LENGTH
+    if body:
+        within = sum(1 for line in body if len(line) <= MAX_LINE_LENGTH)
+        score += _WEIGHT_BODY_LENGTH * within / len(body)
+        if not body[0].strip():
+            score += _WEIGHT_BLANK_LINE
+    else:
+        score += _WEIGHT_BODY_LENGTH + _WEIGHT_BLANK_LINE
+
+    mentioned, expected = _mentioned_files(message, touched_paths)
+    if expected:
+        score += _WEIGHT_FILES * min(1.0, mentioned / expected)
+    return score
+
+
+def rank_commit_messages(messages: Iterable[str], touched_paths: Iterable[str] = ()) -> List[str]:
+    """
+    Return distinct, non-empty messages best first. Ties keep the order the
+    messages arrived in.
+    """
+    touched_paths = list(touched_paths)
+    unique: List[str] = []
+    for message in messages:
+        if message and message.strip() and message not in unique:
+            unique.append(message)
+    scored = [(score_commit_message(message, touched_paths), index) for index, message in enumerate(unique)]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [unique[index] for _, index in scored]
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, List, Optional
+
+"""
+concurrency.py
+
+- Small thread-pool helpers shared by modules that must stay light to import
+  (repository stats, discovery) and by the LLM map-reduce code
+"""
+
+
+def map_bounded(
+    fn: Callable,
+    items: Iterable,
+    max_workers: int,
+    on_done: Optional[Callable[[int, int], None]] = None
+) -> List:
+    """
+    Run fn over items on a thread pool of at most max_workers threads.
+
+    Results keep the order of items. `on_done(completed, total)` is called
+    from the calling thread as results arrive. The first exception cancels
+    the work that has not started yet and is re-raised.
+    """
+    items = list(items)
+    results: List = [None] * len(items)
+    if not items:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        futures = {executor.submit(fn, item): index for index, item in enumerate(items)}
+        try:
+            for completed, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                if on_done is not None:
+                    on_done(completed, len(items))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return results
@@ -22,16 +22,62 @@ MODEL = MODEL_CACHE.get("last_model", config["API"]["model"])
 DEFAULT_MODEL = config["API"]["model"]
 MAX_TOKENS = int(config["API"]["max_tokens"])
 TEMPERATURE = float(config["API"]["temperature"])
+# Keep-alive connection pool and retry policy for LLM requests
+HTTP_POOL_SIZE = int(config.get("API", "pool_size", fallback="4"))
+HTTP_MAX_RETRIES = int(config.get("API", "max_retries", fallback="3"))
+HTTP_RETRY_BACKOFF = float(config.get("API", "retry_backoff", fallback="0.5"))
 USE_EMOJIS = config["PROMPTING"]["use_emojis"].lower() == "true"
+# Diffs over map_reduce_threshold x max_tokens are summarized in chunks, then combined;
+# chunk size and concurrency also apply to summarizing long commit histories
+MAP_REDUCE_ENABLED = config.get("PROMPTING", "map_reduce", fallback="true").lower() == "true"
+MAP_REDUCE_THRESHOLD = float(config.get("PROMPTING", "map_reduce_threshold", fallback="2.0"))
+MAP_REDUCE_CHUNK_TOKENS = int(config.get("PROMPTING", "map_reduce_chunk_tokens", fallback="6000"))
+MAP_REDUCE_CONCURRENCY = int(config.get("PROMPTING", "map_reduce_concurrency", fallback="4"))
+# Candidate messages requested in parallel and ranked locally; 1 asks for a single message
+COMMIT_CANDIDATES = max(1, int(config.get("PROMPTING", "commit_candidates", fallback="1")))
 DEBUG = config["APP"]["debug"].lower() == "true"
 AUTO_REFRESH = config["APP"]["auto_refresh"].lower() == "true"
 AUTO_REFRESH_INTERVAL = int(config["APP"]["auto_refresh_interval"])
+# "auto" uses filesystem events when watchdog is installed, else polling
+AUTO_REFRESH_BACKEND = config.get("APP", "auto_refresh_backend", fallback="auto").lower()
+AUTO_REFRESH_DEBOUNCE = float(config.get("APP", "auto_refresh_debounce", fallback="0.3"))
+# Polls between forced full status checks when the fingerprint is unchanged
+AUTO_REFRESH_FULL_CHECK_EVERY = int(config.get("APP", "auto_refresh_full_check_every", fallback="5"))
+# Memory cap for the per-file diff cache, in megabytes
+DIFF_CACHE_MAX_MB = float(config.get("APP", "diff_cache_max_mb", fallback="32"))
+# Generated commit messages, keyed by the staged tree; a TTL of 0 disables the cache
+COMMIT_CACHE_TTL = int(config.get("APP", "commit_cache_ttl", fallback="604800"))
+COMMIT_CACHE_SIZE_MB = int(config.get("APP", "commit_cache_size_mb", fallback="16"))
+COMMIT_CACHE = Cache(
+    os.path.join(history_dir, "commit_cache"),
+    size_limit=COMMIT_CACHE_SIZE_MB * 1024 * 1024,
+    eviction_policy="least-recently-used"
+)
+# Diff viewer: files and lines per page, syntax highlighting cut-off, and
+# whether lockfiles / generated files are collapsed to one line
+DIFF_PAGE_FILES = int(config.get("APP", "diff_page_files", fallback="20"))
+DIFF_PAGE_LINES = int(config.get("APP", "diff_page_lines", fallback="1500"))
+DIFF_HIGHLIGHT_MAX_LINES = int(config.get("APP", "diff_highlight_max_lines", fallback="400"))
+DIFF_COLLAPSE_GENERATED = config.get("APP", "diff_collapse_generated", fallback="true").lower() == "true"
+# Start generating the commit message in the background while the staged diff is reviewed
+SPECULATIVE_GENERATION = config.get("APP", "speculative_generation", fallback="false").lower() == "true"
+# Repository discovery: directories never descended into, depth limit and scanning threads
+DISCOVERY_PRUNE = [
+    name.strip() for name in config.get(
+        "APP", "discovery_prune",
+        fallback="node_modules,.venv,venv,__pycache__,build,dist,target,.tox,.mypy_cache,.pytest_cache,.cache,.gradle,.idea,site-packages"
+    ).split(",") if name.strip()
+]
+DISCOVERY_MAX_DEPTH = int(config.get("APP", "discovery_max_depth", fallback="6"))
+DISCOVERY_CONCURRENCY = int(config.get("APP", "discovery_concurrency", fallback="8"))
 TOKEN_INCREMENT = 3000
 
 # MCP Server Configuration
 MCP_ENABLED = config.get("MCP", "enabled", fallback="false").lower() == "true"
 MCP_PORT = int(config.get("MCP", "port", fallback="8765"))
 MCP_HOST = config.get("MCP", "host", fallback="127.0.0.1")
+# Seconds an MCP commit generation may take before it is cancelled; 0 disables the deadline
+MCP_COMMIT_DEADLINE = float(config.get("MCP", "commit_deadline", fallback="180"))
 
 # Initialize logger
 if DEBUG:
@@ -0,0 +1,278 @@
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import logger, DEBUG
+from .diff_model import FileDiff, ParsedDiff, parse_diff_text
+from .tokens import TokenBudget, count_tokens, count_lines_tokens
+
+"""
+diff_budget.py
+
+- Packs a diff into a token budget for the commit prompt
+- Every file is represented: either with its most informative hunks or,
+  if it does not fit, with a one-line summary (path and +/- counts)
+- Lockfiles, generated and vendored files are down-weighted; binary files
+  and pure renames are always summarized instead of shown
+- Works per hunk on offsets from the shared diff model, so it stays fast
+  on very large diffs (only an oversized hunk is split into lines)
+"""
+
+# Files whose content rarely tells the reader anything about intent
+_LOW_VALUE_NAMES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "pipfile.lock",
+    "cargo.lock", "go.sum", "composer.lock", "gemfile.lock", "uv.lock", "bun.lockb",
+}
+_LOW_VALUE_PATTERN = re.compile(
+    r"(^|/)(dist|build|vendor|node_modules|third_party|__snapshots__)/"
+    r"|\.min\.(js|css)$|\.map$|\.snap$|_pb2(_grpc)?\.py$|\.pb\.go$|\.generated\.\w+$"
+)
+_DOC_EXTENSIONS = {".md", ".rst", ".txt", ".adoc"}
+_CONFIG_EXTENSIONS = {".json", ".yaml", ".yml", ".toml", ".ini", ".cfg", ".xml", ".lock", ".csv"}
+# Don't bother splitting a hunk to fill less than this many tokens
+_MIN_PARTIAL_TOKENS = 48
+_TRUNCATED_MARKER = "... (hunk truncated)\n"
+_HUNK_RANGES = re.compile(r"^@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+
+def is_generated_file(path: str) -> bool:
+    """True for lockfiles and generated, minified or vendored files."""
+    lower = path.lower()
+    return os.path.basename(lower) in _LOW_VALUE_NAMES or bool(_LOW_VALUE_PATTERN.search(lower))
+
+
+def file_weight(path: str) -> float:
+    """Relative value of a file's diff for describing the change."""
+    if is_generated_file(path):
+        return 0.1
+    lower = path.lower()
+    name = os.path.basename(lower)
+    ext = os.path.splitext(name)[1]
+    if ext in _CONFIG_EXTENSIONS:
+        return 0.5
+    if ext in _DOC_EXTENSIONS:
+        return 0.6
+    if "test" in lower:
+        return 0.8
+    return 1.0
+
+
+def summarize_file(file_diff: FileDiff, note: str = "") -> str:
+    """One line describing a file that is not shown in full."""
+    if file_diff.is_rename and not file_diff.hunks:
+        return f"- renamed: {file_diff.old_path} → {file_diff.path}"
+    if file_diff.binary:
+        return f"- binary: {file_diff.path}"
+    line = f"- {file_diff.path} (+{file_diff.additions}, -{file_diff.deletions})"
+    return f"{line} {note}" if note else line
+
+
+def _hunk_score(weight: float, additions: int, deletions: int, tokens: int) -> float:
+    # Changed lines per token: favours dense hunks over long context runs
+    return weight * (additions + deletions + 1) / max(tokens, 1)
+
+
+def pack_diff(
+    diff: str,
+    token_limit: int,
+    file_overhead: Optional[Callable[[FileDiff, int], int]] = None,
+    escape: Callable[[str], str] = lambda text: text
+) -> str:
+    """
+    Return a diff that fits `token_limit` tokens once formatted.
+
+    `file_overhead(file_diff, n)` gives the formatting tokens added around the
+    n-th shown file; `escape` is applied to text before it is measured.
+    Files keep their original order; within a file, kept hunks keep theirs.
+    """
+    parsed = parse_diff_text(diff)
+    if not parsed.files:
+        return diff
+
+    budget = TokenBudget(token_limit)
+    title = "Files summarized to fit the token budget:"
+    budget.reserve(title + "\n")
+
+    # Every file starts out summarized; including one releases its summary
+    summaries = {id(fd): summarize_file(fd) for fd in parsed}
+    summary_tokens = {key: count_tokens(line + "\n") for key, line in summaries.items()}
+    for tokens in summary_tokens.values():
+        budget.reserve(tokens)
+
+    candidates = [
+        fd for fd in parsed
+        if fd.hunks and not fd.binary
+    ]
+    weights = {id(fd): file_weight(fd.path) for fd in candidates}
+    hunk_tokens: Dict[Tuple[int, int], int] = {}
+    for fd in candidates:
+        for index, hunk in enumerate(fd.hunks):
+            hunk_tokens[(id(fd), index)] = count_tokens(escape(parsed.buffer[hunk.start:hunk.end]))
+
+    chosen: Dict[int, Dict[int, Optional[int]]] = {}  # file -> {hunk index: kept lines or None for all}
+    opened_cost: Dict[int, int] = {}
+    shown_count = 0
+
+    def header_text(fd: FileDiff) -> str:
+        return parsed.buffer[fd.start:fd.hunks[0].start]
+
+    def include_file(fd: FileDiff) -> bool:
+        nonlocal shown_count
+        cost = count_tokens(escape(header_text(fd)))
+        if len(fd.hunks) > 1:
+            # Room for the omitted-hunks note, in case not every hunk makes it
+            cost += count_tokens(_omitted_note(len(fd.hunks), fd.additions, fd.deletions))
+        if file_overhead is not None:
+            cost += file_overhead(fd, shown_count + 1)
+        # Showing the file frees its summary line
+        if not budget.fits(cost - summary_tokens[id(fd)]):
+            return False
+        budget.reserve(cost - summary_tokens[id(fd)])
+        chosen[id(fd)] = {}
+        opened_cost[id(fd)] = cost - summary_tokens[id(fd)]
+        shown_count += 1
+        return True
+
+    def drop_file(fd: FileDiff):
+        nonlocal shown_count
+        budget.used -= opened_cost.pop(id(fd))
+        del chosen[id(fd)]
+        shown_count -= 1
+
+    def add_hunk(fd: FileDiff, index: int) -> bool:
+        if id(fd) not in chosen and not include_file(fd):
+            return False
+        if budget.try_add(hunk_tokens[(id(fd), index)]):
+            chosen[id(fd)][index] = None
+            return True
+        return False
+
+    # Pass 1: give every file its best hunk, most valuable files first
+    def best_hunk(fd: FileDiff) -> int:
+        return max(
+            range(len(fd.hunks)),
+            key=lambda i: _hunk_score(weights[id(fd)], fd.hunks[i].additions, fd.hunks[i].deletions,
+                                      hunk_tokens[(id(fd), i)])
+        )
+
+    by_value = sorted(
+        candidates,
+        key=lambda fd: weights[id(fd)] * (fd.additions + fd.deletions + 1),
+        reverse=True
+    )
+    for position, fd in enumerate(by_value):
+        index = best_hunk(fd)
+        if not add_hunk(fd, index) and id(fd) in chosen and not chosen[id(fd)]:
+            # Cut the hunk to a fair share so one huge file can't starve the rest
+            share = budget.remaining // (len(by_value) - position)
+            _add_partial_hunk(parsed, fd, index, budget, chosen, escape, max(share, _MIN_PARTIAL_TOKENS))
+            if not chosen[id(fd)]:
+                drop_file(fd)
+
+    # Pass 2: fill what is left with the remaining hunks, densest first
+    remaining = [
+        (fd, i) for fd in candidates for i in range(len(fd.hunks))
+        if id(fd) in chosen and i not in chosen[id(fd)]
+    ]
+    remaining.sort(
+        key=lambda item: _hunk_score(weights[id(item[0])], item[0].hunks[item[1]].additions,
+                                     item[0].hunks[item[1]].deletions, hunk_tokens[(id(item[0]), item[1])]),
+        reverse=True
+    )
+    for fd, index in remaining:
+        if budget.remaining < _MIN_PARTIAL_TOKENS:
+            break
+        add_hunk(fd, index)
+
+    # Assemble in the original order
+    omitted = [summaries[id(fd)] for fd in parsed if id(fd) not in chosen]
+    sections = []
+    if omitted:
+        sections.append("\n".join([title] + omitted) + "\n")
+    for fd in parsed:
+        kept = chosen.get(id(fd))
+        if kept is None:
+            continue
+        sections.append(_render_file(parsed, fd, kept))
+
+    packed = "".join(sections)
+    if DEBUG:
+        logger.debug(
+            f"Packed diff: {len(chosen)} files shown, {len(omitted)} summarized, "
+            f"{budget.used}/{token_limit} tokens"
+        )
+    return packed
+
+
+def _add_partial_hunk(
+    parsed: ParsedDiff,
+    fd: FileDiff,
+    index: int,
+    budget: TokenBudget,
+    chosen: Dict[int, Dict[int, Optional[int]]],
+    escape: Callable[[str], str],
+    limit: int
+):
+    """Keep the leading lines of a hunk that is too large to show whole."""
+    limit = min(limit, budget.remaining)
+    if limit < _MIN_PARTIAL_TOKENS:
+        return
+    hunk = fd.hunks[index]
+    lines = parsed.buffer[hunk.start:hunk.end].splitlines()
+    available = limit - count_tokens(_TRUNCATED_MARKER)
+    used = kept = 0
+    for tokens in count_lines_tokens([escape(line) for line in lines]):
+        if used + tokens > available:
+            break
+        used += tokens
+        kept += 1
+    # The @@ header alone says nothing
+    if kept > 1:
+        budget.reserve(used + count_tokens(_TRUNCATED_MARKER))
+        chosen[id(fd)][index] = kept
+
+
+def _cut_hunk(lines: List[str]) -> str:
+    """
+    Rebuild a hunk from its leading lines, with the @@ ranges rewritten to
+    match, so the cut hunk still parses and the next file header is not
+    mistaken for hunk content.
+    """
+    old_count = new_count = 0
+    for line in lines[1:]:
+        marker = line[:1]
+        if marker == "\\":
+            continue
+        if marker != "+":
+            old_count += 1
+        if marker != "-":
+            new_count += 1
+    header = _HUNK_RANGES.sub(
+        lambda m: f"@@ -{m.group(1)},{old_count} +{m.group(2)},{new_count} @@",
+        lines[0],
+        count=1
+    )
+    return "\n".join([header] + lines[1:]) + "\n" + _TRUNCATED_MARKER
+
+
+def _omitted_note(hunks: int, additions: int, deletions: int) -> str:
+    return f"... {hunks} more hunk(s) omitted (+{additions}, -{deletions})\n"
+
+
+def _render_file(parsed: ParsedDiff, fd: FileDiff, kept: Dict[int, Optional[int]]) -> str:
+    parts = [parsed.buffer[fd.start:fd.hunks[0].start]]
+    skipped_add = skipped_del = skipped = 0
+    for index, hunk in enumerate(fd.hunks):
+        if index not in kept:
+            skipped += 1
+            skipped_add += hunk.additions
+            skipped_del += hunk.deletions
+            continue
+        text = parsed.buffer[hunk.start:hunk.end]
+        if kept[index] is not None:
+            text = _cut_hunk(text.splitlines()[:kept[index]])
+        parts.append(text)
+    if skipped:
+        parts.append(_omitted_note(skipped, skipped_add, skipped_del))
+    text = "".join(parts)
+    return text if text.endswith("\n") else text + "\n"
@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .config import logger, DEBUG, DIFF_CACHE_MAX_MB
+
+"""
+diff_cache.py
+
+- In-memory LRU cache of per-file diff text
+- Keys are (path, old blob OID, new blob OID, staged), so an entry never
+  goes stale: any change to either side of the diff produces a new key
+- Bounded by an approximate memory cap; least recently used diffs go first
+"""
+
+DiffKey = Tuple[str, Optional[str], Optional[str], bool]
+
+
+class DiffCache:
+    """
+    Thread-safe LRU cache of diff text keyed by blob OIDs.
+
+    Sizes are counted in characters of diff text, which is close enough to
+    bytes for the cap to be meaningful without encoding every entry.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[DiffKey, str]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: DiffKey) -> Optional[str]:
+        """Return the cached diff for a key and mark it most recently used."""
+        with self._lock:
+            diff = self._entries.get(key)
+            if diff is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return diff
+
+    def put(self, key: DiffKey, diff: str):
+        """Store a diff, evicting least recently used entries over the cap."""
+        if len(diff) > self.max_bytes:
+            # Caching this one diff would flush everything else
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = diff
+            self._size += len(diff)
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return entry count, approximate size and hit/miss counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Shared by review, commit generation and auto-refresh redraws
+diff_cache = DiffCache(int(DIFF_CACHE_MAX_MB * 1024 * 1024))
+
+if DEBUG:
+    logger.debug(f"Diff cache initialized with a {DIFF_CACHE_MAX_MB} MB cap")
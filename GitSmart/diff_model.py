@@ -0,0 +1,237 @@
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+"""
+diff_model.py
+
+- Single-pass, incremental parser for unified `git diff` output
+- Files and hunks are recorded as offsets into one shared text buffer,
+  so consumers slice what they need instead of re-splitting the diff
+- Additions/deletions are counted inside hunks using the hunk header's
+  line counts, so content lines such as `++x` or `--i` are counted too
+- Recently parsed diffs are memoized, so the display, prompt formatting and
+  counting code paths share one parse of the same diff text
+"""
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+_SAME_PATH_HEADER = re.compile(r"^diff --git a/(.+) b/\1$")
+_ANY_PATH_HEADER = re.compile(r"^diff --git a/(.+?) b/(.+)$")
+_FILE_HEADER_PREFIXES = ("diff --git ", "diff --cc ", "diff --combined ")
+
+
+@dataclass
+class Hunk:
+    """One `@@` hunk. `start`/`end` are offsets into the shared buffer."""
+    start: int
+    end: int
+    additions: int = 0
+    deletions: int = 0
+
+
+@dataclass
+class FileDiff:
+    """One file's section of a diff. `start`/`end` are offsets into the shared buffer."""
+    path: str
+    start: int
+    end: int
+    old_path: Optional[str] = None
+    hunks: List[Hunk] = field(default_factory=list)
+    additions: int = 0
+    deletions: int = 0
+    binary: bool = False
+
+    @property
+    def is_rename(self) -> bool:
+        return self.old_path is not None and self.old_path != self.path
+
+
+class ParsedDiff:
+    """A parsed diff: the raw text plus per-file records pointing into it."""
+
+    def __init__(self, buffer: str, files: List[FileDiff]):
+        self.buffer = buffer
+        self.files = files
+
+    def __iter__(self) -> Iterator[FileDiff]:
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def preamble(self) -> str:
+        """Any text before the first file header."""
+        return self.buffer[:self.files[0].start] if self.files else self.buffer
+
+    def text(self, file_diff: FileDiff) -> str:
+        """Return the raw diff text of one file."""
+        return self.buffer[file_diff.start:file_diff.end]
+
+    def lines(self, file_diff: FileDiff) -> List[str]:
+        """Return the diff lines of one file, header included."""
+        return self.text(file_diff).splitlines()
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Return per-file {"file", "additions", "deletions"} records."""
+        return [
+            {"file": fd.path, "additions": fd.additions, "deletions": fd.deletions}
+            for fd in self.files
+        ]
+
+
+def _header_path(line: str) -> str:
+    """Best-effort new-side path from a `diff --git` / `diff --cc` header."""
+    header = line.rstrip("\r\n")
+    match = _SAME_PATH_HEADER.match(header) or _ANY_PATH_HEADER.match(header)
+    if match:
+        return match.group(match.lastindex)
+    for prefix in _FILE_HEADER_PREFIXES:
+        if header.startswith(prefix):
+            return header[len(prefix):]
+    return header
+
+
+class DiffParser:
+    """
+    Incremental diff parser. Feed it lines (with their line endings) as they
+    arrive and call finish() to get the ParsedDiff.
+
+    When the full text is already in memory, pass it as `buffer` so the
+    parser records offsets into it instead of keeping its own copy.
+    """
+
+    def __init__(self, buffer: Optional[str] = None):
+        self._buffer = buffer
+        self._chunks: List[str] = []
+        self._offset = 0
+        self._files: List[FileDiff] = []
+        self._file: Optional[FileDiff] = None
+        self._hunk: Optional[Hunk] = None
+        self._old_left = 0
+        self._new_left = 0
+
+    def feed(self, line: str):
+        start = self._offset
+        self._offset += len(line)
+        if self._buffer is None:
+            self._chunks.append(line)
+
+        if self._hunk is not None and (self._old_left > 0 or self._new_left > 0):
+            self._hunk_line(line)
+            self._hunk.end = self._offset
+            return
+
+        if line.startswith(_FILE_HEADER_PREFIXES):
+            self._close_file(start)
+            self._file = FileDiff(path=_header_path(line), start=start, end=start)
+            return
+        if self._file is None:
+            return
+
+        if line.startswith("@@"):
+            match = _HUNK_HEADER.match(line)
+            if match:
+                self._hunk = Hunk(start=start, end=self._offset)
+                self._file.hunks.append(self._hunk)
+                self._old_left = int(match.group(1)) if match.group(1) is not None else 1
+                self._new_left = int(match.group(2)) if match.group(2) is not None else 1
+        elif line.startswith("rename from "):
+            self._file.old_path = line[len("rename from "):].rstrip("\r\n")
+        elif line.startswith("rename to "):
+            self._file.path = line[len("rename to "):].rstrip("\r\n")
+        elif line.startswith("Binary files ") or line.startswith("GIT binary patch"):
+            self._file.binary = True
+
+    def _hunk_line(self, line: str):
+        marker = line[:1]
+        if marker == "+":
+            self._hunk.additions += 1
+            self._file.additions += 1
+            self._new_left -= 1
+        elif marker == "-":
+            self._hunk.deletions += 1
+            self._file.deletions += 1
+            self._old_left -= 1
+        elif marker == "\\":
+            # "\ No newline at end of file" does not count against the hunk
+            pass
+        else:
+            # Context line (some tools strip the leading space of blank ones)
+            self._old_left -= 1
+            self._new_left -= 1
+
+    def _close_file(self, end: int):
+        if self._file is not None:
+            self._file.end = end
+            self._files.append(self._file)
+        self._file = None
+        self._hunk = None
+        self._old_left = self._new_left = 0
+
+    def finish(self) -> ParsedDiff:
+        self._close_file(self._offset)
+        buffer = self._buffer if self._buffer is not None else "".join(self._chunks)
+        self._chunks = []
+        return ParsedDiff(buffer, self._files)
+
+
+def _iter_lines(text: str) -> Iterator[str]:
+    """Yield lines split on "\\n" only, keeping the terminator (str.splitlines splits on more)."""
+    pos = 0
+    length = len(text)
+    while pos < length:
+        end = text.find("\n", pos)
+        end = length if end == -1 else end + 1
+        yield text[pos:end]
+        pos = end
+
+
+# Memo of recently parsed diffs, keyed by the SHA-1 of the diff text
+_PARSED_CACHE_SIZE = 4
+_parsed_cache: "OrderedDict[str, ParsedDiff]" = OrderedDict()
+_parsed_lock = threading.Lock()
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+def _remember(parsed: ParsedDiff, key: Optional[str] = None):
+    key = key or _text_key(parsed.buffer)
+    with _parsed_lock:
+        _parsed_cache[key] = parsed
+        _parsed_cache.move_to_end(key)
+        while len(_parsed_cache) > _PARSED_CACHE_SIZE:
+            _parsed_cache.popitem(last=False)
+
+
+def parse_diff_text(text: str) -> ParsedDiff:
+    """Parse diff text already in memory, reusing a recent parse of the same text."""
+    text = text or ""
+    key = _text_key(text)
+    with _parsed_lock:
+        cached = _parsed_cache.get(key)
+        if cached is not None:
+            _parsed_cache.move_to_end(key)
+            return cached
+
+    parser = DiffParser(buffer=text)
+    for line in _iter_lines(text):
+        parser.feed(line)
+    parsed = parser.finish()
+    _remember(parsed, key)
+    return parsed
+
+
+def read_diff_stream(stream: IO[bytes]) -> ParsedDiff:
+    """Parse `git diff` output incrementally from a binary stream (e.g. Popen stdout)."""
+    parser = DiffParser()
+    for raw in iter(stream.readline, b""):
+        parser.feed(raw.decode("utf-8", errors="replace"))
+    parsed = parser.finish()
+    _remember(parsed)
+    return parsed
@@ -0,0 +1,267 @@
+import os
+import atexit
+import subprocess
+import threading
+from typing import Dict, List, Optional, Tuple, Any, Iterable
+
+from .config import logger, DEBUG
+
+"""
+git_backend.py
+
+- Pools a long-lived `git cat-file --batch-check` coprocess per repository
+- Caches `git rev-parse` results per working directory
+- Caches the output of cheap read-only git commands, keyed by the stat of
+  the files that determine their result (HEAD, refs, config, ...)
+
+The helpers in git_utils route through here so that repeated menu redraws
+don't fork a new git process for answers that cannot have changed.
+"""
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int, int]]:
+    """Return (mtime_ns, size, inode) for a path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+    except OSError:
+        return None
+
+
+def _tree_key(path: str) -> Tuple[Any, ...]:
+    """Return the stat keys of every file below a directory (e.g. loose refs)."""
+    keys = []
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        st = entry.stat(follow_symlinks=False)
+                        keys.append((entry.path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            continue
+    return tuple(sorted(keys))
+
+
+class GitBatchProcess:
+    """
+    A long-lived `git cat-file --batch-check` coprocess.
+
+    cat-file loads the index once, so the process is restarted whenever
+    `.git/index` changes to keep `:path` lookups current.
+    """
+
+    def __init__(self, repo_root: str, index_path: str):
+        self.repo_root = repo_root
+        self.index_path = index_path
+        self._proc: Optional[subprocess.Popen] = None
+        self._index_key = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        index_key = _stat_key(self.index_path)
+        if self._proc is not None and self._proc.poll() is None and index_key == self._index_key:
+            return
+        self._close_process()
+        self._proc = subprocess.Popen(
+            ["git", "cat-file", "--batch-check"],
+            cwd=self.repo_root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        self._index_key = index_key
+        if DEBUG:
+            logger.debug(f"Started git cat-file --batch-check coprocess for {self.repo_root}")
+
+    def _close_process(self):
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=1)
+        except Exception:
+            self._proc.kill()
+        self._proc = None
+
+    def _query_once(self, spec: str) -> Optional[Tuple[str, str, int]]:
+        self._ensure_started()
+        self._proc.stdin.write(spec.encode("utf-8") + b"\n")
+        self._proc.stdin.flush()
+        header = self._proc.stdout.readline()
+        if not header:
+            raise BrokenPipeError("git cat-file exited")
+        parts = header.decode("utf-8", errors="replace").split()
+        # "<spec> missing" / "<spec> ambiguous"
+        if len(parts) != 3 or parts[-1] in ("missing", "ambiguous"):
+            return None
+        return parts[0], parts[1], int(parts[2])
+
+    def query(self, spec: str) -> Optional[Tuple[str, str, int]]:
+        """
+        Look up one object spec (e.g. "HEAD", "HEAD:path", ":path", an OID).
+
+        Returns (oid, type, size) or None if it does not resolve.
+        """
+        if "\n" in spec:
+            return None
+        with self._lock:
+            try:
+                return self._query_once(spec)
+            except (BrokenPipeError, OSError, ValueError):
+                # Coprocess died (e.g. repository removed); restart once
+                self._close_process()
+                try:
+                    return self._query_once(spec)
+                except (BrokenPipeError, OSError, ValueError) as e:
+                    if DEBUG:
+                        logger.error(f"git cat-file --batch-check failed for {spec!r}: {e}")
+                    self._close_process()
+                    return None
+
+    def close(self):
+        with self._lock:
+            self._close_process()
+
+
+class GitBackend:
+    """
+    Pooled git access for one repository.
+
+    Holds the cat-file coprocess and a cache of command outputs that is
+    invalidated by the stat of the files each command depends on.
+    """
+
+    def __init__(self, repo_root: str, git_dir: str, common_dir: Optional[str] = None):
+        self.repo_root = repo_root
+        self.git_dir = git_dir
+        self.common_dir = common_dir or git_dir
+        index_path = os.path.join(git_dir, "index")
+        self._batch_check = GitBatchProcess(repo_root, index_path)
+        self._cache: Dict[Tuple[str, ...], Tuple[Any, str]] = {}
+        self._cache_lock = threading.Lock()
+
+    def _watch_key(self, watch: Iterable[str]) -> Tuple[Any, ...]:
+        """
+        Stat key for git-dir relative paths. "HEAD" and "index" live in the
+        per-worktree git dir; refs, packed-refs and config in the common dir.
+        Entries ending in "/" are directories whose files are all watched.
+        """
+        keys = []
+        for name in watch:
+            base = self.git_dir if name in ("HEAD", "index") else self.common_dir
+            path = os.path.join(base, *name.rstrip("/").split("/"))
+            keys.append(_tree_key(path) if name.endswith("/") else _stat_key(path))
+        return tuple(keys)
+
+    def run_cached(self, command: List[str], watch: Iterable[str]) -> str:
+        """
+        Run a read-only git command, reusing the last output while none of the
+        watched files changed. Raises CalledProcessError like subprocess.run.
+        """
+        key = tuple(command)
+        watch_key = self._watch_key(watch)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None and cached[0] == watch_key:
+            return cached[1]
+
+        result = subprocess.run(command, stdout=subprocess.PIPE, check=True, text=True, cwd=self.repo_root)
+        output = result.stdout
+        with self._cache_lock:
+            self._cache[key] = (watch_key, output)
+        return output
+
+    def resolve(self, specs: List[str]) -> Dict[str, Optional[str]]:
+        """Resolve object specs to OIDs over the long-lived batch-check coprocess."""
+        resolved = {}
+        for spec in specs:
+            info = self._batch_check.query(spec)
+            resolved[spec] = info[0] if info else None
+        return resolved
+
+    def close(self):
+        self._batch_check.close()
+
+
+# Pool state: rev-parse results per working directory, backends per repository
+_rev_parse_cache: Dict[str, Tuple[str, str, str]] = {}
+_backends: Dict[str, GitBackend] = {}
+_pool_lock = threading.Lock()
+
+
+def rev_parse_paths(cwd: Optional[str] = None) -> Optional[Tuple[str, str, str]]:
+    """
+    Return (toplevel, git_dir, common_dir) for a working directory.
+
+    The result is cached per directory, so only the first call forks
+    `git rev-parse`. Returns None outside a work tree.
+    """
+    cwd = os.path.abspath(cwd or os.getcwd())
+    with _pool_lock:
+        cached = _rev_parse_cache.get(cwd)
+    if cached is not None and os.path.isdir(cached[1]):
+        return cached
+
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel", "--absolute-git-dir", "--git-common-dir"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+            text=True,
+            cwd=cwd
+        )
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+    lines = [line.strip() for line in str(result.stdout).splitlines()]
+    if len(lines) != 3 or not all(os.path.isdir(os.path.join(cwd, line)) for line in lines):
+        return None
+    toplevel, git_dir, common_dir = (os.path.abspath(os.path.join(cwd, line)) for line in lines)
+
+    with _pool_lock:
+        _rev_parse_cache[cwd] = (toplevel, git_dir, common_dir)
+    return toplevel, git_dir, common_dir
+
+
+def get_git_backend(cwd: Optional[str] = None) -> Optional[GitBackend]:
+    """Get the pooled backend for the repository containing `cwd`, or None."""
+    paths = rev_parse_paths(cwd)
+    if paths is None:
+        return None
+    toplevel, git_dir, common_dir = paths
+    with _pool_lock:
+        backend = _backends.get(git_dir)
+        if backend is None:
+            backend = GitBackend(toplevel, git_dir, common_dir)
+            _backends[git_dir] = backend
+        return backend
+
+
+def run_git_cached(command: List[str], watch: Iterable[str]) -> str:
+    """
+    Run a read-only git command through the pooled backend of the current
+    repository, or directly if there is none. Raises CalledProcessError.
+    """
+    backend = get_git_backend()
+    if backend is None:
+        return subprocess.run(command, stdout=subprocess.PIPE, check=True, text=True).stdout
+    return backend.run_cached(command, watch)
+
+
+def close_all_backends():
+    """Terminate every pooled coprocess."""
+    with _pool_lock:
+        backends = list(_backends.values())
+        _backends.clear()
+        _rev_parse_cache.clear()
+    for backend in backends:
+        backend.close()
+
+
+atexit.register(close_all_backends)
@@ -1,11 +1,15 @@
 import os
-import re
+import time
+import hashlib
 import subprocess
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from math import floor, ceil
 
 from .ui import console, printer
 from .config import logger, DEBUG
+from .git_backend import GitBackend, get_git_backend, run_git_cached
+from .diff_cache import diff_cache
+from .diff_model import ParsedDiff, parse_diff_text, read_diff_stream
 
 """
 This module houses all Git-related operations such as fetching diffs,
@@ -40,58 +44,276 @@ def get_git_diff(staged: bool = True) -> str:
     """
     Get the git diff of staged or unstaged changes.
     """
-    logger.debug(f"Entering get_git_diff function. Staged: {staged}")
+    return get_parsed_diff(staged).buffer
+
+def get_parsed_diff(staged: bool = True) -> ParsedDiff:
+    """
+    Stream `git diff` into the shared diff model: one buffer plus per-file
+    and per-hunk offsets that the display and prompt code slice from.
+    """
+    logger.debug(f"Entering get_parsed_diff function. Staged: {staged}")
+    cmd = ["git", "diff", "--staged"] if staged else ["git", "diff"]
     try:
-        cmd = ["git", "diff", "--staged"] if staged else ["git", "diff"]
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, check=True)
-        diff = result.stdout.decode("utf-8")
+        started_ns = time.time_ns()
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE) as proc:
+            parsed = read_diff_stream(proc.stdout)
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
         logger.debug("Git diff retrieved successfully.")
-        return diff
-    except subprocess.CalledProcessError as e:
+        _prime_diff_cache(parsed, staged, started_ns)
+        return parsed
+    except (subprocess.CalledProcessError, OSError) as e:
         if DEBUG:
             logger.error(f"Failed to get {'staged' if staged else 'unstaged'} diff: {e}")
-        return ""
+        return parse_diff_text("")
 
 
 def parse_diff(diff: str) -> List[Dict[str, Any]]:
     """
     Parse the git diff to extract file names, additions, and deletions.
+
+    Lines are counted inside hunks, so the numbers agree with `--numstat`.
+    For the working tree itself prefer get_change_summary(), which reads
+    git's numstat directly and never loads diff text.
+    """
+    return parse_diff_text(diff).summary()
+
+def parse_porcelain_v2(output: str) -> List[Dict[str, Any]]:
+    """
+    Parse NUL-separated `git status --porcelain=v2 -z` output into status entries.
+
+    Each entry carries the path, the original path for renames/copies, the
+    index (X) and worktree (Y) status codes, the HEAD/index blob OIDs, and
+    whether the path is unmerged (a conflict still to be resolved).
+    """
+    entries = []
+    records = output.split("\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record or record.startswith("#"):
+            continue
+
+        kind = record[0]
+        if kind == "1":
+            # 1 XY sub mH mI mW hH hI path
+            parts = record.split(" ", 8)
+            if len(parts) < 9:
+                continue
+            entries.append({
+                "file": parts[8],
+                "old_file": None,
+                "x": parts[1][0],
+                "y": parts[1][1],
+                "head_oid": parts[6],
+                "index_oid": parts[7],
+                "unmerged": False,
+            })
+        elif kind == "2":
+            # 2 XY sub mH mI mW hH hI Xscore path NUL origPath
+            parts = record.split(" ", 9)
+            if len(parts) < 10:
+                continue
+            orig_path = records[i] if i < len(records) else None
+            i += 1
+            entries.append({
+                "file": parts[9],
+                "old_file": orig_path,
+                "x": parts[1][0],
+                "y": parts[1][1],
+                "head_oid": parts[6],
+                "index_oid": parts[7],
+                "unmerged": False,
+            })
+        elif kind == "u":
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            parts = record.split(" ", 10)
+            if len(parts) < 11:
+                continue
+            entries.append({
+                "file": parts[10],
+                "old_file": None,
+                "x": parts[1][0],
+                "y": parts[1][1],
+                "head_oid": parts[7],
+                "index_oid": parts[8],
+                "unmerged": True,
+            })
+        # Untracked ("?") and ignored ("!") entries never carry a diff.
+
+    return entries
+
+def parse_numstat(output: str) -> List[Dict[str, Any]]:
+    """
+    Parse NUL-separated `git diff --numstat -z` output into per-file counts.
+
+    Binary files are reported by git as "-" and are counted as 0/0 with
+    `binary` set. Renames and copies keep their source path in `old_file`.
     """
     file_changes = []
-    file_pattern = re.compile(r"diff --git a/(.+?) b/(.+)")
-    addition_pattern = re.compile(r"^\+[^+].*")
-    deletion_pattern = re.compile(r"^\-[^-].*")
-
-    current_file = None
-    additions = 0
-    deletions = 0
-
-    for line in diff.splitlines():
-        file_match = file_pattern.match(line)
-        if file_match:
-            if current_file:
-                file_changes.append({"file": current_file, "additions": additions, "deletions": deletions})
-            current_file = file_match.group(2)
-            additions = 0
-            deletions = 0
-        elif addition_pattern.match(line):
-            additions += 1
-        elif deletion_pattern.match(line):
-            deletions += 1
-
-    if current_file:
-        file_changes.append({"file": current_file, "additions": additions, "deletions": deletions})
+    records = output.split("\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record:
+            continue
+
+        parts = record.split("\t", 2)
+        if len(parts) < 3:
+            continue
+        added, deleted, path = parts
+        old_path = None
+        if not path:
+            # Rename/copy: the two paths follow as separate NUL-terminated fields
+            old_path = records[i] if i < len(records) else ""
+            path = records[i + 1] if i + 1 < len(records) else ""
+            i += 2
+
+        binary = added == "-" or deleted == "-"
+        file_changes.append({
+            "file": path,
+            "old_file": old_path,
+            "additions": 0 if binary else int(added),
+            "deletions": 0 if binary else int(deleted),
+            "binary": binary,
+        })
 
     return file_changes
 
+def get_status_entries() -> List[Dict[str, Any]]:
+    """
+    Get tracked changes from a single `git status --porcelain=v2 -z` call.
+
+    Untracked files are skipped to match what `git diff` reports, and optional
+    locks are disabled so polling never rewrites `.git/index` behind our back.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "--no-optional-locks", "status", "--porcelain=v2", "-z", "--untracked-files=no"],
+            stdout=subprocess.PIPE,
+            check=True
+        )
+        return parse_porcelain_v2(result.stdout.decode("utf-8", errors="replace"))
+    except subprocess.CalledProcessError as e:
+        if DEBUG:
+            logger.error(f"Failed to get git status: {e}")
+        return []
+
+def get_diff_numstat(staged: bool = True) -> List[Dict[str, Any]]:
+    """
+    Get per-file addition/deletion counts without materializing the diff text.
+    """
+    try:
+        cmd = ["git", "diff", "--numstat", "-z", "-M"]
+        if staged:
+            cmd.insert(2, "--staged")
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, check=True)
+        return parse_numstat(result.stdout.decode("utf-8", errors="replace"))
+    except subprocess.CalledProcessError as e:
+        if DEBUG:
+            logger.error(f"Failed to get {'staged' if staged else 'unstaged'} numstat: {e}")
+        return []
+
+def get_change_summary() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Return (staged_changes, unstaged_changes) with per-file +/- counts.
+
+    The file lists come from one porcelain status pass; `--numstat` is only
+    run for the side(s) that actually have changes, so a clean tree costs a
+    single git process and no diff text is ever loaded.
+
+    Unmerged paths are only listed as unstaged, with status "U", as
+    `git diff` shows them: nothing of a conflict is staged until it is
+    resolved with `git add`.
+    """
+    entries = get_status_entries()
+    staged_entries = [e for e in entries if e["x"] != "." and not e["unmerged"]]
+    unstaged_entries = [e for e in entries if e["y"] != "."]
+
+    def merge_counts(side_entries: List[Dict[str, Any]], staged: bool) -> List[Dict[str, Any]]:
+        if not side_entries:
+            return []
+        counts = {ch["file"]: ch for ch in get_diff_numstat(staged=staged)}
+        changes = []
+        for entry in side_entries:
+            stat = counts.get(entry["file"], {})
+            changes.append({
+                "file": entry["file"],
+                "old_file": entry["old_file"] if staged else None,
+                "status": entry["x"] if staged else ("U" if entry["unmerged"] else entry["y"]),
+                "additions": stat.get("additions", 0),
+                "deletions": stat.get("deletions", 0),
+                "binary": stat.get("binary", False),
+            })
+        return changes
+
+    staged_changes = merge_counts(staged_entries, staged=True)
+    unstaged_changes = merge_counts(unstaged_entries, staged=False)
+    logger.debug(f"Status summary: {len(staged_changes)} staged, {len(unstaged_changes)} unstaged")
+    return staged_changes, unstaged_changes
+
+def _stat_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """Return (mtime_ns, size, inode) for a path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+    except OSError:
+        return None
+
+def _read_head_ref(git_dir: str) -> str:
+    """Return HEAD plus the OID it resolves to via a loose ref, without forking git."""
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r") as f:
+            head = f.read().strip()
+    except OSError:
+        return ""
+    if head.startswith("ref: "):
+        ref_path = os.path.join(git_dir, *head[5:].split("/"))
+        try:
+            with open(ref_path, "r") as f:
+                return f"{head} {f.read().strip()}"
+        except OSError:
+            # Packed ref: covered by the packed-refs stat in the fingerprint
+            return head
+    return head
+
+def get_repo_fingerprint(repo_root: str, git_dir: str, paths: List[str]) -> Tuple[Any, ...]:
+    """
+    Build a cheap fingerprint of the repository state without running git.
+
+    It combines the `.git/index` stat, the HEAD ref (and packed-refs stat), and
+    the worktree stat of the given tracked-dirty paths. If it is unchanged the
+    staged/unstaged status of those paths cannot have changed. Edits to files
+    that were clean are not covered and need a periodic full status check.
+    """
+    return (
+        _stat_signature(os.path.join(git_dir, "index")),
+        _read_head_ref(git_dir),
+        _stat_signature(os.path.join(git_dir, "packed-refs")),
+        tuple((path, _stat_signature(os.path.join(repo_root, path))) for path in sorted(paths)),
+    )
+
 def get_file_diff(file: str, staged: bool = True) -> List[str]:
     """
     Retrieve the git diff for a specific file, either staged or unstaged.
     """
+    backend = get_git_backend()
+    if backend is not None:
+        key = _diff_cache_key(backend, file, staged)
+        cached = diff_cache.get(key) if key else None
+        if cached is not None:
+            return cached.split("\n")
+
     try:
+        started_ns = time.time_ns()
         cmd = ["git", "diff", "--staged", "--", file] if staged else ["git", "diff", "--", file]
         result = subprocess.run(cmd, stdout=subprocess.PIPE, check=True, text=True)
-        diff = result.stdout.strip().split("\n")
+        text = result.stdout.strip()
+        if backend is not None:
+            _store_file_diff(backend, file, staged, text, started_ns)
+        diff = text.split("\n")
         return diff
     except subprocess.CalledProcessError as e:
         if DEBUG:
@@ -99,6 +321,137 @@ def get_file_diff(file: str, staged: bool = True) -> List[str]:
         console.print(f"[bold red]Failed to get diff for {file}: {e}[/bold red]")
         return []
 
+# Files touched within this window of a diff run may have changed under it
+_RACY_WINDOW_NS = 1_000_000_000
+
+def _hash_worktree_blob(backend: GitBackend, file: str, oid_length: int) -> Optional[str]:
+    """
+    Hash a worktree file the way git hashes blobs, matching the repository's
+    object format by OID length. Used only as a content key, so clean/smudge
+    filters making it differ from `git hash-object` do not matter.
+    """
+    try:
+        with open(os.path.join(backend.repo_root, file), "rb") as f:
+            content = f.read()
+    except OSError:
+        return None
+    digest = hashlib.sha256() if oid_length == 64 else hashlib.sha1()
+    digest.update(b"blob %d\0" % len(content))
+    digest.update(content)
+    return digest.hexdigest()
+
+def _diff_cache_key(backend: GitBackend, file: str, staged: bool) -> Optional[Tuple[str, Optional[str], Optional[str], bool]]:
+    """
+    Build the (path, old OID, new OID, staged) diff cache key for a file.
+
+    Staged diffs compare HEAD with the index, unstaged diffs the index with
+    the worktree. OIDs come from the pooled cat-file coprocess, so no git
+    process is forked. Returns None when the file should not be cached
+    (e.g. unmerged paths, whose diff depends on the conflict stages).
+    """
+    resolved = backend.resolve([f"HEAD:{file}", f":{file}"])
+    head_oid, index_oid = resolved[f"HEAD:{file}"], resolved[f":{file}"]
+    if index_oid is None and backend.resolve([f":2:{file}"])[f":2:{file}"] is not None:
+        return None
+    if staged:
+        if head_oid is None and index_oid is None:
+            return None
+        return file, head_oid, index_oid, True
+    if index_oid is None:
+        return None
+    return file, index_oid, _hash_worktree_blob(backend, file, len(index_oid)), False
+
+def _changed_since(backend: GitBackend, file: str, staged: bool, started_ns: int) -> bool:
+    """True if the index (or the worktree file for unstaged diffs) may have moved during a diff run."""
+    paths = [os.path.join(backend.git_dir, "index")]
+    if not staged:
+        paths.append(os.path.join(backend.repo_root, file))
+    for path in paths:
+        try:
+            if os.stat(path).st_mtime_ns >= started_ns - _RACY_WINDOW_NS:
+                return True
+        except OSError:
+            continue
+    return False
+
+def _store_file_diff(backend: GitBackend, file: str, staged: bool, text: str, started_ns: int):
+    """Cache one file's diff text, unless its inputs changed while git was running."""
+    if not text or _changed_since(backend, file, staged, started_ns):
+        return
+    key = _diff_cache_key(backend, file, staged)
+    if key is not None:
+        diff_cache.put(key, text)
+
+def _prime_diff_cache(parsed: ParsedDiff, staged: bool, started_ns: int):
+    """
+    Cache each file of a full `git diff`, so reviewing individual files
+    afterwards reuses what was already computed.
+
+    Renames are skipped: a per-file diff of the new path would not show them.
+    """
+    backend = get_git_backend()
+    if backend is None:
+        return
+
+    for file_diff in parsed:
+        header = f"diff --git a/{file_diff.path} b/{file_diff.path}\n"
+        if file_diff.is_rename or not parsed.buffer.startswith(header, file_diff.start):
+            continue
+        _store_file_diff(backend, file_diff.path, staged, parsed.text(file_diff).strip(), started_ns)
+
+def get_staged_tree_oids() -> Optional[Tuple[Optional[str], str]]:
+    """
+    Return (HEAD tree OID, index tree OID) identifying the staged diff.
+
+    `git write-tree` stores the index as a tree object (a no-op when it
+    already exists). HEAD's tree is None in a repository without commits.
+    Returns None when the index cannot be written, e.g. during a conflict.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "write-tree"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+            text=True
+        )
+    except (subprocess.CalledProcessError, OSError) as e:
+        if DEBUG:
+            logger.error(f"Failed to write the index tree: {e}")
+        return None
+    index_tree = result.stdout.strip()
+
+    backend = get_git_backend()
+    if backend is not None:
+        head_tree = backend.resolve(["HEAD^{tree}"])["HEAD^{tree}"]
+    else:
+        head = subprocess.run(
+            ["git", "rev-parse", "--verify", "--quiet", "HEAD^{tree}"],
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        head_tree = head.stdout.strip() or None
+    return head_tree, index_tree
+
+def get_staged_blob_oids(paths: List[Tuple[str, str]]) -> Optional[Dict[str, Tuple[Optional[str], Optional[str]]]]:
+    """
+    Map each (old path, new path) pair to its (HEAD blob OID, index blob OID).
+
+    Together the two OIDs identify a file's staged diff. A side that does not
+    exist (added or deleted file) is None. Returns None without a backend.
+    """
+    backend = get_git_backend()
+    if backend is None:
+        return None
+    specs = []
+    for old_path, path in paths:
+        specs.extend([f"HEAD:{old_path}", f":{path}"])
+    resolved = backend.resolve(specs)
+    return {
+        path: (resolved[f"HEAD:{old_path}"], resolved[f":{path}"])
+        for old_path, path in paths
+    }
+
 def stage_files(files: List[str]) -> str:
     """
     Stage the specified files.
@@ -122,6 +475,9 @@ def get_repo_name() -> str:
     """
     Retrieve the current repository's name by reading top-level directory.
     """
+    backend = get_git_backend()
+    if backend is not None:
+        return os.path.basename(backend.repo_root)
     try:
         repo_path = subprocess.check_output(["git", "rev-parse", "--show-toplevel"], universal_newlines=True).strip()
         repo_name = os.path.basename(repo_path)
@@ -134,8 +490,8 @@ def get_git_remotes() -> Dict[str, str]:
     Retrieve a dictionary of all configured git remotes and their URLs.
     """
     try:
-        result = subprocess.run(["git", "remote", "-v"], stdout=subprocess.PIPE, check=True, text=True)
-        remotes = result.stdout.strip().split('\n')
+        output = run_git_cached(["git", "remote", "-v"], watch=("config",))
+        remotes = output.strip().split('\n')
         remote_dict = {}
         for remote in remotes:
             parts = remote.split()
@@ -159,13 +515,8 @@ def get_current_branch() -> Optional[str]:
         Current branch name or None if not on any branch
     """
     try:
-        result = subprocess.run(
-            ["git", "branch", "--show-current"],
-            stdout=subprocess.PIPE,
-            check=True,
-            text=True
-        )
-        current_branch = result.stdout.strip()
+        output = run_git_cached(["git", "branch", "--show-current"], watch=("HEAD",))
+        current_branch = output.strip()
         logger.debug(f"Current branch: {current_branch}")
         return current_branch if current_branch else None
     except subprocess.CalledProcessError as e:
@@ -181,15 +532,13 @@ def get_all_branches() -> Dict[str, List[str]]:
         Dictionary with 'local' and 'remote' keys containing lists of branch names
     """
     try:
-        result = subprocess.run(
+        output = run_git_cached(
             ["git", "branch", "-a"],
-            stdout=subprocess.PIPE,
-            check=True,
-            text=True
+            watch=("HEAD", "packed-refs", "refs/heads/", "refs/remotes/")
         )
 
         branches = {"local": [], "remote": []}
-        for line in result.stdout.split('\n'):
+        for line in output.split('\n'):
             line = line.strip()
             if not line:
                 continue
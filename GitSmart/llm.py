@@ -1,42 +1,250 @@
 import json
+import atexit
+import asyncio
 import requests
 import signal
-from typing import List, Dict, Optional, Callable
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, List, Dict, Optional, Callable
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from .config import AUTH_TOKEN, API_URL
+from .config import AUTH_TOKEN, API_URL, HTTP_POOL_SIZE, HTTP_MAX_RETRIES, HTTP_RETRY_BACKOFF
 
-def get_chat_completion(
+# Status codes worth retrying: rate limiting and transient gateway errors
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_adapter: Optional[HTTPAdapter] = None
+_adapter_lock = threading.Lock()
+_local = threading.local()
+
+
+def _build_retry() -> Retry:
+    kwargs = dict(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=0,  # never replay a request whose response was already streaming
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=_RETRY_STATUSES,
+        raise_on_status=False,
+    )
+    try:
+        return Retry(allowed_methods=frozenset(["POST"]), **kwargs)
+    except TypeError:
+        # urllib3 < 1.26
+        return Retry(method_whitelist=frozenset(["POST"]), **kwargs)
+
+
+def _get_adapter() -> HTTPAdapter:
+    """The process-wide adapter; its urllib3 pool is thread-safe and keeps connections alive."""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=_build_retry()
+            )
+        return _adapter
+
+
+def get_http_session() -> requests.Session:
+    """
+    Return this thread's session. Sessions are per thread (their cookie and
+    header state is not thread-safe) but all of them mount the same adapter,
+    so the interactive loop and the MCP server thread share one keep-alive pool.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = _get_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+
+def close_http_sessions():
+    """Drop pooled connections, e.g. before the process exits."""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is not None:
+            _adapter.close()
+            _adapter = None
+    _local.__dict__.pop("session", None)
+
+
+atexit.register(close_http_sessions)
+
+
+class CompletionCancelled(Exception):
+    """Raised when a completion is cancelled (explicitly or by its deadline)."""
+
+
+class CancelToken:
+    """
+    Cooperative cancellation for one completion request.
+
+    cancel() can be called from any thread: it flags the request and closes
+    the in-flight responses. The reader stops at the next streamed chunk (or
+    when its read timeout expires) and raises CompletionCancelled. One token
+    may cover several requests running at once (e.g. map-reduce chunks).
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._responses = set()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def bind(self, response):
+        """Attach an in-flight response; aborts it right away if already cancelled."""
+        with self._lock:
+            self._responses.add(response)
+        if self.cancelled:
+            _abort_response(response)
+
+    def release(self, response):
+        """Forget a response that has been read to the end."""
+        with self._lock:
+            self._responses.discard(response)
+
+    def subscribe(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Call `callback` (from the cancelling thread) when the token is
+        cancelled, or right away if it already is. Returns an unsubscribe function.
+        """
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._unsubscribe(callback)
+        callback()
+        return lambda: None
+
+    def _unsubscribe(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            responses = list(self._responses)
+            callbacks, self._callbacks = self._callbacks, []
+        for response in responses:
+            _abort_response(response)
+        for callback in callbacks:
+            callback()
+
+
+@contextmanager
+def _released(response, cancel_token: Optional[CancelToken]):
+    """Close `response` on exit and detach it from its cancel token."""
+    try:
+        with response:
+            yield
+    finally:
+        if cancel_token is not None:
+            cancel_token.release(response)
+
+
+def _abort_response(response):
+    """
+    Close `response` from a thread other than its reader.
+
+    Response.close() waits while the reader is inside a read, so it runs on a
+    daemon thread and the cancelling thread never blocks. The closed
+    connection is dropped instead of going back to the pool.
+    """
+    threading.Thread(target=response.close, daemon=True).start()
+
+
+class _DeltaThrottle:
+    """
+    Coalesce streamed deltas into throttled status callbacks.
+
+    The callback receives only the text that arrived since its previous call
+    plus the running count of streamed tokens (one per content delta), at
+    most once per `interval` seconds unless `max_chars` are pending.
+    """
+
+    def __init__(self, callback: Optional[Callable[[str, int], None]], interval: float, max_chars: int = 2048):
+        self.callback = callback
+        self.interval = interval
+        self.max_chars = max_chars
+        self.token_count = 0
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._last_flush = 0.0
+
+    def add(self, delta: str):
+        self.token_count += 1
+        if self.callback is None:
+            return
+        self._pending.append(delta)
+        self._pending_chars += len(delta)
+        if self._pending_chars >= self.max_chars or time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self.callback is None or not self._pending:
+            return
+        delta = "".join(self._pending)
+        self._pending = []
+        self._pending_chars = 0
+        self._last_flush = time.monotonic()
+        self.callback(delta, self.token_count)
+
+
+def _httprequest_completion(
     model: str,
     messages: List[Dict[str, str]],
     max_tokens: int,
     temperature: float,
-    stream: bool = True,
-    timeout: int = 60,
-    status_callback: Optional[Callable[[str], None]] = None,
-    provider: str = "httprequest"
+    stream: bool,
+    timeout: int,
+    status_callback: Optional[Callable[[str, int], None]],
+    cancel_token: Optional[CancelToken],
+    callback_interval: float = 0.1,
+    stop_when: Optional[Callable[[str], bool]] = None
 ) -> str:
-    """
-    Calls the LLM provider and returns a streaming chat completion.
-    The 'provider' argument allows for additional implementations
-    (e.g., provider='mlx' can be supported later).
-    """
-    if provider == "httprequest":
-        headers = {"Authorization": f"Bearer {AUTH_TOKEN}", "Content-Type": "application/json"}
-        body = {
-            "model": model,
-            "messages": messages,
-            "max_tokens": max_tokens,
-            "n": 1,
-            "stop": None,
-            "temperature": temperature,
-            "stream": stream
-        }
-        try:
-            response = requests.post(API_URL, headers=headers, json=body, stream=stream, timeout=timeout)
+    """Blocking OpenAI-compatible chat completion over the pooled session."""
+    headers = {"Authorization": f"Bearer {AUTH_TOKEN}", "Content-Type": "application/json"}
+    body = {
+        "model": model,
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "n": 1,
+        "stop": None,
+        "temperature": temperature,
+        "stream": stream
+    }
+
+    def check_cancelled():
+        if cancel_token is not None and cancel_token.cancelled:
+            raise CompletionCancelled("Commit generation was cancelled")
+
+    try:
+        check_cancelled()
+        # Chunks are joined once at the end; `result += delta` is quadratic on long outputs
+        parts: List[str] = []
+        throttle = _DeltaThrottle(status_callback, callback_interval)
+        response = get_http_session().post(API_URL, headers=headers, json=body, stream=stream, timeout=timeout)
+        if cancel_token is not None:
+            cancel_token.bind(response)
+        # Closing the response hands the keep-alive connection back to the pool
+        with _released(response, cancel_token):
             response.raise_for_status()
-            result = ""
-            
             for chunk in response.iter_lines():
+                check_cancelled()
                 # Check for interruption signals
                 try:
                     if chunk:
@@ -46,9 +254,13 @@ def get_chat_completion(
                             try:
                                 data = json.loads(chunk_data)
                                 delta_content = data["choices"][0]["delta"].get("content", "")
-                                result += delta_content
-                                if status_callback is not None:
-                                    status_callback(result)
+                                if delta_content:
+                                    parts.append(delta_content)
+                                    throttle.add(delta_content)
+                                    if stop_when is not None and stop_when(delta_content):
+                                        # Everything needed has arrived; closing the
+                                        # response stops paying for the remaining tokens
+                                        break
                             except json.JSONDecodeError:
                                 continue
                 except KeyboardInterrupt:
@@ -56,20 +268,284 @@ def get_chat_completion(
                     if hasattr(response, 'close'):
                         response.close()
                     raise KeyboardInterrupt("Commit generation interrupted by user")
-                        
-            return result
-            
-        except KeyboardInterrupt:
-            # Re-raise with more context
-            raise KeyboardInterrupt("Commit generation was interrupted")
-        except requests.exceptions.RequestException as e:
-            # Handle network errors gracefully
-            raise Exception(f"Network error during commit generation: {str(e)}")
-        except Exception as e:
-            # Handle any other errors
-            raise Exception(f"Error during commit generation: {str(e)}")
+        check_cancelled()
+        throttle.flush()
+        return "".join(parts)
+
+    except KeyboardInterrupt:
+        # Re-raise with more context
+        raise KeyboardInterrupt("Commit generation was interrupted")
+    except CompletionCancelled:
+        raise
+    except requests.exceptions.RequestException as e:
+        # Closing the response from another thread surfaces as a read error
+        check_cancelled()
+        # Handle network errors gracefully
+        raise Exception(f"Network error during commit generation: {str(e)}")
+    except Exception as e:
+        check_cancelled()
+        # Handle any other errors
+        raise Exception(f"Error during commit generation: {str(e)}")
+
+
+def get_chat_completion(
+    model: str,
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    temperature: float,
+    stream: bool = True,
+    timeout: int = 60,
+    status_callback: Optional[Callable[[str, int], None]] = None,
+    provider: str = "httprequest",
+    cancel_token: Optional[CancelToken] = None,
+    callback_interval: float = 0.1,
+    stop_when: Optional[Callable[[str], bool]] = None
+) -> str:
+    """
+    Calls the LLM provider and returns a streaming chat completion.
+    The 'provider' argument allows for additional implementations
+    (e.g., provider='mlx' can be supported later).
+
+    `status_callback(delta, token_count)` gets the text streamed since its
+    previous call and the running token count, at most every `callback_interval` seconds.
+    `stop_when(delta)` is called for each delta; returning True ends the stream
+    early and returns what has been received so far.
+
+    Blocking; pass a CancelToken to cancel from another thread. Asyncio
+    callers use get_chat_completion_async.
+    """
+    if provider == "httprequest":
+        return _httprequest_completion(
+            model, messages, max_tokens, temperature, stream, timeout, status_callback, cancel_token,
+            callback_interval, stop_when
+        )
     elif provider == "mlx":
         # In the future, add native support for the MLX provider here.
         raise NotImplementedError("MLX provider not implemented yet")
     else:
         raise ValueError(f"Unknown provider: {provider}")
+
+
+class _AsyncResponse:
+    """Status, headers and body of an HTTP/1.1 response read from asyncio streams."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, timeout: float):
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        self.status = 0
+        self.headers: Dict[str, str] = {}
+
+    async def _read(self, awaitable):
+        return await asyncio.wait_for(awaitable, self.timeout)
+
+    async def read_head(self):
+        status_line = (await self._read(self.reader.readline())).decode("latin-1")
+        parts = status_line.split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise ConnectionError(f"Malformed HTTP status line: {status_line.strip()!r}")
+        self.status = int(parts[1])
+        while True:
+            line = (await self._read(self.reader.readline())).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            self.headers[name.strip().lower()] = value.strip()
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        """The body as it arrives, with chunked transfer encoding removed."""
+        if "chunked" in self.headers.get("transfer-encoding", "").lower():
+            while True:
+                size_line = await self._read(self.reader.readline())
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    break
+                yield await self._read(self.reader.readexactly(size))
+                await self._read(self.reader.readline())
+            return
+        remaining = int(self.headers["content-length"]) if "content-length" in self.headers else None
+        while remaining is None or remaining > 0:
+            data = await self._read(self.reader.read(65536 if remaining is None else min(65536, remaining)))
+            if not data:
+                if remaining:
+                    raise ConnectionError("Connection closed before the response was complete")
+                return
+            if remaining is not None:
+                remaining -= len(data)
+            yield data
+
+    async def iter_lines(self) -> AsyncIterator[bytes]:
+        buffer = b""
+        async for data in self.iter_chunks():
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                yield line.rstrip(b"\r")
+        if buffer:
+            yield buffer
+
+    async def read(self) -> bytes:
+        return b"".join([data async for data in self.iter_chunks()])
+
+    def close(self):
+        self.writer.close()
+
+
+async def _async_post(url: str, headers: Dict[str, str], payload: bytes, timeout: float) -> _AsyncResponse:
+    """
+    POST `payload` over a fresh asyncio connection and read the response head.
+    Connection errors and the retryable statuses are retried with the same
+    policy as the pooled session.
+    """
+    parts = urlsplit(url)
+    https = parts.scheme == "https"
+    port = parts.port or (443 if https else 80)
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    request_lines = [f"POST {path} HTTP/1.1", f"Host: {parts.netloc}"]
+    request_lines += [f"{name}: {value}" for name, value in headers.items()]
+    request_lines += [f"Content-Length: {len(payload)}", "Connection: close", "", ""]
+    request = "\r\n".join(request_lines).encode("latin-1") + payload
+
+    attempt = 0
+    while True:
+        response = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(parts.hostname, port, ssl=ssl.create_default_context() if https else None),
+                timeout
+            )
+            response = _AsyncResponse(reader, writer, timeout)
+            writer.write(request)
+            await writer.drain()
+            await response.read_head()
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            if response is not None:
+                response.close()
+            if attempt >= HTTP_MAX_RETRIES:
+                raise
+        else:
+            if response.status not in _RETRY_STATUSES or attempt >= HTTP_MAX_RETRIES:
+                return response
+            response.close()
+        attempt += 1
+        await asyncio.sleep(HTTP_RETRY_BACKOFF * (2 ** (attempt - 1)))
+
+
+async def _async_httprequest_completion(
+    model: str,
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    temperature: float,
+    stream: bool,
+    timeout: int,
+    status_callback: Optional[Callable[[str, int], None]],
+    callback_interval: float = 0.1,
+    stop_when: Optional[Callable[[str], bool]] = None
+) -> str:
+    """OpenAI-compatible chat completion over an asyncio connection."""
+    headers = {
+        "Authorization": f"Bearer {AUTH_TOKEN}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream" if stream else "application/json",
+    }
+    body = {
+        "model": model,
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "n": 1,
+        "stop": None,
+        "temperature": temperature,
+        "stream": stream
+    }
+
+    try:
+        response = await _async_post(API_URL, headers, json.dumps(body).encode("utf-8"), timeout)
+        try:
+            if response.status >= 400:
+                detail = (await response.read()).decode("utf-8", errors="replace")[:200]
+                raise ConnectionError(f"HTTP {response.status} from {API_URL}: {detail}")
+            if not stream:
+                data = json.loads(await response.read())
+                return data["choices"][0]["message"].get("content") or ""
+
+            parts: List[str] = []
+            throttle = _DeltaThrottle(status_callback, callback_interval)
+            async for line in response.iter_lines():
+                chunk_data = line.decode("utf-8").strip()
+                if not chunk_data.startswith("data: "):
+                    continue
+                try:
+                    data = json.loads(chunk_data[6:])
+                except json.JSONDecodeError:
+                    continue
+                delta_content = data["choices"][0]["delta"].get("content", "")
+                if delta_content:
+                    parts.append(delta_content)
+                    throttle.add(delta_content)
+                    if stop_when is not None and stop_when(delta_content):
+                        break
+            throttle.flush()
+            return "".join(parts)
+        finally:
+            # The connection is never reused, so closing it also ends an unfinished stream
+            response.close()
+
+    except asyncio.CancelledError:
+        raise
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+        raise Exception(f"Network error during commit generation: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Error during commit generation: {str(e)}")
+
+
+async def get_chat_completion_async(
+    model: str,
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    temperature: float,
+    stream: bool = True,
+    timeout: int = 60,
+    status_callback: Optional[Callable[[str, int], None]] = None,
+    provider: str = "httprequest",
+    cancel_token: Optional[CancelToken] = None,
+    deadline: Optional[float] = None,
+    callback_interval: float = 0.1,
+    stop_when: Optional[Callable[[str], bool]] = None
+) -> str:
+    """
+    Asyncio counterpart of get_chat_completion: requests run on the event
+    loop, so any number can be awaited concurrently (e.g. with gather).
+
+    Cancellation closes the connection at once instead of waiting for the
+    next chunk. Cancelling the awaiting task also cancels `cancel_token`
+    and raises CancelledError; cancelling the token from any thread, or
+    passing `deadline` (seconds the whole request may take, retries
+    included) and running out of time, raises CompletionCancelled.
+    `status_callback` and `stop_when` run on the event loop.
+    """
+    if provider == "mlx":
+        raise NotImplementedError("MLX provider not implemented yet")
+    if provider != "httprequest":
+        raise ValueError(f"Unknown provider: {provider}")
+    if cancel_token is not None and cancel_token.cancelled:
+        raise CompletionCancelled("Commit generation was cancelled")
+
+    loop = asyncio.get_event_loop()
+    task = loop.create_task(_async_httprequest_completion(
+        model, messages, max_tokens, temperature, stream, timeout, status_callback, callback_interval, stop_when
+    ))
+    unsubscribe = cancel_token.subscribe(lambda: loop.call_soon_threadsafe(task.cancel)) if cancel_token else None
+    try:
+        return await asyncio.wait_for(task, deadline)
+    except asyncio.TimeoutError:
+        # Network timeouts are reported as errors by the task, so this is the deadline
+        raise CompletionCancelled(f"Completion deadline of {deadline}s exceeded")
+    except asyncio.CancelledError:
+        if cancel_token is not None and cancel_token.cancelled:
+            raise CompletionCancelled("Commit generation was cancelled")
+        if cancel_token is not None:
+            cancel_token.cancel()
+        raise
+    finally:
+        if unsubscribe is not None:
+            unsubscribe()
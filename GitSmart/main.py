@@ -8,7 +8,11 @@ import signal
 import os
 
 
-from .config import logger, MODEL, DEBUG, MODEL_CACHE, AUTO_REFRESH, AUTO_REFRESH_INTERVAL, MCP_ENABLED, MCP_HOST, MCP_PORT
+from .config import (
+    logger, MODEL, DEBUG, MODEL_CACHE, AUTO_REFRESH, AUTO_REFRESH_INTERVAL,
+    AUTO_REFRESH_BACKEND, AUTO_REFRESH_DEBOUNCE, AUTO_REFRESH_FULL_CHECK_EVERY,
+    MCP_ENABLED, MCP_HOST, MCP_PORT
+)
 from .ui import console, printer, Console
 from .cli_flow import (
     get_and_display_status,
@@ -29,7 +33,9 @@ from .cli_flow import (
     main_menu_prompt,
     MenuNavigationException
 )
-from .utils import chdir_to_git_root
+from .git_utils import get_git_diff, get_repo_fingerprint
+from .utils import chdir_to_git_root, get_git_root, get_git_dir
+from .watcher import RepositoryWatcher
 from .repo_registry import get_repository_registry, ensure_repository_context
 from .repo_manager import get_repo_manager, register_current_repo
 
@@ -95,6 +101,10 @@ def main(reload: bool = False):
     refresh_thread = None
     last_staged_state = None
     last_unstaged_state = None
+    last_fingerprint = None
+    fingerprint_hits = 0
+    fingerprint_misses = 0
+    polls_since_full_check = 0
     state_lock = threading.Lock()
     shutdown_requested = threading.Event()
     mcp_server_thread = None
@@ -119,6 +129,25 @@ def main(reload: bool = False):
     # Flag to track when menu needs refresh
     menu_needs_refresh = threading.Event()
 
+    # Repository paths used by the auto-refresh watcher and fingerprint
+    try:
+        repo_root, repo_git_dir = get_git_root(), get_git_dir()
+    except RuntimeError as e:
+        repo_root = repo_git_dir = None
+        if DEBUG:
+            logger.debug(f"Repository paths not available for auto-refresh: {e}")
+
+    # Filesystem watcher that wakes the auto-refresh worker only on real changes
+    repo_watcher = None
+    if AUTO_REFRESH and not reload and repo_root is not None:
+        repo_watcher = RepositoryWatcher(
+            repo_root,
+            git_dir=repo_git_dir,
+            backend=AUTO_REFRESH_BACKEND,
+            debounce=AUTO_REFRESH_DEBOUNCE,
+            poll_interval=AUTO_REFRESH_INTERVAL
+        )
+
     # ─── Setup custom signal & exception for mid-prompt refresh ───────────────────
     class RefreshMenuException(Exception):
         """Raised to abort the questionary prompt so we can refresh the menu."""
@@ -138,17 +167,49 @@ def main(reload: bool = False):
     signal.signal(signal.SIGUSR1, _refresh_signal_handler)
     # ────────────────────────────────────────────────────────────────────────────────
 
-    def check_for_changes():
-        """Check if git status has changed since last check."""
-        nonlocal last_staged_state, last_unstaged_state
+    def check_for_changes(force: bool = False):
+        """
+        Check if git status has changed since last check.
+
+        A cheap repository fingerprint (index stat, HEAD ref, stat of dirty
+        paths) is compared first and the status is only recomputed when it
+        moved. Edits to previously clean files don't move the fingerprint, so
+        a full check is still forced every AUTO_REFRESH_FULL_CHECK_EVERY polls,
+        or immediately when `force` is set (e.g. after an event on a worktree file).
+        """
+        nonlocal last_staged_state, last_unstaged_state, last_fingerprint
+        nonlocal fingerprint_hits, fingerprint_misses, polls_since_full_check
         try:
-            _, _, current_staged, current_unstaged = get_status()
+            fingerprint = None
+            with state_lock:
+                dirty_paths = set(last_staged_state or {}) | set(last_unstaged_state or {})
+            if repo_root is not None:
+                fingerprint = get_repo_fingerprint(repo_root, repo_git_dir, list(dirty_paths))
+                polls_since_full_check += 1
+                full_check_due = polls_since_full_check >= AUTO_REFRESH_FULL_CHECK_EVERY
+                if not force and not full_check_due and fingerprint == last_fingerprint:
+                    fingerprint_hits += 1
+                    if DEBUG:
+                        logger.debug(f"Auto-refresh fingerprint: hit (hits={fingerprint_hits}, misses={fingerprint_misses})")
+                    return False
+                fingerprint_misses += 1
+                polls_since_full_check = 0
+                if DEBUG:
+                    reason = "forced" if force else ("periodic full check" if full_check_due else "fingerprint moved")
+                    logger.debug(f"Auto-refresh fingerprint: miss, {reason} (hits={fingerprint_hits}, misses={fingerprint_misses})")
+
+            current_staged, current_unstaged = get_status()
 
             # Convert to comparable format (file paths with additions/deletions)
             current_staged_files = {f.get('file', ''): (f.get('additions', 0), f.get('deletions', 0)) for f in current_staged}
             current_unstaged_files = {f.get('file', ''): (f.get('additions', 0), f.get('deletions', 0)) for f in current_unstaged}
 
             with state_lock:
+                # The pre-status fingerprint is only a valid baseline if it covered the
+                # same dirty paths; otherwise take a new one on the next poll.
+                new_dirty_paths = set(current_staged_files) | set(current_unstaged_files)
+                last_fingerprint = fingerprint if new_dirty_paths == dirty_paths else None
+
                 if last_staged_state is None or last_unstaged_state is None:
                     if DEBUG:
                         logger.debug("Auto-refresh: Initial state setup")
@@ -192,10 +253,19 @@ def main(reload: bool = False):
             while auto_refresh_active and not shutdown_requested.is_set():
                 loop_count += 1
                 if DEBUG:
-                    logger.debug(f"Auto-refresh: Loop iteration #{loop_count}, sleeping for {AUTO_REFRESH_INTERVAL}s")
+                    logger.debug(f"Auto-refresh: Loop iteration #{loop_count}, waiting up to {AUTO_REFRESH_INTERVAL}s")
 
+                if repo_watcher is not None:
+                    # Event backend only wakes on relevant filesystem events;
+                    # polling backend wakes once per interval
+                    if not repo_watcher.wait_for_change(timeout=AUTO_REFRESH_INTERVAL):
+                        if shutdown_requested.is_set():
+                            if DEBUG:
+                                logger.debug("Auto-refresh: Shutdown requested while waiting, exiting")
+                            break
+                        continue
                 # Use shutdown_requested.wait() instead of time.sleep() for interruptible sleep
-                if shutdown_requested.wait(timeout=AUTO_REFRESH_INTERVAL):
+                elif shutdown_requested.wait(timeout=AUTO_REFRESH_INTERVAL):
                     # Shutdown was requested during sleep
                     if DEBUG:
                         logger.debug("Auto-refresh: Shutdown requested during sleep, exiting")
@@ -205,8 +275,14 @@ def main(reload: bool = False):
                     try:
                         if DEBUG:
                             logger.debug("Auto-refresh: Checking for changes...")
+                        # Index, HEAD and ref changes move the fingerprint; only an event on a
+                        # worktree file (which may have been clean) forces a full status
+                        worktree_event = (
+                            repo_watcher is not None and repo_watcher.backend == "events"
+                            and repo_watcher.take_worktree_change()
+                        )
                         # Double-check auto_refresh_active state before checking for changes
-                        if auto_refresh_active and check_for_changes():
+                        if auto_refresh_active and check_for_changes(force=worktree_event):
                             if DEBUG:
                                 logger.debug("Auto-refresh: Repository changes detected, setting refresh flag")
                             # mark for refresh
@@ -249,6 +325,8 @@ def main(reload: bool = False):
             if DEBUG:
                 logger.debug(f"Starting auto-refresh: enabled={AUTO_REFRESH}, interval={AUTO_REFRESH_INTERVAL}s")
             auto_refresh_active = True
+            if repo_watcher is not None:
+                repo_watcher.start()
             refresh_thread = threading.Thread(target=auto_refresh_worker, daemon=True)
             refresh_thread.start()
             if DEBUG:
@@ -266,6 +344,8 @@ def main(reload: bool = False):
                 logger.debug("Stopping auto-refresh...")
             auto_refresh_active = False
             shutdown_requested.set()  # Signal shutdown to all threads
+            if repo_watcher is not None:
+                repo_watcher.stop()  # Wake the worker if it is waiting for events
             if refresh_thread:
                 try:
                     refresh_thread.join(timeout=2)
@@ -405,7 +485,7 @@ def main(reload: bool = False):
                         continue
 
                     # Always refresh status before showing the menu
-                    diff, unstaged_diff, staged_changes, unstaged_changes = get_and_display_status()
+                    staged_changes, unstaged_changes = get_and_display_status()
 
                     # Update the state tracking for auto-refresh with thread safety
                     with state_lock:
@@ -472,6 +552,8 @@ def main(reload: bool = False):
                     # Use context manager to safely suspend auto-refresh during commit generation
                     with AutoRefreshSuspender():
                         try:
+                            # Full diff bodies are only fetched once they are actually needed
+                            diff = get_git_diff(staged=True)
                             status_msg = handle_generate_commit(MODEL, diff, staged_changes)
                             # No need to refresh here; will refresh at top of loop
                             if status_msg:
@@ -491,7 +573,7 @@ def main(reload: bool = False):
                 elif action == "Review Changes":
                     reset_console()
                     try:
-                        handle_review_changes(staged_changes, unstaged_changes, diff, unstaged_diff)
+                        handle_review_changes(staged_changes, unstaged_changes)
                     except MenuNavigationException:
                         # User pressed Ctrl-C in submenu, return to main menu
                         reset_console()
@@ -608,9 +690,14 @@ def main(reload: bool = False):
         refresh_thread.start()
 
     if AUTO_REFRESH and not reload:
-        console.print(
-            f"[bold cyan]🔄 Auto-refresh enabled - monitoring git changes every {AUTO_REFRESH_INTERVAL}s[/bold cyan]"
-        )
+        if repo_watcher is not None and repo_watcher.backend == "events":
+            console.print(
+                "[bold cyan]🔄 Auto-refresh enabled - watching filesystem events for git changes[/bold cyan]"
+            )
+        else:
+            console.print(
+                f"[bold cyan]🔄 Auto-refresh enabled - monitoring git changes every {AUTO_REFRESH_INTERVAL}s[/bold cyan]"
+            )
 
     try:
         loop()
@@ -0,0 +1,207 @@
+import os
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .concurrency import map_bounded
+from .config import (
+    logger, DEBUG, TEMPERATURE, COMMIT_CACHE, COMMIT_CACHE_TTL,
+    MAP_REDUCE_CHUNK_TOKENS, MAP_REDUCE_CONCURRENCY
+)
+from .diff_budget import pack_diff
+from .diff_model import FileDiff, parse_diff_text
+from .git_utils import get_staged_blob_oids
+from .llm import get_chat_completion, CancelToken, CompletionCancelled
+from .prompts import DIFF_CHUNK_SUMMARY_PROMPT
+from .tokens import count_tokens
+
+"""
+map_reduce.py
+
+- Commit messages for staged diffs far larger than the model context
+- Map: the diff is split into chunks (files grouped per directory, oversized
+  files on their own) that are summarized in parallel, with bounded concurrency
+- Reduce: ai_utils.generate_commit_message writes the message from the summaries
+- Chunk summaries are cached by the blob OIDs of their files, so a retry
+  only re-summarizes the chunks whose files changed
+- group_by_tokens is shared with commit-history summaries
+"""
+
+# Output limit for one chunk summary
+SUMMARY_MAX_TOKENS = 1024
+
+
+@dataclass
+class DiffChunk:
+    """Part of a diff summarized in one request."""
+    name: str  # directory, or file path for a file with a chunk of its own
+    paths: List[Tuple[str, str]]  # (old path, new path) of each file
+    diff: str
+
+
+def split_diff(diff: str, chunk_tokens: int = MAP_REDUCE_CHUNK_TOKENS) -> List[DiffChunk]:
+    """
+    Split a diff into chunks of at most about chunk_tokens tokens.
+
+    Files are grouped by directory in diff order; a file larger than a chunk
+    gets a chunk of its own, packed down to the limit.
+    """
+    parsed = parse_diff_text(diff)
+    by_directory: "OrderedDict[str, List[FileDiff]]" = OrderedDict()
+    for file_diff in parsed:
+        by_directory.setdefault(os.path.dirname(file_diff.path) or ".", []).append(file_diff)
+
+    chunks = []
+    for directory, files in by_directory.items():
+        current: List[FileDiff] = []
+        current_tokens = 0
+
+        def flush():
+            if current:
+                chunks.append(DiffChunk(
+                    name=directory,
+                    paths=[(fd.old_path or fd.path, fd.path) for fd in current],
+                    diff="".join(parsed.text(fd) for fd in current)
+                ))
+
+        for file_diff in files:
+            text = parsed.text(file_diff)
+            tokens = count_tokens(text)
+            if tokens > chunk_tokens:
+                chunks.append(DiffChunk(
+                    name=file_diff.path,
+                    paths=[(file_diff.old_path or file_diff.path, file_diff.path)],
+                    diff=pack_diff(text, chunk_tokens)
+                ))
+                continue
+            if current and current_tokens + tokens > chunk_tokens:
+                flush()
+                current, current_tokens = [], 0
+            current.append(file_diff)
+            current_tokens += tokens
+        flush()
+    return chunks
+
+
+def chunk_cache_key(
+    model: str,
+    chunk: DiffChunk,
+    oids: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]],
+    chunk_tokens: int
+) -> str:
+    """
+    Cache key of a chunk summary: the blob OIDs on both sides of each of its
+    files identify its diff. Falls back to the diff text when an OID is missing.
+    """
+    prompt = hashlib.sha256(DIFF_CHUNK_SUMMARY_PROMPT.encode("utf-8")).hexdigest()
+    parts = [model, prompt, str(chunk_tokens)]
+    for old_path, path in chunk.paths:
+        entry = oids.get(path) if oids else None
+        if entry is None or entry == (None, None):
+            parts = [model, prompt, hashlib.sha256(chunk.diff.encode("utf-8")).hexdigest()]
+            break
+        parts.append(f"{old_path}\0{path}\0{entry[0] or ''}\0{entry[1] or ''}")
+    return "chunk:" + hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def summarize_chunk(
+    model: str,
+    chunk: DiffChunk,
+    format_diff: Callable[[str], str],
+    cancel_token: Optional[CancelToken] = None
+) -> str:
+    """Ask the model for a bullet-point summary of one chunk."""
+    messages = [
+        {"role": "system", "content": DIFF_CHUNK_SUMMARY_PROMPT},
+        {"role": "user", "content": format_diff(chunk.diff)},
+    ]
+    summary = get_chat_completion(
+        model=model,
+        messages=messages,
+        max_tokens=SUMMARY_MAX_TOKENS,
+        temperature=TEMPERATURE,
+        stream=True,
+        timeout=60,
+        cancel_token=cancel_token
+    )
+    if "</think>" in summary:
+        summary = summary.split("</think>")[1]
+    summary = summary.strip()
+    if not summary:
+        raise Exception(f"Empty summary for {chunk.name}")
+    return summary
+
+
+def summarize_diff(
+    model: str,
+    diff: str,
+    format_diff: Callable[[str], str] = lambda text: text,
+    chunk_tokens: int = MAP_REDUCE_CHUNK_TOKENS,
+    max_workers: int = MAP_REDUCE_CONCURRENCY,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    cancel_token: Optional[CancelToken] = None
+) -> List[Tuple[str, str]]:
+    """
+    Summarize a staged diff chunk by chunk, returning (chunk name, summary)
+    pairs in diff order. Cached summaries are reused; the others are requested
+    in parallel and cached as soon as each one arrives, so a failed run keeps
+    the summaries it already paid for.
+
+    Cancelling `cancel_token` aborts the requests in flight and starts no
+    new one; CompletionCancelled is raised.
+    """
+    chunks = split_diff(diff, chunk_tokens)
+    use_cache = COMMIT_CACHE_TTL > 0
+    oids = get_staged_blob_oids([path for chunk in chunks for path in chunk.paths]) if use_cache else None
+    keys = [chunk_cache_key(model, chunk, oids, chunk_tokens) for chunk in chunks]
+
+    summaries: List[Optional[str]] = [COMMIT_CACHE.get(key) if use_cache else None for key in keys]
+    missing = [index for index, summary in enumerate(summaries) if not summary]
+    if DEBUG:
+        logger.debug(f"Map-reduce: {len(chunks)} chunks, {len(chunks) - len(missing)} cached")
+
+    def summarize(index: int) -> str:
+        if cancel_token is not None and cancel_token.cancelled:
+            raise CompletionCancelled("Diff summarization was cancelled")
+        summary = summarize_chunk(model, chunks[index], format_diff, cancel_token)
+        if use_cache:
+            COMMIT_CACHE.set(keys[index], summary, expire=COMMIT_CACHE_TTL)
+        return summary
+
+    cached = len(chunks) - len(missing)
+    if on_progress is not None:
+        on_progress(cached, len(chunks))
+
+    def done(completed: int, total: int):
+        if on_progress is not None:
+            on_progress(cached + completed, len(chunks))
+
+    for index, summary in zip(missing, map_bounded(summarize, missing, max_workers, on_done=done)):
+        summaries[index] = summary
+    return [(chunk.name, summary) for chunk, summary in zip(chunks, summaries)]
+
+
+def group_by_tokens(texts: List[str], limit: int = MAP_REDUCE_CHUNK_TOKENS) -> List[List[str]]:
+    """
+    Group consecutive texts so each group stays within about `limit` tokens.
+    A text larger than the limit gets a group of its own.
+    """
+    groups: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if current and current_tokens + tokens > limit:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def format_summaries(summaries: List[Tuple[str, str]]) -> str:
+    """Render chunk summaries as the body of the reduce request."""
+    return "\n\n".join(f"### {name}\n{summary}" for name, summary in summaries)
@@ -1,4 +1,5 @@
 import os
+import asyncio
 import subprocess
 import socket
 import time
@@ -24,9 +25,9 @@ except ImportError:
     class Context:
         pass
 
-from .config import logger, MCP_PORT, MCP_HOST, MODEL
+from .config import logger, MCP_PORT, MCP_HOST, MODEL, MCP_COMMIT_DEADLINE
 from .git_utils import stage_files, unstage_files, get_git_diff
-from .ai_utils import generate_commit_message
+from .ai_utils import generate_commit_message_async
 from .repo_manager import get_repo_manager, get_current_repo_info, switch_to_repo, find_repo
 
 # Only create the MCP instance if fastmcp is available
@@ -252,17 +253,18 @@ def unstage_file(files: List[str], repo_name: str, ctx: Context = None):
             return {"success": False, "message": str(e)}
 
 @mcp_tool
-def generate_commit_and_commit(repo_name: str, custom_message: Optional[str] = None, ctx: Context = None):
+async def generate_commit_and_commit(repo_name: str, custom_message: Optional[str] = None, regenerate: bool = False, ctx: Context = None):
     """Generate an AI commit message and commit staged changes in a specific repository.
     
     Args:
         repo_name: Name of git repository based on parent directory name (required)
         custom_message: Custom commit message to use instead of AI-generated one (optional)
+        regenerate: Ignore a cached message for the same staged changes and ask the model again (optional)
     
     Returns:
         Dict with success status and commit message or error details
     """
-    logger.info(f"Tool called: generate_commit_and_commit with args: repo_name={repo_name}, custom_message={custom_message}")
+    logger.info(f"Tool called: generate_commit_and_commit with args: repo_name={repo_name}, custom_message={custom_message}, regenerate={regenerate}")
     with MCPOperation("generate_commit_and_commit"):
         try:
             ensure_repo_context(repo_name)
@@ -273,7 +275,12 @@ def generate_commit_and_commit(repo_name: str, custom_message: Optional[str] = N
                 diff = get_git_diff(staged=True)
                 if not diff:
                     return {"success": False, "message": "No staged changes found. Please stage some files first."}
-                commit_message = generate_commit_message(MODEL, diff)
+                # Runs on the server's event loop; cancelling the tool call cancels the request
+                commit_message = await generate_commit_message_async(
+                    MODEL, diff, regenerate=regenerate, deadline=MCP_COMMIT_DEADLINE or None
+                )
+                if not commit_message:
+                    return {"success": False, "message": "Could not generate a commit message."}
             
             result = subprocess.run([
                 "git", "commit", "-m", commit_message
@@ -282,6 +289,8 @@ def generate_commit_and_commit(repo_name: str, custom_message: Optional[str] = N
                 return {"success": True, "message": f"Committed: {commit_message}"}
             else:
                 return {"success": False, "message": result.stderr}
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             return {"success": False, "message": str(e)}
 
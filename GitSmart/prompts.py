@@ -443,3 +443,17 @@ refactors).
 - **DO NOT** omit significant changes, even for minor updates.
 - **DO NOT** include excessive technical jargon without context.
 </system_prompt>"""
+
+DIFF_CHUNK_SUMMARY_PROMPT = """You summarize one part of a large staged diff so that a commit message can later be written from several such summaries.
+
+- List the meaningful changes as short bullet points: WHAT changed (functions, classes, config keys, files added, removed or renamed) and, where the diff shows it, WHY.
+- Name files and symbols exactly as they appear in the diff.
+- Mention generated files, lockfiles and pure formatting changes in a single bullet at most.
+- Do not write a commit message, headings or any introduction. Output only the bullet points."""
+
+COMMIT_GROUP_SUMMARY_PROMPT = """You condense one group of commit messages so that release notes can later be written from several such groups.
+
+- Output short bullet points grouped by theme (features, fixes, refactors, docs, other).
+- Keep every significant change, its purpose and any breaking change; merge trivial ones (typos, formatting) into one bullet.
+- Keep commit hashes next to the bullets they support.
+- Do not write release notes, headings or any introduction. Output only the bullet points."""
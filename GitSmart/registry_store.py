@@ -0,0 +1,256 @@
+"""
+SQLite storage engine for the repository registry.
+
+Features:
+- One row per repository, aliases in their own table
+- Indexes on name, alias, path and remote URL, so lookups are O(log n)
+  instead of a scan over every registered repository
+- Mutations touch only the affected rows (e.g. bumping last_accessed is a
+  single-column UPDATE)
+- Safe to share between threads (one connection guarded by a lock, WAL mode)
+- Per-path state of the incremental stats collector (see repo_stats.py)
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .config import logger, DEBUG
+
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repositories (
+    repo_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    path TEXT NOT NULL,
+    remote_url TEXT,
+    last_accessed REAL NOT NULL,
+    created_at REAL NOT NULL,
+    branch_count INTEGER NOT NULL DEFAULT 0,
+    commit_count INTEGER NOT NULL DEFAULT 0,
+    file_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_repositories_name ON repositories(name_lower);
+CREATE INDEX IF NOT EXISTS idx_repositories_path ON repositories(path);
+CREATE INDEX IF NOT EXISTS idx_repositories_remote ON repositories(remote_url);
+CREATE INDEX IF NOT EXISTS idx_repositories_last_accessed ON repositories(last_accessed);
+
+CREATE TABLE IF NOT EXISTS aliases (
+    repo_id TEXT NOT NULL REFERENCES repositories(repo_id) ON DELETE CASCADE,
+    alias TEXT NOT NULL,
+    alias_lower TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (repo_id, alias_lower)
+);
+CREATE INDEX IF NOT EXISTS idx_aliases_alias ON aliases(alias_lower);
+
+CREATE TABLE IF NOT EXISTS stats_state (
+    path TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+"""
+
+_COLUMNS = (
+    "repo_id", "name", "path", "remote_url", "last_accessed", "created_at",
+    "branch_count", "commit_count", "file_count"
+)
+
+
+class RegistryStore:
+    """
+    Indexed repository records. Records are plain dicts with the
+    RepositoryInfo fields (aliases as a list); the registry converts them.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _aliases(self, repo_ids: List[str]) -> Dict[str, List[str]]:
+        aliases: Dict[str, List[str]] = {repo_id: [] for repo_id in repo_ids}
+        if not repo_ids:
+            return aliases
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(repo_ids), 500):
+            batch = repo_ids[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT repo_id, alias FROM aliases WHERE repo_id IN ({','.join('?' * len(batch))}) "
+                "ORDER BY repo_id, position",
+                batch
+            )
+            for row in rows:
+                aliases[row["repo_id"]].append(row["alias"])
+        return aliases
+
+    def _records(self, rows: Iterable[sqlite3.Row]) -> List[Dict[str, Any]]:
+        records = [{column: row[column] for column in _COLUMNS} for row in rows]
+        aliases = self._aliases([record["repo_id"] for record in records])
+        for record in records:
+            record["aliases"] = aliases[record["repo_id"]]
+        return records
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._records(self._conn.execute(sql, tuple(params)).fetchall())
+
+    def _query_one(self, sql: str, params: Iterable[Any] = ()) -> Optional[Dict[str, Any]]:
+        records = self._query(sql + " LIMIT 1", params)
+        return records[0] if records else None
+
+    def get(self, repo_id: str) -> Optional[Dict[str, Any]]:
+        return self._query_one("SELECT * FROM repositories WHERE repo_id = ?", (repo_id,))
+
+    def __contains__(self, repo_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM repositories WHERE repo_id = ?", (repo_id,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM repositories").fetchone()[0]
+
+    def find_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        """Case-insensitive match on the name, then on aliases."""
+        key = name.lower()
+        record = self._query_one(
+            "SELECT * FROM repositories WHERE name_lower = ? ORDER BY last_accessed DESC", (key,)
+        )
+        if record is None:
+            record = self._query_one(
+                "SELECT r.* FROM aliases a JOIN repositories r ON r.repo_id = a.repo_id "
+                "WHERE a.alias_lower = ? ORDER BY r.last_accessed DESC",
+                (key,)
+            )
+        return record
+
+    def find_by_path(self, path: str) -> Optional[Dict[str, Any]]:
+        return self._query_one("SELECT * FROM repositories WHERE path = ?", (path,))
+
+    def find_by_remote(self, remote_url: str) -> Optional[Dict[str, Any]]:
+        return self._query_one("SELECT * FROM repositories WHERE remote_url = ?", (remote_url,))
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        """All records, most recently accessed first."""
+        return self._query("SELECT * FROM repositories ORDER BY last_accessed DESC")
+
+    def put(self, record: Dict[str, Any]):
+        """Insert or replace one repository and its aliases in one transaction."""
+        values = [record[column] for column in _COLUMNS]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO repositories (repo_id, name, name_lower, path, remote_url, "
+                    "last_accessed, created_at, branch_count, commit_count, file_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    values[:2] + [record["name"].lower()] + values[2:]
+                )
+                self._conn.execute("DELETE FROM aliases WHERE repo_id = ?", (record["repo_id"],))
+                seen = set()
+                for position, alias in enumerate(record.get("aliases") or []):
+                    if alias.lower() in seen:
+                        continue
+                    seen.add(alias.lower())
+                    self._conn.execute(
+                        "INSERT INTO aliases (repo_id, alias, alias_lower, position) VALUES (?, ?, ?, ?)",
+                        (record["repo_id"], alias, alias.lower(), position)
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def put_many(self, records: Iterable[Dict[str, Any]]):
+        for record in records:
+            self.put(record)
+
+    def touch(self, repo_id: str, timestamp: float):
+        """Update only last_accessed."""
+        self.touch_many({repo_id: timestamp})
+
+    def touch_many(self, timestamps: Dict[str, float]):
+        """
+        Apply a batch of last_accessed updates in one transaction. A timestamp
+        never moves last_accessed backwards, so a late batch cannot undo a
+        newer write.
+        """
+        if not timestamps:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "UPDATE repositories SET last_accessed = MAX(last_accessed, ?) WHERE repo_id = ?",
+                    [(timestamp, repo_id) for repo_id, timestamp in timestamps.items()]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, repo_id: str) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "DELETE FROM stats_state WHERE path IN (SELECT path FROM repositories WHERE repo_id = ?)",
+                    (repo_id,)
+                )
+                cursor = self._conn.execute("DELETE FROM repositories WHERE repo_id = ?", (repo_id,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount > 0
+
+    def get_stats_states(self, paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Saved stats-collector state of each path that has one."""
+        states: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for start in range(0, len(paths), 500):
+                batch = paths[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT path, state FROM stats_state WHERE path IN ({','.join('?' * len(batch))})",
+                    batch
+                )
+                for row in rows:
+                    try:
+                        states[row["path"]] = json.loads(row["state"])
+                    except ValueError:
+                        continue
+        return states
+
+    def put_stats_states(self, states: Dict[str, Dict[str, Any]]):
+        """Save stats-collector state for several paths in one transaction."""
+        if not states:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO stats_state (path, state) VALUES (?, ?)",
+                    [(path, json.dumps(state)) for path, state in states.items()]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error as e:
+                if DEBUG:
+                    logger.error(f"Error closing registry store: {e}")
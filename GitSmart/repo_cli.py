@@ -28,6 +28,8 @@ from typing import Optional, List
 
 from .repo_registry import get_repository_registry, ensure_repository_context
 from .repo_manager import get_repo_manager, register_current_repo, switch_to_repo, find_repo
+from .repo_discovery import iter_repositories
+from .config import DISCOVERY_MAX_DEPTH
 from .ui import console, printer
 from .config import logger, DEBUG
 
@@ -76,6 +78,9 @@ def cmd_list_repositories(args):
     console.print("=" * 50)
 
     registry = get_repository_registry()
+    if getattr(args, 'refresh', False):
+        with console.status("[bold green]Refreshing repository statistics...[/bold green]"):
+            registry.refresh_repository_stats()
     repositories = registry.list_repositories()
 
     if not repositories:
@@ -299,13 +304,9 @@ def cmd_repository_status(args):
 
         # Git status
         try:
-            from .git_utils import get_git_diff, parse_diff
+            from .git_utils import get_change_summary
 
-            staged_diff = get_git_diff(staged=True)
-            unstaged_diff = get_git_diff(staged=False)
-
-            staged_files = parse_diff(staged_diff)
-            unstaged_files = parse_diff(unstaged_diff)
+            staged_files, unstaged_files = get_change_summary()
 
             console.print(f"[bold]Working directory:[/bold]")
             console.print(f"  Staged files: {len(staged_files)}")
@@ -384,26 +385,24 @@ def cmd_discover_repositories(args):
     registry = get_repository_registry()
     discovered = []
 
-    # Search for git repositories
-    for root, dirs, files in os.walk(search_path):
-        if '.git' in dirs:
-            # Found a git repository
-            repo_path = root
-
-            # Check if already registered
-            existing_repo = registry.find_repository_by_path(repo_path)
-            if existing_repo:
-                console.print(f"[dim]Skipping {repo_path} (already registered as '{existing_repo.name}')[/dim]")
-                continue
-
-            # Discover and register
-            repo_info = registry.discover_repository(repo_path)
-            if repo_info:
-                discovered.append(repo_info)
-                console.print(f"[green]✅ Discovered: {repo_info.name} at {repo_info.path}[/green]")
-
-            # Don't recurse into this git repository
-            dirs[:] = [d for d in dirs if d != '.git']
+    # Search for git repositories; results are printed as the scan finds them
+    repositories = iter_repositories(
+        [search_path],
+        max_depth=getattr(args, 'max_depth', DISCOVERY_MAX_DEPTH),
+        include_submodules=getattr(args, 'submodules', False)
+    )
+    for found in repositories:
+        # Check if already registered
+        existing_repo = registry.find_repository_by_path(found.path)
+        if existing_repo:
+            console.print(f"[dim]Skipping {found.path} (already registered as '{existing_repo.name}')[/dim]")
+            continue
+
+        # Register with the metadata read during the scan
+        repo_info = registry.register_discovered(found)
+        if repo_info:
+            discovered.append(repo_info)
+            console.print(f"[green]✅ Discovered: {repo_info.name} at {repo_info.path}[/green]")
 
     if discovered:
         print_success(f"Discovered and registered {len(discovered)} repositories")
@@ -477,6 +476,11 @@ def create_repo_parser(subparsers):
         'list',
         help='List all registered repositories'
     )
+    list_parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Recount commits, branches and files of every repository first'
+    )
     list_parser.set_defaults(func=cmd_list_repositories)
 
     # Register repository
@@ -561,6 +565,17 @@ def create_repo_parser(subparsers):
         nargs='?',
         help='Path to search (default: current directory)'
     )
+    discover_parser.add_argument(
+        '--max-depth',
+        type=int,
+        default=DISCOVERY_MAX_DEPTH,
+        help=f'Directory levels to search below the path (default: {DISCOVERY_MAX_DEPTH})'
+    )
+    discover_parser.add_argument(
+        '--submodules',
+        action='store_true',
+        help='Also search inside repositories for submodules and nested repositories'
+    )
     discover_parser.set_defaults(func=cmd_discover_repositories)
 
     # Export registry
@@ -0,0 +1,226 @@
+import os
+import queue
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .config import logger, DEBUG, DISCOVERY_PRUNE, DISCOVERY_MAX_DEPTH, DISCOVERY_CONCURRENCY
+from .repo_stats import find_git_dir, find_common_dir
+
+"""
+repo_discovery.py
+
+- Finds git repositories under a set of roots with os.scandir on a thread
+  pool: every directory is one task, and the subdirectories it finds are
+  queued as new tasks, so idle threads pick up work from busy subtrees
+- Never descends into pruned directory names (node_modules, virtualenvs,
+  build output, ...), symlinks or past a depth limit, and stops at a
+  repository root unless submodules / nested repositories are requested
+- Branch and origin URL are read from the .git/HEAD and config files; git is
+  only run when the config uses includes or URL rewriting (insteadOf), where
+  the file alone does not give the effective URL
+- Results are yielded as they are found
+"""
+
+
+@dataclass
+class DiscoveredRepo:
+    """A repository found on disk."""
+    path: str
+    git_dir: str
+    name: str
+    remote_url: Optional[str]
+    branch: Optional[str]  # None for a detached HEAD
+
+
+def read_head_branch(git_dir: str) -> Optional[str]:
+    """Branch HEAD points to, from the HEAD file; None when detached or unreadable."""
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r") as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    if not head.startswith("ref:"):
+        return None
+    ref = head[len("ref:"):].strip()
+    return ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+
+
+def _needs_git(text: str) -> bool:
+    """True when a config file can change URLs in ways a plain read would miss."""
+    lower = text.lower()
+    return "[include" in lower or "insteadof" in lower
+
+
+@lru_cache(maxsize=1)
+def _global_config_needs_git() -> bool:
+    """Whether the user/system git config rewrites URLs or includes other files."""
+    xdg = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    paths = [
+        os.environ.get("GIT_CONFIG_GLOBAL") or os.path.join(os.path.expanduser("~"), ".gitconfig"),
+        os.path.join(xdg, "git", "config"),
+        "/etc/gitconfig",
+    ]
+    for path in paths:
+        try:
+            with open(path, "r", errors="replace") as f:
+                if _needs_git(f.read()):
+                    return True
+        except OSError:
+            continue
+    return False
+
+
+def _parse_origin_url(text: str) -> Tuple[bool, Optional[str]]:
+    """
+    (parsed, url) of remote "origin" in a git config file. parsed is False
+    when the value uses quoting, escapes or comments left to git to decode.
+    """
+    in_origin = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("["):
+            header = stripped[1:stripped.find("]")].strip() if "]" in stripped else ""
+            section, _, subsection = header.partition(" ")
+            in_origin = section.lower() == "remote" and subsection.strip() == '"origin"'
+            continue
+        if not in_origin or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        if key.strip().lower() != "url":
+            continue
+        value = value.strip()
+        if any(char in value for char in '"\\#;'):
+            return False, None
+        return True, value or None
+    return True, None
+
+
+def read_origin_url(repo_path: str, git_dir: str) -> Optional[str]:
+    """URL of the origin remote, read from the repository config when possible."""
+    try:
+        with open(os.path.join(find_common_dir(git_dir), "config"), "r", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        text = None
+
+    if text is not None and not _needs_git(text) and not _global_config_needs_git():
+        parsed, url = _parse_origin_url(text)
+        if parsed:
+            return url
+
+    try:
+        result = subprocess.run(
+            ["git", "-C", repo_path, "remote", "get-url", "origin"],
+            capture_output=True, text=True, check=True
+        )
+        return result.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_repository(path: str) -> Optional[DiscoveredRepo]:
+    """Metadata of the work tree at `path`, or None if it is not one."""
+    git_dir = find_git_dir(path)
+    if git_dir is None or not os.path.isfile(os.path.join(git_dir, "HEAD")):
+        return None
+    return DiscoveredRepo(
+        path=path,
+        git_dir=git_dir,
+        name=os.path.basename(path),
+        remote_url=read_origin_url(path, git_dir),
+        branch=read_head_branch(git_dir)
+    )
+
+
+def iter_repositories(
+    roots: Iterable[str],
+    max_depth: int = DISCOVERY_MAX_DEPTH,
+    prune: Iterable[str] = DISCOVERY_PRUNE,
+    include_submodules: bool = False,
+    max_workers: int = DISCOVERY_CONCURRENCY
+) -> Iterator[DiscoveredRepo]:
+    """
+    Yield the repositories under `roots` as they are found.
+
+    A root is depth 0; directories deeper than max_depth are not listed.
+    Closing the iterator early stops the scan.
+    """
+    prune = frozenset(prune)
+    roots = [os.path.realpath(os.path.expanduser(root)) for root in roots]
+    roots = [root for root in dict.fromkeys(roots) if os.path.isdir(root)]
+    if not roots:
+        return
+
+    results: "queue.Queue" = queue.Queue()
+    done = object()
+    stop = threading.Event()
+    lock = threading.Lock()
+    pending = [1]  # held by the caller until every root is queued
+    seen = set()
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+
+    def release():
+        with lock:
+            pending[0] -= 1
+            finished = pending[0] == 0
+        if finished:
+            results.put(done)
+
+    def submit(path: str, depth: int):
+        with lock:
+            if stop.is_set() or path in seen:
+                return
+            seen.add(path)
+            pending[0] += 1
+        executor.submit(scan, path, depth)
+
+    def scan(path: str, depth: int):
+        try:
+            if stop.is_set():
+                return
+            try:
+                with os.scandir(path) as iterator:
+                    entries = list(iterator)
+            except OSError as e:
+                if DEBUG:
+                    logger.debug(f"Cannot scan {path}: {e}")
+                return
+
+            if any(entry.name == ".git" for entry in entries):
+                repo = read_repository(path)
+                if repo is not None:
+                    results.put(repo)
+                    if not include_submodules:
+                        return
+            if depth >= max_depth:
+                return
+            for entry in entries:
+                if entry.name == ".git" or entry.name in prune:
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        submit(entry.path, depth + 1)
+                except OSError:
+                    continue
+        except Exception as e:
+            if DEBUG:
+                logger.error(f"Error scanning {path}: {e}")
+        finally:
+            release()
+
+    try:
+        for root in roots:
+            submit(root, 0)
+        release()
+        while True:
+            item = results.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
@@ -1,13 +1,14 @@
 import os
 import json
 import subprocess
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 from diskcache import Cache
 import logging
 
-from .config import logger, DEBUG
+from .config import logger, DEBUG, DISCOVERY_MAX_DEPTH
 from .utils import get_git_root
+from .repo_discovery import iter_repositories
 
 """
 Repository Manager Module
@@ -460,12 +461,26 @@ class RepositoryManager:
             self.logger.error(f"Error updating repository status: {e}")
             return False
 
-    def auto_discover_repositories(self, search_paths: List[str] = None) -> List[Dict[str, str]]:
+    def auto_discover_repositories(
+        self,
+        search_paths: List[str] = None,
+        include_submodules: bool = False,
+        max_depth: int = DISCOVERY_MAX_DEPTH,
+        on_found: Optional[Callable[[Dict[str, str]], None]] = None
+    ) -> List[Dict[str, str]]:
         """
         Automatically discover repositories in common locations.
 
+        Repositories are found with a parallel scan (see repo_discovery.py) and
+        their metadata is read from the .git directory. "has_changes" keeps the
+        value already stored for a known repository and is None for a new one
+        until update_repository_status runs git status.
+
         Args:
             search_paths: List of paths to search. If None, uses common locations.
+            include_submodules: Also look for repositories nested inside repositories.
+            max_depth: Directory levels below each search path to scan.
+            on_found: Called with each repository as soon as it is registered.
 
         Returns:
             List of discovered repository information dictionaries.
@@ -487,32 +502,28 @@ class RepositoryManager:
 
         discovered_repos = []
 
-        for search_path in search_paths:
-            if not os.path.exists(search_path):
-                continue
+        try:
+            known_changes = {
+                info["path"]: info.get("has_changes") for info in self.list_repositories().values()
+            }
+            for repo in iter_repositories(search_paths, max_depth=max_depth, include_submodules=include_submodules):
+                repo_info = {
+                    "name": repo.name,
+                    "path": repo.path,
+                    "remote_url": repo.remote_url,
+                    "current_branch": repo.branch or "",
+                    "has_changes": known_changes.get(repo.path),
+                    "discovered_at": repo.path,
+                    "last_accessed": None
+                }
+                discovered_repos.append(repo_info)
+                # Auto-register discovered repositories
+                self.register_repository(repo_info)
+                if on_found is not None:
+                    on_found(repo_info)
 
-            try:
-                # Search for .git directories
-                for root, dirs, files in os.walk(search_path):
-                    if ".git" in dirs:
-                        try:
-                            repo_info = self.discover_repository(root)
-                            if repo_info:
-                                discovered_repos.append(repo_info)
-                                # Auto-register discovered repositories
-                                self.register_repository(repo_info)
-                        except Exception as e:
-                            if DEBUG:
-                                self.logger.debug(f"Error discovering repo in {root}: {e}")
-                            continue
-
-                    # Don't recurse into .git directories
-                    if ".git" in dirs:
-                        dirs.remove(".git")
-
-            except Exception as e:
-                self.logger.error(f"Error searching path {search_path}: {e}")
-                continue
+        except Exception as e:
+            self.logger.error(f"Error searching paths {search_paths}: {e}")
 
         if DEBUG:
             self.logger.debug(f"Auto-discovered {len(discovered_repos)} repositories")
@@ -5,7 +5,11 @@ This module manages a persistent registry of Git repositories that GitSmart has
 enabling it to find and operate on the correct repository regardless of the current working directory.
 
 Features:
-- Persistent storage of repository information
+- Persistent storage of repository information (indexed SQLite store, see registry_store.py)
+- Debounced, atomic JSON snapshot of the registry (export only; it is imported
+  once, into a new store); access-time bumps are batched
+- Repository stats collected without changing directory, in parallel for bulk
+  refreshes, and incrementally from the HEAD / refs / index state saved last time
 - Repository discovery and registration
 - Multi-repository management
 - Path resolution and validation
@@ -14,9 +18,13 @@ Features:
 
 import os
 import json
+import atexit
 import hashlib
 import subprocess
+import tempfile
+import threading
 import time
+import weakref
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
@@ -24,6 +32,39 @@ from diskcache import Cache
 
 from .config import logger, DEBUG
 from .utils import get_git_root
+from .registry_store import RegistryStore
+from .repo_discovery import DiscoveredRepo
+from .repo_stats import STATS_CONCURRENCY, RepoStats, StatsSnapshot, refresh_stats_many
+
+# Seconds a change may wait before the JSON snapshot is rewritten
+SNAPSHOT_DELAY = 2.0
+
+# Registries not closed yet; flushed once at exit without keeping them alive
+_open_registries: "weakref.WeakSet[RepositoryRegistry]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_registries():
+    for registry in list(_open_registries):
+        registry.close()
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]):
+    """Write JSON to a temporary file next to `path`, then rename it over `path`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
 
 
 @dataclass
@@ -59,12 +100,13 @@ class RepositoryRegistry:
     different directories.
     """
 
-    def __init__(self, registry_path: Optional[str] = None):
+    def __init__(self, registry_path: Optional[str] = None, snapshot_delay: float = SNAPSHOT_DELAY):
         """
         Initialize the repository registry.
 
         Args:
             registry_path: Custom path for registry storage. If None, uses default.
+            snapshot_delay: Seconds to batch changes before rewriting the JSON snapshot.
         """
         if registry_path:
             self.registry_dir = Path(registry_path)
@@ -74,8 +116,10 @@ class RepositoryRegistry:
 
         self.registry_dir.mkdir(parents=True, exist_ok=True)
 
-        # Use diskcache for persistent storage
-        self.cache = Cache(str(self.registry_dir / "repo_cache"))
+        # Indexed SQLite storage; the JSON file is a backup/export snapshot
+        store_path = self.registry_dir / "registry.sqlite3"
+        new_store = not store_path.exists()
+        self.store = RegistryStore(str(store_path))
 
         # Registry file for backup/export
         self.registry_file = self.registry_dir / "repositories.json"
@@ -83,53 +127,153 @@ class RepositoryRegistry:
         # Current active repository
         self._current_repo: Optional[RepositoryInfo] = None
 
-        # Load existing registry
-        self._load_registry()
+        # Write-behind state: the store holds every change as soon as it is
+        # made; the snapshot and access-time bumps are flushed in batches
+        self._snapshot_delay = snapshot_delay
+        self._flush_lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._snapshot_dirty = False
+        self._pending_touches: Dict[str, float] = {}
+        self._closed = False
+        _open_registries.add(self)
+
+        # A new store is seeded once from older formats; after that the
+        # store is authoritative (even when emptied) and repositories.json
+        # is only an export
+        if new_store:
+            self._migrate_legacy_cache()
+            self._import_json_snapshot()
+
+    def _migrate_legacy_cache(self):
+        """Import repositories from the diskcache store used by earlier versions."""
+        legacy_dir = self.registry_dir / "repo_cache"
+        if not legacy_dir.exists():
+            return
+        try:
+            with Cache(str(legacy_dir)) as legacy:
+                repos = [legacy[key] for key in legacy]
+            migrated = [repo for repo in repos if isinstance(repo, RepositoryInfo)]
+            self.store.put_many(self._to_record(repo) for repo in migrated)
+            if DEBUG:
+                logger.debug(f"Migrated {len(migrated)} repositories from the legacy cache")
+        except Exception as e:
+            if DEBUG:
+                logger.error(f"Error migrating legacy registry cache: {e}")
 
-    def _load_registry(self):
-        """Load the repository registry from persistent storage."""
+    def _import_json_snapshot(self):
+        """Import repositories.json, written by earlier versions, into a new store."""
         try:
             if self.registry_file.exists():
                 with open(self.registry_file, 'r') as f:
                     data = json.load(f)
 
-                # Migrate data to cache if needed
-                for repo_id, repo_data in data.get('repositories', {}).items():
-                    if repo_id not in self.cache:
-                        repo_info = RepositoryInfo.from_dict(repo_data)
-                        self.cache[repo_id] = repo_info
+                repos = [RepositoryInfo.from_dict(repo_data) for repo_data in data.get('repositories', {}).values()]
+                self.store.put_many(self._to_record(repo) for repo in repos if repo.repo_id not in self.store)
 
                 if DEBUG:
-                    logger.debug(f"Loaded {len(data.get('repositories', {}))} repositories from registry")
+                    logger.debug(f"Imported {len(repos)} repositories from the registry snapshot")
 
         except Exception as e:
             if DEBUG:
                 logger.error(f"Error loading registry: {e}")
 
+    @staticmethod
+    def _to_record(repo_info: RepositoryInfo) -> Dict[str, Any]:
+        record = repo_info.to_dict()
+        record["path"] = os.path.abspath(record["path"])
+        return record
+
+    def _put(self, repo_info: RepositoryInfo):
+        """Insert or update one repository."""
+        self.store.put(self._to_record(repo_info))
+
+    def _get(self, repo_id: str) -> Optional[RepositoryInfo]:
+        record = self.store.get(repo_id)
+        return RepositoryInfo.from_dict(record) if record else None
+
+    def _touch(self, repo_info: RepositoryInfo):
+        """Bump last_accessed; the store is updated with the next batch."""
+        repo_info.last_accessed = time.time()
+        with self._flush_lock:
+            self._pending_touches[repo_info.repo_id] = repo_info.last_accessed
+            self._schedule_flush()
+
+    def _apply_touches(self):
+        """Write batched last_accessed bumps to the store in one transaction."""
+        with self._flush_lock:
+            touches, self._pending_touches = self._pending_touches, {}
+            if touches:
+                self.store.touch_many(touches)
+
+    def _list_records(self) -> List[Dict[str, Any]]:
+        """All records, most recently accessed first, including batched bumps."""
+        self._apply_touches()
+        return self.store.list_all()
+
     def _save_registry(self):
-        """Save the repository registry to persistent storage."""
-        try:
-            # Export cache to JSON for backup
-            data = {
-                'version': '1.0',
-                'last_updated': time.time(),
-                'repositories': {}
-            }
+        """
+        Schedule a rewrite of the JSON snapshot. Changes are already in the
+        store, so several saves in a row cost one snapshot.
+        """
+        with self._flush_lock:
+            self._snapshot_dirty = True
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Arm the debounced flush, unless one is already pending."""
+        with self._flush_lock:
+            if self._closed or self._flush_timer is not None:
+                return
+            if self._snapshot_delay <= 0:
+                self.flush()
+                return
+            self._flush_timer = threading.Timer(self._snapshot_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Apply batched access times and rewrite the JSON snapshot if it is stale."""
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._closed:
+                return
+            try:
+                self._apply_touches()
+                if not self._snapshot_dirty:
+                    return
+                self._snapshot_dirty = False
 
-            for repo_id in self.cache:
-                repo_info = self.cache[repo_id]
-                if isinstance(repo_info, RepositoryInfo):
-                    data['repositories'][repo_id] = repo_info.to_dict()
+                # Export the store to JSON for backup
+                data = {
+                    'version': '1.0',
+                    'last_updated': time.time(),
+                    'repositories': {}
+                }
 
-            with open(self.registry_file, 'w') as f:
-                json.dump(data, f, indent=2)
+                for record in self.store.list_all():
+                    data['repositories'][record['repo_id']] = record
 
-            if DEBUG:
-                logger.debug(f"Saved {len(data['repositories'])} repositories to registry")
+                _write_json_atomic(str(self.registry_file), data)
 
-        except Exception as e:
-            if DEBUG:
-                logger.error(f"Error saving registry: {e}")
+                if DEBUG:
+                    logger.debug(f"Saved {len(data['repositories'])} repositories to registry")
+
+            except Exception as e:
+                self._snapshot_dirty = True
+                if DEBUG:
+                    logger.error(f"Error saving registry: {e}")
+
+    def close(self):
+        """Flush pending changes and close the store."""
+        with self._flush_lock:
+            if self._closed:
+                return
+            self.flush()
+            self._closed = True
+            self.store.close()
+        _open_registries.discard(self)
 
     def _generate_repo_id(self, repo_path: str, remote_url: Optional[str] = None) -> str:
         """
@@ -161,36 +305,31 @@ class RepositoryRegistry:
             Tuple of (branch_count, commit_count, file_count)
         """
         try:
-            os.chdir(repo_path)
-
-            # Count branches
-            branch_result = subprocess.run(
-                ["git", "branch", "-a"],
-                capture_output=True, text=True, check=True
-            )
-            branch_count = len([line for line in branch_result.stdout.split('\n') if line.strip()])
-
-            # Count commits
-            commit_result = subprocess.run(
-                ["git", "rev-list", "--count", "HEAD"],
-                capture_output=True, text=True, check=True
-            )
-            commit_count = int(commit_result.stdout.strip())
-
-            # Count tracked files
-            file_result = subprocess.run(
-                ["git", "ls-files"],
-                capture_output=True, text=True, check=True
-            )
-            file_count = len([line for line in file_result.stdout.split('\n') if line.strip()])
-
-            return branch_count, commit_count, file_count
+            return self._collect_stats([repo_path])[os.path.abspath(repo_path)]
 
         except Exception as e:
             if DEBUG:
                 logger.error(f"Error getting repo stats: {e}")
             return 0, 0, 0
 
+    def _collect_stats(self, repo_paths: List[str], max_workers: int = STATS_CONCURRENCY) -> Dict[str, RepoStats]:
+        """
+        Stats of several repositories keyed by absolute path, starting from the
+        state saved by the previous collection so unchanged counts are reused.
+        """
+        paths = [os.path.abspath(path) for path in repo_paths]
+        previous = {
+            path: StatsSnapshot.from_dict(state)
+            for path, state in self.store.get_stats_states(paths).items()
+        }
+        snapshots = refresh_stats_many(paths, previous, max_workers)
+        self.store.put_stats_states({
+            path: snapshot.to_dict()
+            for path, snapshot in snapshots.items()
+            if previous.get(path) != snapshot
+        })
+        return {path: snapshot.counts for path, snapshot in snapshots.items()}
+
     def _get_remote_url(self, repo_path: str) -> Optional[str]:
         """
         Get the remote URL for a repository.
@@ -202,13 +341,12 @@ class RepositoryRegistry:
             Remote URL or None if not available
         """
         try:
-            os.chdir(repo_path)
             result = subprocess.run(
                 ["git", "remote", "get-url", "origin"],
-                capture_output=True, text=True, check=True
+                capture_output=True, text=True, check=True, cwd=repo_path
             )
             return result.stdout.strip()
-        except subprocess.CalledProcessError:
+        except (OSError, subprocess.CalledProcessError):
             return None
 
     def _extract_repo_name(self, repo_path: str, remote_url: Optional[str] = None) -> str:
@@ -247,70 +385,78 @@ class RepositoryRegistry:
             RepositoryInfo if repository found and registered, None otherwise
         """
         try:
-            original_cwd = os.getcwd()
-
-            if search_path:
-                os.chdir(search_path)
-
             # Try to find git root
-            repo_path = get_git_root()
+            repo_path = get_git_root(search_path)
             if not repo_path:
                 return None
 
-            os.chdir(repo_path)
-
             # Get repository information
-            remote_url = self._get_remote_url(repo_path)
-            repo_id = self._generate_repo_id(repo_path, remote_url)
+            return self._register_discovered(repo_path, self._get_remote_url(repo_path))
 
-            # Check if already registered
-            if repo_id in self.cache:
-                repo_info = self.cache[repo_id]
-                # Update last accessed time
-                repo_info.last_accessed = time.time()
-                self.cache[repo_id] = repo_info
-                self._save_registry()
+        except Exception as e:
+            if DEBUG:
+                logger.error(f"Error discovering repository: {e}")
+            return None
 
-                if DEBUG:
-                    logger.debug(f"Found existing repository: {repo_info.name}")
+    def register_discovered(self, repo: DiscoveredRepo) -> Optional[RepositoryInfo]:
+        """
+        Register a repository found by repo_discovery, whose root and remote
+        are already known.
 
-                return repo_info
+        Args:
+            repo: Repository found on disk
 
-            # Register new repository
-            repo_name = self._extract_repo_name(repo_path, remote_url)
-            branch_count, commit_count, file_count = self._get_repo_stats(repo_path)
+        Returns:
+            RepositoryInfo if registered (or already known), None otherwise
+        """
+        try:
+            return self._register_discovered(repo.path, repo.remote_url)
+        except Exception as e:
+            if DEBUG:
+                logger.error(f"Error registering discovered repository {repo.path}: {e}")
+            return None
 
-            repo_info = RepositoryInfo(
-                name=repo_name,
-                path=repo_path,
-                remote_url=remote_url,
-                last_accessed=time.time(),
-                created_at=time.time(),
-                branch_count=branch_count,
-                commit_count=commit_count,
-                file_count=file_count,
-                repo_id=repo_id,
-                aliases=[]
-            )
+    def _register_discovered(self, repo_path: str, remote_url: Optional[str]) -> RepositoryInfo:
+        """Return the registered repository at repo_path, registering it if new."""
+        repo_id = self._generate_repo_id(repo_path, remote_url)
 
-            # Store in registry
-            self.cache[repo_id] = repo_info
+        # Check if already registered
+        repo_info = self._get(repo_id)
+        if repo_info is not None:
+            # Update last accessed time
+            self._touch(repo_info)
             self._save_registry()
 
             if DEBUG:
-                logger.debug(f"Registered new repository: {repo_name} at {repo_path}")
+                logger.debug(f"Found existing repository: {repo_info.name}")
 
             return repo_info
 
-        except Exception as e:
-            if DEBUG:
-                logger.error(f"Error discovering repository: {e}")
-            return None
-        finally:
-            try:
-                os.chdir(original_cwd)
-            except:
-                pass
+        # Register new repository
+        repo_name = self._extract_repo_name(repo_path, remote_url)
+        branch_count, commit_count, file_count = self._get_repo_stats(repo_path)
+
+        repo_info = RepositoryInfo(
+            name=repo_name,
+            path=repo_path,
+            remote_url=remote_url,
+            last_accessed=time.time(),
+            created_at=time.time(),
+            branch_count=branch_count,
+            commit_count=commit_count,
+            file_count=file_count,
+            repo_id=repo_id,
+            aliases=[]
+        )
+
+        # Store in registry
+        self._put(repo_info)
+        self._save_registry()
+
+        if DEBUG:
+            logger.debug(f"Registered new repository: {repo_name} at {repo_path}")
+
+        return repo_info
 
     def register_repository_by_name(self, repo_name: str, repo_path: str) -> Optional[RepositoryInfo]:
         """
@@ -330,22 +476,19 @@ class RepositoryRegistry:
                     logger.error(f"Not a git repository: {repo_path}")
                 return None
 
-            original_cwd = os.getcwd()
-            os.chdir(repo_path)
-
             remote_url = self._get_remote_url(repo_path)
             repo_id = self._generate_repo_id(repo_path, remote_url)
 
             # Check if already exists
-            if repo_id in self.cache:
-                repo_info = self.cache[repo_id]
+            repo_info = self._get(repo_id)
+            if repo_info is not None:
                 # Update name if different
                 if repo_info.name != repo_name:
                     if repo_name not in repo_info.aliases:
                         repo_info.aliases.append(repo_info.name)
                     repo_info.name = repo_name
                     repo_info.last_accessed = time.time()
-                    self.cache[repo_id] = repo_info
+                    self._put(repo_info)
                     self._save_registry()
                 return repo_info
 
@@ -365,7 +508,7 @@ class RepositoryRegistry:
                 aliases=[]
             )
 
-            self.cache[repo_id] = repo_info
+            self._put(repo_info)
             self._save_registry()
 
             if DEBUG:
@@ -377,11 +520,6 @@ class RepositoryRegistry:
             if DEBUG:
                 logger.error(f"Error registering repository {repo_name}: {e}")
             return None
-        finally:
-            try:
-                os.chdir(original_cwd)
-            except:
-                pass
 
     def find_repository_by_name(self, name: str) -> Optional[RepositoryInfo]:
         """
@@ -393,17 +531,12 @@ class RepositoryRegistry:
         Returns:
             RepositoryInfo if found, None otherwise
         """
-        for repo_id in self.cache:
-            repo_info = self.cache[repo_id]
-            if isinstance(repo_info, RepositoryInfo):
-                if (repo_info.name.lower() == name.lower() or
-                    name.lower() in [alias.lower() for alias in repo_info.aliases]):
-                    # Update last accessed
-                    repo_info.last_accessed = time.time()
-                    self.cache[repo_id] = repo_info
-                    return repo_info
-
-        return None
+        record = self.store.find_by_name(name)
+        if record is None:
+            return None
+        repo_info = RepositoryInfo.from_dict(record)
+        self._touch(repo_info)
+        return repo_info
 
     def find_repository_by_path(self, path: str) -> Optional[RepositoryInfo]:
         """
@@ -415,18 +548,25 @@ class RepositoryRegistry:
         Returns:
             RepositoryInfo if found, None otherwise
         """
-        abs_path = os.path.abspath(path)
+        record = self.store.find_by_path(os.path.abspath(path))
+        if record is None:
+            return None
+        repo_info = RepositoryInfo.from_dict(record)
+        self._touch(repo_info)
+        return repo_info
 
-        for repo_id in self.cache:
-            repo_info = self.cache[repo_id]
-            if isinstance(repo_info, RepositoryInfo):
-                if os.path.abspath(repo_info.path) == abs_path:
-                    # Update last accessed
-                    repo_info.last_accessed = time.time()
-                    self.cache[repo_id] = repo_info
-                    return repo_info
+    def find_repository_by_remote(self, remote_url: str) -> Optional[RepositoryInfo]:
+        """
+        Find a repository by its origin remote URL.
 
-        return None
+        Args:
+            remote_url: Remote URL to search for
+
+        Returns:
+            RepositoryInfo if found, None otherwise
+        """
+        record = self.store.find_by_remote(remote_url)
+        return RepositoryInfo.from_dict(record) if record else None
 
     def list_repositories(self) -> List[RepositoryInfo]:
         """
@@ -435,15 +575,8 @@ class RepositoryRegistry:
         Returns:
             List of RepositoryInfo objects sorted by last accessed time
         """
-        repos = []
-        for repo_id in self.cache:
-            repo_info = self.cache[repo_id]
-            if isinstance(repo_info, RepositoryInfo):
-                repos.append(repo_info)
-
-        # Sort by last accessed (most recent first)
-        repos.sort(key=lambda x: x.last_accessed, reverse=True)
-        return repos
+        # Sorted by last accessed (most recent first) by the store's index
+        return [RepositoryInfo.from_dict(record) for record in self._list_records()]
 
     def get_current_repository(self) -> Optional[RepositoryInfo]:
         """
@@ -474,8 +607,7 @@ class RepositoryRegistry:
             self._current_repo = repo_info
 
             # Update last accessed
-            repo_info.last_accessed = time.time()
-            self.cache[repo_info.repo_id] = repo_info
+            self._touch(repo_info)
             self._save_registry()
 
             if DEBUG:
@@ -529,11 +661,10 @@ class RepositoryRegistry:
 
         if not repo_info:
             # Try to find by repo_id
-            if identifier in self.cache:
-                repo_info = self.cache[identifier]
+            repo_info = self._get(identifier)
 
         if repo_info:
-            del self.cache[repo_info.repo_id]
+            self.store.delete(repo_info.repo_id)
             self._save_registry()
 
             if self._current_repo and self._current_repo.repo_id == repo_info.repo_id:
@@ -561,7 +692,7 @@ class RepositoryRegistry:
 
         if repo_info and alias not in repo_info.aliases:
             repo_info.aliases.append(alias)
-            self.cache[repo_info.repo_id] = repo_info
+            self._put(repo_info)
             self._save_registry()
 
             if DEBUG:
@@ -582,32 +713,63 @@ class RepositoryRegistry:
             True if successful, False otherwise
         """
         try:
-            original_cwd = os.getcwd()
+            if not os.path.exists(repo_info.path):
+                if DEBUG:
+                    logger.error(f"Repository path does not exist: {repo_info.path}")
+                return False
 
-            if self.set_current_repository(repo_info):
-                branch_count, commit_count, file_count = self._get_repo_stats(repo_info.path)
+            stats = self._get_repo_stats(repo_info.path)
+            repo_info.last_accessed = time.time()
+            self._apply_stats(repo_info, stats)
+            self._save_registry()
 
-                repo_info.branch_count = branch_count
-                repo_info.commit_count = commit_count
-                repo_info.file_count = file_count
-                repo_info.last_accessed = time.time()
+            return True
 
-                self.cache[repo_info.repo_id] = repo_info
-                self._save_registry()
+        except Exception as e:
+            if DEBUG:
+                logger.error(f"Error updating repository stats: {e}")
+            return False
 
-                return True
+    def refresh_repository_stats(
+        self,
+        repos: Optional[List[RepositoryInfo]] = None,
+        max_workers: int = STATS_CONCURRENCY
+    ) -> int:
+        """
+        Update the statistics of several repositories in parallel.
 
-            return False
+        Args:
+            repos: Repositories to refresh. If None, refreshes every registered one.
+            max_workers: Maximum number of repositories refreshed at once
 
+        Returns:
+            Number of repositories updated
+        """
+        if repos is None:
+            repos = self.list_repositories()
+        repos = [repo for repo in repos if os.path.exists(repo.path)]
+
+        try:
+            stats = self._collect_stats([repo.path for repo in repos], max_workers)
         except Exception as e:
             if DEBUG:
-                logger.error(f"Error updating repository stats: {e}")
-            return False
-        finally:
-            try:
-                os.chdir(original_cwd)
-            except:
-                pass
+                logger.error(f"Error refreshing repository stats: {e}")
+            return 0
+
+        changed = False
+        for repo_info in repos:
+            repo_stats = stats[os.path.abspath(repo_info.path)]
+            if repo_stats != (repo_info.branch_count, repo_info.commit_count, repo_info.file_count):
+                self._apply_stats(repo_info, repo_stats)
+                changed = True
+        if changed:
+            self._save_registry()
+        return len(repos)
+
+    def _apply_stats(self, repo_info: RepositoryInfo, stats: RepoStats):
+        """Store freshly collected (branch_count, commit_count, file_count)."""
+        repo_info.branch_count, repo_info.commit_count, repo_info.file_count = stats
+        self._put(repo_info)
 
     def cleanup_invalid_repositories(self) -> int:
         """
@@ -616,16 +778,13 @@ class RepositoryRegistry:
         Returns:
             Number of repositories removed
         """
-        invalid_repos = []
-
-        for repo_id in self.cache:
-            repo_info = self.cache[repo_id]
-            if isinstance(repo_info, RepositoryInfo):
-                if not os.path.exists(repo_info.path):
-                    invalid_repos.append(repo_id)
+        invalid_repos = [
+            record['repo_id'] for record in self._list_records()
+            if not os.path.exists(record['path'])
+        ]
 
         for repo_id in invalid_repos:
-            del self.cache[repo_id]
+            self.store.delete(repo_id)
 
         if invalid_repos:
             self._save_registry()
@@ -652,13 +811,10 @@ class RepositoryRegistry:
                 'repositories': {}
             }
 
-            for repo_id in self.cache:
-                repo_info = self.cache[repo_id]
-                if isinstance(repo_info, RepositoryInfo):
-                    data['repositories'][repo_id] = repo_info.to_dict()
+            for record in self._list_records():
+                data['repositories'][record['repo_id']] = record
 
-            with open(export_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            _write_json_atomic(export_path, data)
 
             if DEBUG:
                 logger.debug(f"Exported registry to {export_path}")
@@ -690,7 +846,7 @@ class RepositoryRegistry:
 
                 # Only import if path still exists
                 if os.path.exists(repo_info.path):
-                    self.cache[repo_id] = repo_info
+                    self._put(repo_info)
                     imported_count += 1
 
             self._save_registry()
@@ -0,0 +1,277 @@
+import os
+import hashlib
+import struct
+import subprocess
+from dataclasses import dataclass, asdict, fields
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .concurrency import map_bounded
+from .config import logger, DEBUG
+
+"""
+repo_stats.py
+
+- Branch, commit and tracked-file counts of a repository without touching the
+  process working directory: every git call gets `-C <repo>`, so the MCP
+  thread, the UI and a bulk refresh can all collect stats at the same time
+- refresh_stats_many refreshes several repositories on a bounded thread pool
+- The file count is the entry count in the index header (12 bytes read)
+  instead of streaming all of `git ls-files`; split and sparse indexes, whose
+  header does not count every tracked file, fall back to `ls-files -z`
+- Incremental: a StatsSnapshot remembers the HEAD OID, the refs state
+  (packed-refs and loose ref names) and the index checksum it was
+  computed from. A refresh reuses every count whose inputs did not change,
+  runs no git command at all when nothing changed, and when HEAD moved
+  forward counts only `rev-list --count old..new`
+"""
+
+# Repositories refreshed at once by refresh_stats_many
+STATS_CONCURRENCY = 8
+
+# (branch_count, commit_count, file_count)
+RepoStats = Tuple[int, int, int]
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    """Repository counts plus the state they were computed from."""
+    branch_count: int
+    commit_count: int
+    file_count: int
+    head_oid: Optional[str] = None
+    refs_key: Optional[str] = None
+    index_key: Optional[str] = None
+
+    @property
+    def counts(self) -> RepoStats:
+        return self.branch_count, self.commit_count, self.file_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StatsSnapshot':
+        return cls(**{field.name: data.get(field.name) for field in fields(cls)})
+
+
+def _git(repo_path: str, args: List[str]) -> Optional[str]:
+    """Run git in repo_path; None when the command fails."""
+    try:
+        result = subprocess.run(
+            ["git", "-C", repo_path] + args,
+            capture_output=True, text=True, check=True
+        )
+        return result.stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        if DEBUG:
+            logger.debug(f"git {' '.join(args)} failed in {repo_path}: {e}")
+        return None
+
+
+def find_git_dir(repo_path: str) -> Optional[str]:
+    """
+    The git directory of a work tree: `.git` itself, or the directory a `.git`
+    file points to (linked worktrees, submodules).
+    """
+    dot_git = os.path.join(repo_path, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    try:
+        with open(dot_git, "r") as f:
+            line = f.readline().strip()
+    except OSError:
+        return None
+    if not line.startswith("gitdir:"):
+        return None
+    git_dir = line[len("gitdir:"):].strip()
+    if not os.path.isabs(git_dir):
+        git_dir = os.path.normpath(os.path.join(repo_path, git_dir))
+    return git_dir
+
+
+def find_common_dir(git_dir: str) -> str:
+    """Directory holding refs and packed-refs (differs from git_dir in linked worktrees)."""
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r") as f:
+            common = f.read().strip()
+    except OSError:
+        return git_dir
+    return common if os.path.isabs(common) else os.path.normpath(os.path.join(git_dir, common))
+
+
+def read_head_oid(git_dir: str) -> Tuple[bool, Optional[str]]:
+    """
+    Resolve HEAD from the files in the git directory.
+
+    Returns (resolved, oid): oid is None for an unborn branch. resolved is
+    False when the refs could not be read directly (e.g. reftable storage)
+    and the caller has to ask git.
+    """
+    common = find_common_dir(git_dir)
+    if os.path.isdir(os.path.join(common, "reftable")):
+        return False, None
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r") as f:
+            head = f.read().strip()
+    except OSError:
+        return False, None
+    if not head.startswith("ref:"):
+        return bool(head), head or None
+
+    ref = head[len("ref:"):].strip()
+    try:
+        with open(os.path.join(common, ref), "r") as f:
+            oid = f.read().strip()
+        if oid.startswith("ref:"):
+            return False, None
+        return True, oid or None
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(common, "packed-refs"), "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref and not line.startswith(("#", "^")):
+                    return True, parts[0]
+    except OSError:
+        pass
+    return True, None
+
+
+def _refs_key(git_dir: str) -> Optional[str]:
+    """
+    Fingerprint of the branch list: packed-refs plus the names of the loose
+    refs. Moving a branch (e.g. committing) does not change it.
+    """
+    common = find_common_dir(git_dir)
+    parts = []
+    try:
+        stat = os.stat(os.path.join(common, "packed-refs"))
+        parts.append(f"packed-refs:{stat.st_mtime_ns}:{stat.st_size}")
+    except OSError:
+        parts.append("packed-refs:-")
+    for top in ("heads", "remotes"):
+        for root, _, files in os.walk(os.path.join(common, "refs", top)):
+            relative = os.path.relpath(root, common)
+            parts.extend(f"{relative}/{name}" for name in files if not name.endswith(".lock"))
+    return hashlib.sha1("\n".join(sorted(parts)).encode("utf-8")).hexdigest()
+
+
+def _index_key(git_dir: str) -> Optional[str]:
+    """The trailing checksum of the index file, which changes with every rewrite."""
+    index_path = os.path.join(git_dir, "index")
+    try:
+        size = os.path.getsize(index_path)
+        with open(index_path, "rb") as f:
+            f.seek(max(0, size - 32))
+            return f"{size}:{f.read().hex()}"
+    except FileNotFoundError:
+        return "none"
+    except OSError:
+        return None
+
+
+def read_index_entry_count(git_dir: str) -> Optional[int]:
+    """
+    Number of index entries from the index header ("DIRC", version, count).
+
+    Returns 0 when there is no index yet, and None when the count cannot be
+    trusted as a file count (unknown format, split or sparse index).
+    """
+    try:
+        with open(os.path.join(git_dir, "index"), "rb") as f:
+            header = f.read(12)
+    except FileNotFoundError:
+        return 0
+    except OSError:
+        return None
+    if len(header) < 12 or header[:4] != b"DIRC":
+        return None
+    version, count = struct.unpack(">II", header[4:12])
+    if version not in (2, 3, 4):
+        return None
+    try:
+        if any(name.startswith("sharedindex.") for name in os.listdir(git_dir)):
+            return None
+    except OSError:
+        return None
+    if os.path.exists(os.path.join(git_dir, "info", "sparse-checkout")):
+        return None
+    return count
+
+
+def _count_branches(repo_path: str) -> int:
+    refs = _git(repo_path, ["for-each-ref", "--format=%(refname)", "refs/heads", "refs/remotes"])
+    return len([line for line in refs.splitlines() if line.strip()]) if refs else 0
+
+
+def _count_commits(repo_path: str, revision: str = "HEAD") -> Optional[int]:
+    commits = (_git(repo_path, ["rev-list", "--count", revision]) or "").strip()
+    return int(commits) if commits.isdigit() else None
+
+
+def _count_files(repo_path: str, git_dir: Optional[str]) -> int:
+    file_count = read_index_entry_count(git_dir) if git_dir else None
+    if file_count is None:
+        files = _git(repo_path, ["ls-files", "-z"])
+        file_count = files.count("\0") if files else 0
+    return file_count
+
+
+def _head_commit_count(repo_path: str, head_oid: Optional[str], previous: Optional[StatsSnapshot]) -> int:
+    """Commit count of HEAD, counting only the new commits when HEAD moved forward."""
+    if head_oid is None:
+        return 0
+    if previous is not None and previous.head_oid:
+        if previous.head_oid == head_oid:
+            return previous.commit_count
+        is_ancestor = _git(repo_path, ["merge-base", "--is-ancestor", previous.head_oid, head_oid])
+        if is_ancestor is not None:
+            added = _count_commits(repo_path, f"{previous.head_oid}..{head_oid}")
+            if added is not None:
+                return previous.commit_count + added
+    return _count_commits(repo_path, head_oid) or 0
+
+
+def refresh_repo_stats(repo_path: str, previous: Optional[StatsSnapshot] = None) -> StatsSnapshot:
+    """
+    Stats of one repository, reusing the counts in `previous` whose inputs
+    did not change. A count that cannot be read is 0.
+    """
+    git_dir = find_git_dir(repo_path)
+    if git_dir is None:
+        commit_count = _count_commits(repo_path) or 0
+        return StatsSnapshot(_count_branches(repo_path), commit_count, _count_files(repo_path, None))
+
+    resolved, head_oid = read_head_oid(git_dir)
+    if not resolved:
+        head_oid = (_git(repo_path, ["rev-parse", "--verify", "--quiet", "HEAD"]) or "").strip() or None
+    refs_key = _refs_key(git_dir)
+    index_key = _index_key(git_dir)
+
+    def unchanged(name: str, value: Optional[str]) -> bool:
+        return previous is not None and value is not None and getattr(previous, name) == value
+
+    if unchanged("head_oid", head_oid) and unchanged("refs_key", refs_key) and unchanged("index_key", index_key):
+        return previous
+
+    return StatsSnapshot(
+        branch_count=previous.branch_count if unchanged("refs_key", refs_key) else _count_branches(repo_path),
+        commit_count=_head_commit_count(repo_path, head_oid, previous),
+        file_count=previous.file_count if unchanged("index_key", index_key) else _count_files(repo_path, git_dir),
+        head_oid=head_oid,
+        refs_key=refs_key,
+        index_key=index_key
+    )
+
+
+def refresh_stats_many(
+    repo_paths: Iterable[str],
+    previous: Optional[Dict[str, StatsSnapshot]] = None,
+    max_workers: int = STATS_CONCURRENCY
+) -> Dict[str, StatsSnapshot]:
+    """Refresh several repositories in parallel, keyed by path."""
+    paths = list(dict.fromkeys(repo_paths))
+    previous = previous or {}
+    snapshots = map_bounded(lambda path: refresh_repo_stats(path, previous.get(path)), paths, max_workers)
+    return dict(zip(paths, snapshots))
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Unit tests for commit message generation helpers in GitSmart.ai_utils.
+"""
+
+import unittest
+import subprocess
+import tempfile
+import shutil
+import os
+import sys
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, patch
+
+from diskcache import Cache
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.ai_utils import (
+    generate_commit_message, generate_commit_message_async, generate_commit_candidates, prepare_commit_prompt,
+    iter_commit_candidates, start_speculative_commit, summarize_commits, CommitBlockDetector, SpeculativeCommit
+)
+from GitSmart.git_utils import get_git_diff, get_staged_tree_oids
+from GitSmart.git_backend import close_all_backends
+
+
+class TestCommitMessageCache(unittest.TestCase):
+    """Test the staged-tree keyed commit message cache."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.original_dir = os.getcwd()
+        self.test_dir = tempfile.mkdtemp(prefix="gitsmart_test_")
+        os.chdir(self.test_dir)
+
+        subprocess.run(["git", "init"], check=True, capture_output=True)
+        subprocess.run(["git", "config", "user.name", "Test User"], check=True)
+        subprocess.run(["git", "config", "user.email", "test@example.com"], check=True)
+        with open("app.py", "w") as f:
+            f.write("print('hello')\n")
+        subprocess.run(["git", "add", "app.py"], check=True)
+
+        self.cache = Cache(os.path.join(self.test_dir, ".cache"))
+        patcher = patch("GitSmart.ai_utils.COMMIT_CACHE", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        completion = patch(
+            "GitSmart.ai_utils.get_chat_completion",
+            return_value="<COMMIT_MESSAGE>feat: add app</COMMIT_MESSAGE>"
+        )
+        self.completion = completion.start()
+        self.addCleanup(completion.stop)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        self.cache.close()
+        close_all_backends()
+        os.chdir(self.original_dir)
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_staged_tree_oids(self):
+        """The index tree changes with the staged content; HEAD has no tree yet."""
+        head_tree, index_tree = get_staged_tree_oids()
+        self.assertIsNone(head_tree)
+
+        with open("app.py", "a") as f:
+            f.write("print('again')\n")
+        subprocess.run(["git", "add", "app.py"], check=True)
+        self.assertNotEqual(get_staged_tree_oids()[1], index_tree)
+
+    def test_same_staged_tree_hits_cache(self):
+        """Generating twice for the same staged tree calls the model once."""
+        diff = get_git_diff(staged=True)
+
+        self.assertEqual(generate_commit_message("test-model", diff), "feat: add app")
+        self.assertEqual(generate_commit_message("test-model", diff), "feat: add app")
+        self.assertEqual(self.completion.call_count, 1)
+
+        # Different notes or model are different keys
+        generate_commit_message("test-model", diff, custom_notes="mention tests")
+        generate_commit_message("other-model", diff)
+        self.assertEqual(self.completion.call_count, 3)
+
+    def test_regenerate_bypasses_cache(self):
+        """regenerate=True always asks the model and refreshes the entry."""
+        diff = get_git_diff(staged=True)
+        generate_commit_message("test-model", diff)
+
+        self.completion.return_value = "<COMMIT_MESSAGE>feat: add hello app</COMMIT_MESSAGE>"
+        self.assertEqual(generate_commit_message("test-model", diff, regenerate=True), "feat: add hello app")
+        self.assertEqual(generate_commit_message("test-model", diff), "feat: add hello app")
+        self.assertEqual(self.completion.call_count, 2)
+
+    def test_prepared_prompt_is_reused(self):
+        """Retrying the same diff and notes reuses the prepared request instead of rebuilding it."""
+        diff = get_git_diff(staged=True)
+        prepared = prepare_commit_prompt("test-model", diff, "notes")
+        self.assertIs(prepare_commit_prompt("test-model", diff, "notes"), prepared)
+        self.assertIsNot(prepare_commit_prompt("test-model", diff), prepared)
+        self.assertEqual(prepared.additions, 1)
+        self.assertIn("notes", prepared.messages[-1]["content"])
+
+        with patch("GitSmart.ai_utils.count_diff_prompt_tokens") as count:
+            generate_commit_message("test-model", diff, custom_notes="notes", regenerate=True)
+            generate_commit_message("test-model", diff, custom_notes="notes", regenerate=True)
+        count.assert_not_called()
+        first, second = self.completion.call_args_list
+        self.assertEqual(first.kwargs["messages"], second.kwargs["messages"])
+
+    def test_async_generation_shares_the_cache(self):
+        """The asyncio path (MCP server) retries malformed replies and fills the same cache."""
+        diff = get_git_diff(staged=True)
+        replies = ["no tags", "<COMMIT_MESSAGE>feat: add app async</COMMIT_MESSAGE>"]
+        with patch("GitSmart.ai_utils.get_chat_completion_async", AsyncMock(side_effect=replies)) as completion:
+            message = asyncio.run(generate_commit_message_async("test-model", diff, deadline=30))
+            self.assertEqual(message, "feat: add app async")
+            self.assertEqual(asyncio.run(generate_commit_message_async("test-model", diff)), message)
+        self.assertEqual(completion.call_count, 2)
+        self.assertIsNotNone(completion.call_args.kwargs["deadline"])
+        self.assertEqual(generate_commit_message("test-model", diff), message)
+        self.completion.assert_not_called()
+
+    def test_in_flight_prepare_is_shared(self):
+        """A second caller waits for the preparation already running instead of repeating it."""
+        diff = get_git_diff(staged=True)
+        calls = []
+
+        def slow_count(text):
+            calls.append(text)
+            time.sleep(0.3)
+            return 10
+
+        results = []
+        with patch("GitSmart.ai_utils.count_diff_prompt_tokens", side_effect=slow_count):
+            background = threading.Thread(
+                target=lambda: results.append(prepare_commit_prompt("test-model", diff, "shared", quiet=True))
+            )
+            background.start()
+            time.sleep(0.05)
+            results.append(prepare_commit_prompt("test-model", diff, "shared"))
+            background.join()
+        self.assertEqual(len(calls), 1)
+        self.assertIs(results[0], results[1])
+
+    def test_speculative_result_is_used_without_notes(self):
+        """A background generation for the same diff is reused when no notes are added."""
+        diff = get_git_diff(staged=True)
+        speculative = start_speculative_commit("test-model", diff)
+        speculative.result(timeout=5)
+
+        self.assertEqual(generate_commit_message("test-model", diff, speculative=speculative), "feat: add app")
+        self.assertEqual(self.completion.call_count, 1)
+        # The message is cached, so there is nothing left to speculate on
+        self.assertIsNone(start_speculative_commit("test-model", diff))
+
+    def test_speculative_is_cancelled_by_notes(self):
+        """Adding notes cancels the background request and asks again with the notes."""
+        diff = get_git_diff(staged=True)
+        speculative = start_speculative_commit("test-model", diff)
+
+        generate_commit_message("test-model", diff, custom_notes="mention greeting", speculative=speculative)
+        self.assertTrue(speculative.cancelled)
+        self.assertIn("mention greeting", self.completion.call_args.kwargs["messages"][-1]["content"])
+
+    def test_speculative_is_cancelled_on_cache_hit(self):
+        """A cached message still cancels the background request that was passed in."""
+        diff = get_git_diff(staged=True)
+        generate_commit_message("test-model", diff)
+
+        speculative = SpeculativeCommit("test-model", diff)
+        self.assertEqual(generate_commit_message("test-model", diff, speculative=speculative), "feat: add app")
+        self.assertTrue(speculative.cancelled)
+
+    def test_candidates_are_requested_together_and_ranked(self):
+        """N candidates are requested at once; the ranked best is first and cached."""
+        self.completion.side_effect = [
+            "<COMMIT_MESSAGE>added stuff</COMMIT_MESSAGE>",
+            "no tags at all",
+            "<COMMIT_MESSAGE>feat(app.py): print a greeting</COMMIT_MESSAGE>",
+        ]
+        diff = get_git_diff(staged=True)
+
+        candidates = generate_commit_candidates("test-model", diff, count=3)
+        self.assertEqual(self.completion.call_count, 3)
+        self.assertEqual(candidates, ["feat(app.py): print a greeting", "added stuff"])
+        self.assertEqual(generate_commit_candidates("test-model", diff, count=3), [candidates[0]])
+
+    def test_candidates_stream_within_pool_size(self):
+        """Candidates are yielded as they complete, with no more requests than the pool holds."""
+        running, peak, lock = [0], [0], threading.Lock()
+        delays = iter([0.0, 0.3, 0.31, 0.32])
+
+        def completion(**kwargs):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+                delay = next(delays)
+            time.sleep(delay)
+            with lock:
+                running[0] -= 1
+            return f"<COMMIT_MESSAGE>feat: add app {delay:g}</COMMIT_MESSAGE>"
+
+        self.completion.side_effect = completion
+        diff = get_git_diff(staged=True)
+        prepared = prepare_commit_prompt("test-model", diff)
+        started = time.monotonic()
+        with patch("GitSmart.ai_utils.HTTP_POOL_SIZE", 2):
+            stream = iter_commit_candidates("test-model", diff, prepared, count=4)
+            first = next(stream)
+            self.assertLess(time.monotonic() - started, 0.25)
+            self.assertEqual(first, ["feat: add app 0"])
+            snapshots = [first] + list(stream)
+        self.assertEqual([len(ranked) for ranked in snapshots], [1, 2, 3, 4])
+        self.assertLessEqual(peak[0], 2)
+
+
+
+class TestCommitBlockDetector(unittest.TestCase):
+    """Test early detection of a complete commit block in a stream."""
+
+    def feed_all(self, chunks):
+        detector = CommitBlockDetector()
+        for index, chunk in enumerate(chunks):
+            if detector.feed(chunk):
+                return index
+        return None
+
+    def test_tag_split_across_chunks(self):
+        """Tags split over several deltas are recognised, case-insensitively."""
+        chunks = ["Here you go: <COMMIT_", "MESSAGE>feat: add x", "</COMMIT_MES", "SAGE>", " trailing explanation"]
+        self.assertEqual(self.feed_all(chunks), 3)
+        self.assertEqual(self.feed_all(["<commit_message>fix</commit_message>"]), 0)
+
+    def test_codeblock(self):
+        """A closed ```commit block completes the stream."""
+        chunks = ["```com", "mit\nfeat: add x\n", "``", "`\nmore text"]
+        self.assertEqual(self.feed_all(chunks), 3)
+
+    def test_think_section_is_ignored(self):
+        """Tags inside a leading <think> section do not end the stream."""
+        chunks = [
+            "<th", "ink>I should use <COMMIT_MESSAGE>x</COMMIT_MESSAGE> tags",
+            "</think>", "<COMMIT_MESSAGE>feat: real", "</COMMIT_MESSAGE>"
+        ]
+        self.assertEqual(self.feed_all(chunks), 4)
+
+    def test_incomplete_block(self):
+        """An unclosed block never reports completion."""
+        self.assertIsNone(self.feed_all(["<COMMIT_MESSAGE>feat: add x", " still going"]))
+
+
+class TestSummarizeCommits(unittest.TestCase):
+    """Test chunked summarization of commit histories."""
+
+    def setUp(self):
+        self.requests = []
+
+        def fake_completion(model, messages, **kwargs):
+            self.requests.append(messages)
+            return f"- notes {len(self.requests)}"
+
+        patcher = patch("GitSmart.ai_utils.get_chat_completion", side_effect=fake_completion)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.commits = [f"abc{i:04d} feat: change {i}\n" + "Details of the change. " * 40 for i in range(12)]
+
+    def test_short_history_is_one_request(self):
+        """Commits that fit together are summarized in a single request."""
+        self.assertEqual(summarize_commits(self.commits[:2]), "- notes 1")
+        self.assertEqual(len(self.requests), 1)
+
+    def test_long_history_is_condensed_in_groups(self):
+        """Groups are condensed separately, then merged by one final request."""
+        with patch("GitSmart.ai_utils.MAP_REDUCE_CHUNK_TOKENS", 600):
+            summary = summarize_commits(self.commits)
+
+        group_requests = self.requests[:-1]
+        self.assertGreater(len(group_requests), 1)
+        condensed = "".join(messages[-1]["content"] for messages in group_requests)
+        self.assertTrue(all(commit in condensed for commit in self.commits))
+        # The final request sees only the condensed notes
+        final = self.requests[-1][-1]["content"]
+        self.assertNotIn("abc0000", final)
+        self.assertIn("- notes", final)
+        self.assertEqual(summary, f"- notes {len(self.requests)}")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the paginated diff viewer in GitSmart.cli_flow.
+"""
+
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+from rich.console import Console
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.cli_flow import iter_diff_pages, collapse_reason, display_file_diffs, display_diff_panel
+from GitSmart.diff_model import parse_diff_text
+
+
+def file_diff(path: str, lines: int) -> str:
+    body = "".join(f"+line {i}\n" for i in range(lines))
+    return f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n@@ -0,0 +1,{lines} @@\n{body}"
+
+
+BINARY = "diff --git a/logo.png b/logo.png\nBinary files a/logo.png and b/logo.png differ\n"
+
+
+class TestDiffViewer(unittest.TestCase):
+    """Test paging, collapsing and highlight cut-off."""
+
+    def test_pages_respect_file_and_line_limits(self):
+        parsed = parse_diff_text("".join(file_diff(f"src/f{i}.py", 10) for i in range(7)) + file_diff("big.py", 500))
+        pages = [[fd.path for fd in page] for page in iter_diff_pages(parsed, page_files=3, page_lines=100)]
+        self.assertEqual(pages[0], ["src/f0.py", "src/f1.py", "src/f2.py"])
+        # An oversized file gets a page of its own
+        self.assertEqual(pages[-1], ["big.py"])
+        self.assertEqual(sum(len(page) for page in pages), 8)
+
+    def test_binary_and_generated_files_collapse(self):
+        parsed = parse_diff_text(BINARY + file_diff("package-lock.json", 3) + file_diff("app.py", 3))
+        self.assertEqual([collapse_reason(fd) for fd in parsed], ["binary", "generated", None])
+
+    def test_large_file_skips_highlighting(self):
+        from rich.syntax import Syntax
+        from rich.text import Text
+
+        lines = [f"+line {i}" for i in range(20)]
+        with patch("GitSmart.cli_flow.DIFF_HIGHLIGHT_MAX_LINES", 10):
+            panel = display_diff_panel("app.py", lines, [])
+        body = panel.renderable.renderable.renderable.renderable
+        self.assertIsInstance(body, Text)
+        self.assertIsInstance(display_diff_panel("app.py", lines[:5], []).renderable.renderable.renderable.renderable, Syntax)
+
+    def test_pages_are_prompted_in_a_terminal(self):
+        """After the first page the user can skip the rest; nothing further is rendered."""
+        diff = "".join(file_diff(f"f{i}.py", 5) for i in range(5))
+        output = Console(record=True, force_terminal=True, width=120)
+        with patch("GitSmart.cli_flow.console", output), \
+                patch("GitSmart.cli_flow.DIFF_PAGE_FILES", 2), \
+                patch("GitSmart.cli_flow.questionary.select") as select:
+            select.return_value.unsafe_ask.return_value = "Skip the rest"
+            display_file_diffs(diff, [], subtitle="Changes")
+
+        text = output.export_text()
+        self.assertIn("f1.py", text)
+        self.assertNotIn("f2.py", text)
+        self.assertIn("3 file(s) not shown", text)
+        select.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the local commit message ranker.
+"""
+
+import unittest
+import time
+import os
+import sys
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.commit_ranker import score_commit_message, rank_commit_messages
+
+
+class TestCommitRanker(unittest.TestCase):
+    """Test scoring and ordering of candidate commit messages."""
+
+    def test_conventional_header_wins(self):
+        """A conventional header outranks free-form text."""
+        good = "feat(parser): add streaming diff parser\n\nParse hunks once in parser.py."
+        bad = "I changed some things in the parser"
+        self.assertGreater(score_commit_message(good, ["src/parser.py"]), score_commit_message(bad, ["src/parser.py"]))
+
+    def test_emoji_and_dual_types_are_conventional(self):
+        plain = score_commit_message("feat: add x")
+        self.assertEqual(score_commit_message("✨ feat(app.py): add x"), plain)
+        self.assertEqual(score_commit_message("🐛 fix, refactor(db): handle nulls"), plain)
+
+    def test_long_lines_and_missing_files_cost_points(self):
+        short = "fix(cache): evict by size\n\nKeep cache.py under its cap."
+        long = "fix: " + "evict entries by size " * 6 + "\n" + "x" * 120
+        self.assertGreater(score_commit_message(short, ["cache.py"]), score_commit_message(long, ["cache.py"]))
+
+    def test_symbol_runs_do_not_backtrack(self):
+        """Headers made of long runs of symbols are scored in linear time."""
+        start = time.monotonic()
+        ranked = rank_commit_messages(["-" * 40, "-" * 40 + " x", "feat: add x"])
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(ranked[0], "feat: add x")
+
+    def test_rank_orders_and_deduplicates(self):
+        """Best first, duplicates and empty responses dropped, ties keep arrival order."""
+        candidates = [
+            "updated stuff",
+            None,
+            "refactor(ui): split diff viewer\n\nMove paging into ui.py.",
+            "refactor(ui): split diff viewer\n\nMove paging into ui.py.",
+            "refactor: split viewer",
+        ]
+        ranked = rank_commit_messages(candidates, ["GitSmart/ui.py"])
+        self.assertEqual(ranked[0], candidates[2])
+        self.assertEqual(len(ranked), 3)
+        self.assertEqual(ranked[-1], "updated stuff")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Unit tests for packing diffs into a token budget (GitSmart.diff_budget).
+"""
+
+import time
+import unittest
+import os
+import sys
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.diff_budget import pack_diff, file_weight
+from GitSmart.diff_model import parse_diff_text
+from GitSmart.tokens import count_tokens
+
+
+def file_diff(path: str, hunks: int, lines_per_hunk: int) -> str:
+    parts = [f"diff --git a/{path} b/{path}\n", f"--- a/{path}\n+++ b/{path}\n"]
+    for h in range(hunks):
+        start = h * (lines_per_hunk + 10) + 1
+        parts.append(f"@@ -{start},1 +{start},{lines_per_hunk + 1} @@ def block_{h}():\n")
+        parts.append(" context\n")
+        for i in range(lines_per_hunk):
+            parts.append(f"+    value_{h}_{i} = compute({i})  # {path}\n")
+    return "".join(parts)
+
+
+RENAME = (
+    "diff --git a/old_name.py b/new_name.py\n"
+    "similarity index 100%\n"
+    "rename from old_name.py\n"
+    "rename to new_name.py\n"
+)
+
+
+class TestPackDiff(unittest.TestCase):
+    """Test the per-file, per-hunk budget allocator."""
+
+    def assert_all_files_represented(self, diff, packed):
+        shown = {fd.path for fd in parse_diff_text(packed)}
+        for fd in parse_diff_text(diff):
+            self.assertTrue(fd.path in shown or fd.path in packed, fd.path)
+
+    def test_small_budget_fits_and_keeps_every_file(self):
+        """The result fits the limit and every file is shown or summarized."""
+        diff = "".join(file_diff(f"src/mod_{i}.py", 4, 30) for i in range(6)) + RENAME
+        packed = pack_diff(diff, 800)
+
+        self.assertLessEqual(count_tokens(packed), 800)
+        self.assert_all_files_represented(diff, packed)
+        self.assertIn("- renamed: old_name.py → new_name.py", packed)
+
+    def test_lockfile_summarized_before_source(self):
+        """Low-value files give up their space to source files first."""
+        diff = file_diff("package-lock.json", 1, 40) + file_diff("src/app.py", 1, 40)
+        budget = count_tokens(file_diff("src/app.py", 1, 40)) + 60
+        packed = pack_diff(diff, budget)
+
+        self.assertEqual([fd.path for fd in parse_diff_text(packed)], ["src/app.py"])
+        self.assertIn("- package-lock.json (+40, -0)", packed)
+        self.assertLess(file_weight("yarn.lock"), file_weight("src/app.py"))
+        self.assertLess(file_weight("dist/bundle.min.js"), file_weight("README.md"))
+
+    def test_dense_hunks_kept_and_rest_noted(self):
+        """Whole hunks are kept while they fit; the rest are counted, not dropped silently."""
+        diff = file_diff("src/app.py", 5, 20)
+        packed = pack_diff(diff, count_tokens(diff) // 2)
+
+        parsed = parse_diff_text(packed)
+        self.assertEqual(len(parsed.files), 1)
+        self.assertLess(len(parsed.files[0].hunks), 5)
+        self.assertRegex(packed, r"\.\.\. \d more hunk\(s\) omitted \(\+\d+, -0\)")
+
+    def test_oversized_hunk_is_cut_and_still_parses(self):
+        """A single huge hunk keeps its leading lines with consistent @@ ranges."""
+        diff = file_diff("src/big.py", 1, 2000) + file_diff("src/small.py", 1, 5)
+        packed = pack_diff(diff, 1500)
+
+        self.assertLessEqual(count_tokens(packed), 1500)
+        self.assertIn("... (hunk truncated)", packed)
+        # The cut hunk doesn't swallow the next file
+        self.assertEqual([fd.path for fd in parse_diff_text(packed)], ["src/big.py", "src/small.py"])
+
+    def test_large_diff_is_fast(self):
+        """A 50k-line diff packs well within interactive time."""
+        diff = "".join(file_diff(f"src/mod_{i}.py", 10, 50) for i in range(100))
+        self.assertGreaterEqual(diff.count("\n"), 50000)
+
+        started = time.monotonic()
+        packed = pack_diff(diff, 8000)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertLessEqual(count_tokens(packed), 8000)
+        self.assert_all_files_represented(diff, packed)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
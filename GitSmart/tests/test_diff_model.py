@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming diff model in GitSmart.diff_model.
+"""
+
+import io
+import unittest
+import os
+import sys
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.diff_model import parse_diff_text, read_diff_stream
+from GitSmart.ai_utils import format_diff_with_codeblocks
+
+SAMPLE_DIFF = (
+    "diff --git a/notes.md b/notes.md\n"
+    "index 1111111..2222222 100644\n"
+    "--- a/notes.md\n"
+    "+++ b/notes.md\n"
+    "@@ -1,3 +1,3 @@\n"
+    " # Notes\n"
+    "--- old rule\n"
+    "+++ new rule\n"
+    " end\n"
+    "diff --git a/old name.py b/new name.py\n"
+    "similarity index 90%\n"
+    "rename from old name.py\n"
+    "rename to new name.py\n"
+    "--- a/old name.py\n"
+    "+++ b/new name.py\n"
+    "@@ -1 +1,2 @@\n"
+    " x = 1\n"
+    "+y = 2\n"
+    "\\ No newline at end of file\n"
+    "diff --git a/logo.png b/logo.png\n"
+    "index 3333333..4444444 100644\n"
+    "Binary files a/logo.png and b/logo.png differ\n"
+)
+
+
+class TestDiffModel(unittest.TestCase):
+    """Test file/hunk records, counting and the shared buffer."""
+
+    def test_files_hunks_and_counts(self):
+        """Content lines that look like headers are counted inside hunks."""
+        parsed = parse_diff_text(SAMPLE_DIFF)
+
+        self.assertEqual([fd.path for fd in parsed], ["notes.md", "new name.py", "logo.png"])
+        notes, renamed, logo = parsed.files
+        self.assertEqual((notes.additions, notes.deletions), (1, 1))
+        self.assertEqual(len(notes.hunks), 1)
+        self.assertTrue(renamed.is_rename)
+        self.assertEqual(renamed.old_path, "old name.py")
+        self.assertEqual((renamed.additions, renamed.deletions), (1, 0))
+        self.assertTrue(logo.binary)
+        self.assertEqual((logo.additions, logo.deletions), (0, 0))
+
+    def test_offsets_slice_the_shared_buffer(self):
+        """File records are offsets into the original text, covering it exactly."""
+        parsed = parse_diff_text(SAMPLE_DIFF)
+
+        self.assertIs(parsed.buffer, SAMPLE_DIFF)
+        self.assertEqual("".join(parsed.text(fd) for fd in parsed), SAMPLE_DIFF)
+        self.assertTrue(parsed.lines(parsed.files[2])[0].startswith("diff --git a/logo.png"))
+
+    def test_stream_matches_text_parse(self):
+        """Parsing from a byte stream yields the same records as parsing the text."""
+        streamed = read_diff_stream(io.BytesIO(SAMPLE_DIFF.encode("utf-8")))
+
+        self.assertEqual(streamed.buffer, SAMPLE_DIFF)
+        self.assertEqual(streamed.summary(), parse_diff_text(SAMPLE_DIFF).summary())
+
+    def test_format_diff_with_codeblocks(self):
+        """Each file gets a header with its counts and its own escaped code block."""
+        diff = (
+            "diff --git a/README.md b/README.md\n"
+            "--- a/README.md\n"
+            "+++ b/README.md\n"
+            "@@ -1 +1,2 @@\n"
+            " title\n"
+            "+```python\n"
+        )
+        formatted = format_diff_with_codeblocks(diff + diff.replace("README", "GUIDE"))
+
+        self.assertIn("### File: README.md (+1, -0)\n```diff-file-1\ndiff --git", formatted)
+        self.assertIn("\n---\n\n### File: GUIDE.md (+1, -0)\n```diff-file-2", formatted)
+        self.assertIn("+\\`\\`\\`python", formatted)
+        self.assertTrue(formatted.endswith("```"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
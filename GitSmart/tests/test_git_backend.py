@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pooled git backend in GitSmart.git_backend.
+"""
+
+import unittest
+import subprocess
+import tempfile
+import shutil
+import os
+import sys
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.git_backend import get_git_backend, rev_parse_paths, close_all_backends
+from GitSmart.git_utils import get_current_branch, get_all_branches
+
+
+class TestGitBackend(unittest.TestCase):
+    """Test the cat-file coprocesses and stat-keyed command cache."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.original_dir = os.getcwd()
+        self.test_dir = os.path.realpath(tempfile.mkdtemp(prefix="gitsmart_test_"))
+        os.chdir(self.test_dir)
+
+        subprocess.run(["git", "init", "-b", "main"], check=True, capture_output=True)
+        subprocess.run(["git", "config", "user.name", "Test User"], check=True)
+        subprocess.run(["git", "config", "user.email", "test@example.com"], check=True)
+
+        with open("tracked.txt", "w") as f:
+            f.write("one\n")
+        subprocess.run(["git", "add", "tracked.txt"], check=True)
+        subprocess.run(["git", "commit", "-m", "Initial commit"], check=True, capture_output=True)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        close_all_backends()
+        os.chdir(self.original_dir)
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _git(self, *args):
+        return subprocess.run(["git", *args], stdout=subprocess.PIPE, check=True, text=True).stdout.strip()
+
+    def test_rev_parse_paths(self):
+        """Toplevel and git dir are resolved to absolute paths."""
+        toplevel, git_dir, common_dir = rev_parse_paths()
+        self.assertEqual(toplevel, self.test_dir)
+        self.assertEqual(git_dir, os.path.join(self.test_dir, ".git"))
+        self.assertEqual(common_dir, git_dir)
+
+    def test_resolve(self):
+        """Specs resolve to the same OIDs git reports."""
+        backend = get_git_backend()
+        resolved = backend.resolve(["HEAD", "HEAD:tracked.txt", ":missing.txt"])
+
+        self.assertEqual(resolved["HEAD"], self._git("rev-parse", "HEAD"))
+        self.assertEqual(resolved["HEAD:tracked.txt"], self._git("rev-parse", "HEAD:tracked.txt"))
+        self.assertIsNone(resolved[":missing.txt"])
+
+    def test_index_change_restarts_coprocess(self):
+        """Index lookups reflect a `git add` made after the coprocess started."""
+        backend = get_git_backend()
+        before = backend.resolve([":tracked.txt"])[":tracked.txt"]
+
+        with open("tracked.txt", "a") as f:
+            f.write("two\n")
+        subprocess.run(["git", "add", "tracked.txt"], check=True)
+
+        after = backend.resolve([":tracked.txt"])[":tracked.txt"]
+        self.assertNotEqual(before, after)
+        self.assertEqual(after, self._git("rev-parse", ":tracked.txt"))
+
+    def test_cached_branch_lookups_follow_checkout(self):
+        """Cached branch answers are invalidated when HEAD or refs change."""
+        self.assertEqual(get_current_branch(), "main")
+        self.assertEqual(get_all_branches()["local"], ["main"])
+
+        subprocess.run(["git", "checkout", "-b", "feature"], check=True, capture_output=True)
+
+        self.assertEqual(get_current_branch(), "feature")
+        self.assertEqual(sorted(get_all_branches()["local"]), ["feature", "main"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
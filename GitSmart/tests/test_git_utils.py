@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the status engine and diff helpers in GitSmart.git_utils.
+"""
+
+import unittest
+import subprocess
+import tempfile
+import shutil
+import os
+import sys
+from unittest.mock import patch
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.git_utils import (
+    parse_porcelain_v2,
+    parse_numstat,
+    get_change_summary,
+    get_repo_fingerprint,
+    get_git_diff,
+    get_file_diff,
+    parse_diff
+)
+from GitSmart.diff_cache import DiffCache, diff_cache
+from GitSmart.git_backend import close_all_backends
+
+
+class TestStatusParsing(unittest.TestCase):
+    """Test parsing of porcelain v2 and numstat machine output."""
+
+    def test_parse_porcelain_v2_ordinary_and_rename(self):
+        """Ordinary, renamed and unmerged records are parsed; untracked skipped."""
+        head = "a" * 40
+        index = "b" * 40
+        output = (
+            f"1 M. N... 100644 100644 100644 {head} {index} src/app.py\0"
+            f"2 R. N... 100644 100644 100644 {head} {index} R100 new name.py\0old name.py\0"
+            f"u UU N... 100644 100644 100644 100644 {head} {index} {head} conflict.txt\0"
+            "? untracked.txt\0"
+        )
+
+        entries = parse_porcelain_v2(output)
+
+        self.assertEqual([e["file"] for e in entries], ["src/app.py", "new name.py", "conflict.txt"])
+        self.assertEqual(entries[0]["x"], "M")
+        self.assertEqual(entries[0]["y"], ".")
+        self.assertEqual(entries[0]["head_oid"], head)
+        self.assertEqual(entries[0]["index_oid"], index)
+        self.assertEqual(entries[1]["old_file"], "old name.py")
+        self.assertEqual(entries[2]["y"], "U")
+        self.assertEqual([e["unmerged"] for e in entries], [False, False, True])
+
+    def test_parse_numstat_binary_and_rename(self):
+        """Binary markers count as zero and renames keep both paths."""
+        output = "3\t1\tREADME.md\0-\t-\tlogo.png\0" "2\t0\t\0old.py\0new.py\0"
+
+        changes = parse_numstat(output)
+
+        self.assertEqual(changes[0], {
+            "file": "README.md", "old_file": None,
+            "additions": 3, "deletions": 1, "binary": False
+        })
+        self.assertTrue(changes[1]["binary"])
+        self.assertEqual(changes[1]["additions"], 0)
+        self.assertEqual(changes[2]["file"], "new.py")
+        self.assertEqual(changes[2]["old_file"], "old.py")
+
+
+class TestChangeSummary(unittest.TestCase):
+    """Test the single-pass status summary against a real repository."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.original_dir = os.getcwd()
+        self.test_dir = tempfile.mkdtemp(prefix="gitsmart_test_")
+        os.chdir(self.test_dir)
+
+        subprocess.run(["git", "init"], check=True, capture_output=True)
+        subprocess.run(["git", "config", "user.name", "Test User"], check=True)
+        subprocess.run(["git", "config", "user.email", "test@example.com"], check=True)
+
+        with open("tracked.txt", "w") as f:
+            f.write("one\ntwo\nthree\n")
+        subprocess.run(["git", "add", "tracked.txt"], check=True)
+        subprocess.run(["git", "commit", "-m", "Initial commit"], check=True, capture_output=True)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        os.chdir(self.original_dir)
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_clean_tree(self):
+        """A clean tree reports no staged or unstaged changes."""
+        self.assertEqual(get_change_summary(), ([], []))
+
+    def test_staged_and_unstaged_counts(self):
+        """Counts match git's own numbers for each side of the index."""
+        with open("tracked.txt", "w") as f:
+            f.write("one\n2\nthree\nfour\n")
+        subprocess.run(["git", "add", "tracked.txt"], check=True)
+        with open("tracked.txt", "a") as f:
+            f.write("five\n")
+        with open("untracked.txt", "w") as f:
+            f.write("ignored by the summary\n")
+
+        staged, unstaged = get_change_summary()
+
+        self.assertEqual(len(staged), 1)
+        self.assertEqual(staged[0]["file"], "tracked.txt")
+        self.assertEqual((staged[0]["additions"], staged[0]["deletions"]), (2, 1))
+        self.assertEqual(len(unstaged), 1)
+        self.assertEqual((unstaged[0]["additions"], unstaged[0]["deletions"]), (1, 0))
+
+    def test_counts_match_numstat(self):
+        """Lines starting with ++/-- and binary files are counted like git does."""
+        with open("tracked.txt", "w") as f:
+            f.write("one\n--i;\nthree\n++x\n- item\n")
+        with open("logo.bin", "wb") as f:
+            f.write(b"\x00\x01\x02")
+        subprocess.run(["git", "add", "tracked.txt", "logo.bin"], check=True)
+
+        numstat = subprocess.run(
+            ["git", "diff", "--staged", "--numstat", "--", "tracked.txt"],
+            stdout=subprocess.PIPE, check=True, text=True
+        ).stdout.split("\t")
+        expected = (int(numstat[0]), int(numstat[1]))
+
+        staged, _ = get_change_summary()
+        by_file = {ch["file"]: ch for ch in staged}
+        self.assertEqual((by_file["tracked.txt"]["additions"], by_file["tracked.txt"]["deletions"]), expected)
+        self.assertTrue(by_file["logo.bin"]["binary"])
+        self.assertFalse(by_file["tracked.txt"]["binary"])
+
+        parsed = {ch["file"]: ch for ch in parse_diff(get_git_diff(staged=True))}
+        self.assertEqual((parsed["tracked.txt"]["additions"], parsed["tracked.txt"]["deletions"]), expected)
+        self.assertEqual((parsed["logo.bin"]["additions"], parsed["logo.bin"]["deletions"]), (0, 0))
+
+    def test_staged_rename(self):
+        """Renames are reported once, under the new path, with the old path kept."""
+        subprocess.run(["git", "mv", "tracked.txt", "moved.txt"], check=True)
+
+        staged, _ = get_change_summary()
+
+        self.assertEqual(len(staged), 1)
+        self.assertEqual(staged[0]["file"], "moved.txt")
+        self.assertEqual(staged[0]["old_file"], "tracked.txt")
+        self.assertEqual((staged[0]["additions"], staged[0]["deletions"]), (0, 0))
+
+    def test_merge_conflict_is_not_staged(self):
+        """Unmerged paths are reported as unstaged only, so nothing is committable."""
+        subprocess.run(["git", "checkout", "-q", "-b", "other"], check=True)
+        with open("tracked.txt", "w") as f:
+            f.write("one\nother\nthree\n")
+        subprocess.run(["git", "commit", "-qam", "Other"], check=True)
+        subprocess.run(["git", "checkout", "-q", "-"], check=True)
+        with open("tracked.txt", "w") as f:
+            f.write("one\nmine\nthree\n")
+        subprocess.run(["git", "commit", "-qam", "Mine"], check=True)
+        subprocess.run(["git", "merge", "other"], capture_output=True)
+
+        staged, unstaged = get_change_summary()
+
+        self.assertEqual(staged, [])
+        self.assertEqual([(ch["file"], ch["status"]) for ch in unstaged], [("tracked.txt", "U")])
+
+    def test_repo_fingerprint(self):
+        """The fingerprint only moves when the index, HEAD or a dirty path changes."""
+        git_dir = os.path.join(self.test_dir, ".git")
+        with open("tracked.txt", "a") as f:
+            f.write("four\n")
+
+        before = get_repo_fingerprint(self.test_dir, git_dir, ["tracked.txt"])
+        self.assertEqual(before, get_repo_fingerprint(self.test_dir, git_dir, ["tracked.txt"]))
+
+        # Set the mtime explicitly; back-to-back writes can share a timestamp
+        os.utime("tracked.txt", ns=(0, 0))
+        moved = get_repo_fingerprint(self.test_dir, git_dir, ["tracked.txt"])
+        self.assertNotEqual(before, moved)
+
+        subprocess.run(["git", "add", "tracked.txt"], check=True)
+        self.assertNotEqual(moved, get_repo_fingerprint(self.test_dir, git_dir, ["tracked.txt"]))
+
+
+class TestDiffCache(unittest.TestCase):
+    """Test the OID-keyed per-file diff cache."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.original_dir = os.getcwd()
+        self.test_dir = tempfile.mkdtemp(prefix="gitsmart_test_")
+        os.chdir(self.test_dir)
+        diff_cache.clear()
+
+        subprocess.run(["git", "init"], check=True, capture_output=True)
+        subprocess.run(["git", "config", "user.name", "Test User"], check=True)
+        subprocess.run(["git", "config", "user.email", "test@example.com"], check=True)
+
+        with open("tracked.txt", "w") as f:
+            f.write("one\ntwo\n")
+        subprocess.run(["git", "add", "tracked.txt"], check=True)
+        subprocess.run(["git", "commit", "-m", "Initial commit"], check=True, capture_output=True)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        close_all_backends()
+        diff_cache.clear()
+        os.chdir(self.original_dir)
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _settle(self):
+        """Backdate the index and worktree so the racy-write guard does not skip caching."""
+        for path in (os.path.join(".git", "index"), "tracked.txt"):
+            os.utime(path, ns=(0, 0))
+
+    def test_lru_eviction_under_cap(self):
+        """Least recently used diffs are evicted once the cap is exceeded."""
+        cache = DiffCache(max_bytes=10)
+        cache.put(("a", "1", "2", True), "aaaa")
+        cache.put(("b", "1", "2", True), "bbbb")
+        cache.get(("a", "1", "2", True))
+        cache.put(("c", "1", "2", True), "cccc")
+
+        self.assertIsNone(cache.get(("b", "1", "2", True)))
+        self.assertEqual(cache.get(("a", "1", "2", True)), "aaaa")
+        self.assertEqual(cache.stats()["size"], 8)
+
+        cache.put(("huge", "1", "2", True), "x" * 11)
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_full_diff_primes_file_diffs(self):
+        """A full staged diff is reused by per-file lookups without running git diff."""
+        with open("tracked.txt", "a") as f:
+            f.write("three\n")
+        subprocess.run(["git", "add", "tracked.txt"], check=True)
+        self._settle()
+
+        get_git_diff(staged=True)
+        with patch("GitSmart.git_utils.subprocess.run", side_effect=AssertionError("diff re-run")):
+            file_diff = get_file_diff("tracked.txt", staged=True)
+
+        self.assertIn("+three", file_diff)
+
+    def test_unstaged_key_follows_worktree(self):
+        """Editing the worktree file changes the key, so the old diff is not served."""
+        with open("tracked.txt", "a") as f:
+            f.write("three\n")
+        self._settle()
+        self.assertIn("+three", get_file_diff("tracked.txt", staged=False))
+
+        with open("tracked.txt", "a") as f:
+            f.write("four\n")
+        self.assertIn("+four", get_file_diff("tracked.txt", staged=False))
+        self.assertEqual(diff_cache.stats()["hits"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
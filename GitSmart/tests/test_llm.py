@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pooled HTTP session used by GitSmart.llm.
+"""
+
+import json
+import time
+import asyncio
+import unittest
+import threading
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.llm import (
+    get_chat_completion,
+    get_chat_completion_async,
+    CancelToken,
+    CompletionCancelled,
+    get_http_session,
+    close_http_sessions
+)
+
+
+class _StreamingHandler(BaseHTTPRequestHandler):
+    """Answer chat completion requests with a short server-sent event stream."""
+    protocol_version = "HTTP/1.1"
+    client_ports = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        _StreamingHandler.client_ports.append(self.client_address[1])
+        if self.path.endswith("/slow"):
+            # Trickle a stream that would take five seconds to finish
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Content-Length", "100000")
+            self.end_headers()
+            try:
+                for _ in range(50):
+                    self.wfile.write(b'data: {"choices": [{"delta": {"content": "feat"}}]}\n\n')
+                    self.wfile.flush()
+                    time.sleep(0.1)
+            except OSError:
+                pass
+            return
+        if self.path.endswith("/pause"):
+            time.sleep(0.5)
+        events = [
+            {"choices": [{"delta": {"content": "feat: "}}]},
+            {"choices": [{"delta": {"content": "pooled"}}]},
+        ]
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        if self.path.endswith("/chunked"):
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(payload), 7):
+                part = payload[start:start + 7]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpSession(unittest.TestCase):
+    """Test session sharing and keep-alive connection reuse."""
+
+    def setUp(self):
+        """Start a local streaming endpoint."""
+        _StreamingHandler.client_ports = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StreamingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        patcher = patch("GitSmart.llm.API_URL", self._url("/v1/chat/completions"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Stop the endpoint and drop pooled connections."""
+        close_http_sessions()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _url(self, path):
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def _complete(self):
+        return get_chat_completion(
+            model="test-model",
+            messages=[{"role": "user", "content": "hi"}],
+            max_tokens=16,
+            temperature=0.0
+        )
+
+    def test_session_per_thread_shares_adapter(self):
+        """Each thread gets its own session, all mounted on one adapter."""
+        main_session = get_http_session()
+        self.assertIs(main_session, get_http_session())
+
+        other = {}
+        thread = threading.Thread(target=lambda: other.update(session=get_http_session()))
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(main_session, other["session"])
+        self.assertIs(main_session.get_adapter("https://"), other["session"].get_adapter("https://"))
+
+    def test_connection_is_reused(self):
+        """Consecutive completions stream correctly over the same keep-alive connection."""
+        self.assertEqual(self._complete(), "feat: pooled")
+        self.assertEqual(self._complete(), "feat: pooled")
+
+        self.assertEqual(len(_StreamingHandler.client_ports), 2)
+        self.assertEqual(len(set(_StreamingHandler.client_ports)), 1)
+
+
+    def test_requests_run_concurrently(self):
+        """Completions from several threads share the pool."""
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self._complete())) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["feat: pooled"] * 3)
+
+    def test_cancel_token_stops_stream(self):
+        """Cancelling from another thread ends a long stream promptly."""
+        token = CancelToken()
+        threading.Timer(0.3, token.cancel).start()
+
+        started = time.monotonic()
+        with patch("GitSmart.llm.API_URL", self._url("/v1/slow")):
+            with self.assertRaises(CompletionCancelled):
+                get_chat_completion(
+                    "test-model", [{"role": "user", "content": "hi"}], 16, 0.0, cancel_token=token
+                )
+        self.assertLess(time.monotonic() - started, 2)
+
+
+    def test_status_callback_receives_throttled_deltas(self):
+        """The callback gets deltas and a token count, never the whole text."""
+        calls = []
+        result = get_chat_completion(
+            model="test-model",
+            messages=[{"role": "user", "content": "hi"}],
+            max_tokens=16,
+            temperature=0.0,
+            status_callback=lambda delta, tokens: calls.append((delta, tokens)),
+            callback_interval=60
+        )
+
+        self.assertEqual(result, "feat: pooled")
+        # First delta flushes immediately, the rest is coalesced into the final flush
+        self.assertEqual(calls, [("feat: ", 1), ("pooled", 2)])
+
+
+    def test_stop_when_ends_stream_early(self):
+        """Returning True from stop_when returns what has arrived so far."""
+        result = get_chat_completion(
+            model="test-model",
+            messages=[{"role": "user", "content": "hi"}],
+            max_tokens=16,
+            temperature=0.0,
+            stop_when=lambda delta: delta == "feat: "
+        )
+        self.assertEqual(result, "feat: ")
+
+
+class TestAsyncCompletion(unittest.TestCase):
+    """Test the asyncio client: concurrency, cancellation and deadlines."""
+
+    def setUp(self):
+        """Start a local streaming endpoint."""
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StreamingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _run(self, path, coroutine_fn):
+        """Run coroutine_fn() with the endpoint pointed at `path`."""
+        url = f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+        with patch("GitSmart.llm.API_URL", url):
+            return asyncio.run(coroutine_fn())
+
+    def _complete(self, **kwargs):
+        return get_chat_completion_async("test-model", [{"role": "user", "content": "hi"}], 16, 0.0, **kwargs)
+
+    def test_requests_run_concurrently(self):
+        """Three half-second requests awaited together take about half a second."""
+        async def run():
+            return await asyncio.gather(*(self._complete() for _ in range(3)))
+
+        started = time.monotonic()
+        self.assertEqual(self._run("/v1/pause", run), ["feat: pooled"] * 3)
+        self.assertLess(time.monotonic() - started, 1.2)
+
+    def test_chunked_response(self):
+        self.assertEqual(self._run("/v1/chunked", self._complete), "feat: pooled")
+
+    def test_task_cancel_closes_request(self):
+        """Cancelling the task ends the stream at once and cancels the token."""
+        token = CancelToken()
+
+        async def run():
+            task = asyncio.ensure_future(self._complete(cancel_token=token))
+            await asyncio.sleep(0.3)
+            task.cancel()
+            await task
+
+        started = time.monotonic()
+        with self.assertRaises(asyncio.CancelledError):
+            self._run("/v1/slow", run)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertTrue(token.cancelled)
+
+    def test_deadline_and_token_cancel(self):
+        """An expired deadline or a token cancelled from another thread raise CompletionCancelled."""
+        started = time.monotonic()
+        with self.assertRaises(CompletionCancelled):
+            self._run("/v1/slow", lambda: self._complete(deadline=0.3))
+        self.assertLess(time.monotonic() - started, 1)
+
+        token = CancelToken()
+        threading.Timer(0.3, token.cancel).start()
+        started = time.monotonic()
+        with self.assertRaises(CompletionCancelled):
+            self._run("/v1/slow", lambda: self._complete(cancel_token=token))
+        self.assertLess(time.monotonic() - started, 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Unit tests for map-reduce commit generation (GitSmart.map_reduce).
+"""
+
+import unittest
+import subprocess
+import tempfile
+import threading
+import shutil
+import time
+import os
+import sys
+from unittest.mock import patch
+
+from diskcache import Cache
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.concurrency import map_bounded
+from GitSmart.map_reduce import split_diff, summarize_diff, format_summaries
+from GitSmart.ai_utils import generate_commit_message
+from GitSmart.git_utils import get_git_diff
+from GitSmart.git_backend import close_all_backends
+from GitSmart.llm import CancelToken, CompletionCancelled
+
+
+class TestMapBounded(unittest.TestCase):
+    """Test the bounded thread pool helper."""
+
+    def test_order_and_concurrency_limit(self):
+        """Results keep input order and no more than max_workers run at once."""
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def work(value):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return value * 2
+
+        progress = []
+        results = map_bounded(work, range(8), max_workers=3, on_done=lambda done, total: progress.append(done))
+        self.assertEqual(results, [value * 2 for value in range(8)])
+        self.assertLessEqual(peak[0], 3)
+        self.assertEqual(progress, list(range(1, 9)))
+
+    def test_error_is_raised(self):
+        def work(value):
+            if value == 2:
+                raise ValueError("boom")
+            return value
+
+        with self.assertRaises(ValueError):
+            map_bounded(work, range(5), max_workers=2)
+
+
+class TestMapReduce(unittest.TestCase):
+    """Test chunking, per-chunk caching and the reduce request."""
+
+    def setUp(self):
+        """Set up a repository with staged files in two directories."""
+        self.original_dir = os.getcwd()
+        self.test_dir = tempfile.mkdtemp(prefix="gitsmart_test_")
+        os.chdir(self.test_dir)
+
+        subprocess.run(["git", "init"], check=True, capture_output=True)
+        subprocess.run(["git", "config", "user.name", "Test User"], check=True)
+        subprocess.run(["git", "config", "user.email", "test@example.com"], check=True)
+        for directory in ("api", "ui"):
+            os.mkdir(directory)
+            for index in range(3):
+                with open(os.path.join(directory, f"mod_{index}.py"), "w") as f:
+                    f.writelines(f"value_{i} = {index} * {i}  # {directory}\n" for i in range(40))
+        subprocess.run(["git", "add", "."], check=True)
+
+        self.cache = Cache(os.path.join(self.test_dir, ".cache"))
+        for target in ("GitSmart.map_reduce.COMMIT_CACHE", "GitSmart.ai_utils.COMMIT_CACHE"):
+            patcher = patch(target, self.cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.requests = []
+
+        def fake_completion(model, messages, **kwargs):
+            self.requests.append(messages)
+            if "<COMMIT" in messages[-1]["content"] or "SUMMARIES" in messages[-1]["content"]:
+                return "<COMMIT_MESSAGE>feat: add api and ui modules</COMMIT_MESSAGE>"
+            return f"- summary {len(self.requests)}"
+
+        for target in ("GitSmart.map_reduce.get_chat_completion", "GitSmart.ai_utils.get_chat_completion"):
+            patcher = patch(target, side_effect=fake_completion)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        self.cache.close()
+        close_all_backends()
+        os.chdir(self.original_dir)
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_split_groups_by_directory(self):
+        """Files are grouped per directory and chunks respect the token limit."""
+        diff = get_git_diff(staged=True)
+        self.assertEqual([chunk.name for chunk in split_diff(diff, 100000)], ["api", "ui"])
+
+        small = split_diff(diff, 400)
+        self.assertGreater(len(small), 2)
+        self.assertEqual(sum(len(chunk.paths) for chunk in small), 6)
+
+    def test_retry_only_resummarizes_changed_chunks(self):
+        """Summaries are cached by blob OIDs; changing one file re-runs its chunk only."""
+        diff = get_git_diff(staged=True)
+        first = summarize_diff("test-model", diff, chunk_tokens=100000)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(self.requests), 2)
+
+        self.assertEqual(summarize_diff("test-model", diff, chunk_tokens=100000), first)
+        self.assertEqual(len(self.requests), 2)
+
+        with open(os.path.join("ui", "mod_0.py"), "a") as f:
+            f.write("extra = 1\n")
+        subprocess.run(["git", "add", "ui/mod_0.py"], check=True)
+        second = summarize_diff("test-model", get_git_diff(staged=True), chunk_tokens=100000)
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(second[0], first[0])
+        self.assertNotEqual(second[1], first[1])
+
+    def test_cancel_stops_remaining_chunks(self):
+        """Once the token is cancelled no further chunk request is sent."""
+        diff = get_git_diff(staged=True)
+        token = CancelToken()
+        tokens = []
+
+        def cancel_after_first(model, messages, **kwargs):
+            self.requests.append(messages)
+            tokens.append(kwargs.get("cancel_token"))
+            token.cancel()
+            return "- summary"
+
+        with patch("GitSmart.map_reduce.get_chat_completion", side_effect=cancel_after_first):
+            with self.assertRaises(CompletionCancelled):
+                summarize_diff("test-model", diff, chunk_tokens=400, max_workers=1, cancel_token=token)
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(tokens, [token])
+
+    def test_oversized_diff_uses_summaries(self):
+        """Above the threshold, the commit request is built from chunk summaries."""
+        diff = get_git_diff(staged=True)
+        with patch("GitSmart.ai_utils.MAP_REDUCE_THRESHOLD", 0.0):
+            message = generate_commit_message("test-model", diff)
+
+        self.assertEqual(message, "feat: add api and ui modules")
+        reduce_request = self.requests[-1][-1]["content"]
+        self.assertIn(format_summaries([("api", "- summary 1")]).split("\n")[0], reduce_request)
+        self.assertNotIn("value_0 = 0 * 0", reduce_request)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the parallel repository crawler (GitSmart.repo_discovery).
+"""
+
+import unittest
+import subprocess
+import tempfile
+import shutil
+import os
+import sys
+from unittest.mock import patch
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.repo_discovery import iter_repositories, read_repository
+from GitSmart.repo_manager import RepositoryManager
+from GitSmart.repo_registry import RepositoryRegistry
+
+
+def git(path, *args):
+    subprocess.run(["git", "-C", path] + list(args), check=True, capture_output=True)
+
+
+def make_repo(path, remote=None, branch="main"):
+    os.makedirs(path)
+    git(path, "init", "-b", branch)
+    git(path, "config", "user.name", "Test User")
+    git(path, "config", "user.email", "test@example.com")
+    git(path, "commit", "--allow-empty", "-m", "initial")
+    if remote:
+        git(path, "remote", "add", "origin", remote)
+
+
+class TestRepoDiscovery(unittest.TestCase):
+    """Test pruning, depth limits, submodule handling and metadata reads."""
+
+    def setUp(self):
+        self.test_dir = os.path.realpath(tempfile.mkdtemp(prefix="gitsmart_test_"))
+        self.root = os.path.join(self.test_dir, "projects")
+        make_repo(os.path.join(self.root, "app"), remote="https://example.com/org/app.git", branch="develop")
+        make_repo(os.path.join(self.root, "app", "vendor", "lib"))
+        make_repo(os.path.join(self.root, "web", "node_modules", "pkg"))
+        make_repo(os.path.join(self.root, "a", "b", "c", "deep"))
+        git(os.path.join(self.root, "app"), "worktree", "add", "-b", "wt", os.path.join(self.root, "app-wt"))
+
+        patcher = patch("GitSmart.repo_discovery._global_config_needs_git", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def found(self, **kwargs):
+        return sorted(os.path.relpath(repo.path, self.root) for repo in iter_repositories([self.root], **kwargs))
+
+    def test_prune_depth_and_repo_roots(self):
+        """Pruned names, nested repositories and paths past the depth limit are skipped."""
+        self.assertEqual(self.found(max_depth=6), ["a/b/c/deep", "app", "app-wt"])
+        self.assertEqual(self.found(max_depth=2), ["app", "app-wt"])
+        self.assertEqual(
+            self.found(max_depth=6, include_submodules=True),
+            ["a/b/c/deep", "app", "app-wt", "app/vendor/lib"]
+        )
+        self.assertEqual(self.found(max_depth=6, prune=[]), ["a/b/c/deep", "app", "app-wt", "web/node_modules/pkg"])
+
+    def test_metadata_read_without_git(self):
+        """Branch and origin come from the .git files, including linked worktrees."""
+        with patch("GitSmart.repo_discovery.subprocess.run") as run:
+            app = read_repository(os.path.join(self.root, "app"))
+            worktree = read_repository(os.path.join(self.root, "app-wt"))
+        run.assert_not_called()
+
+        self.assertEqual((app.branch, app.remote_url), ("develop", "https://example.com/org/app.git"))
+        self.assertEqual((worktree.branch, worktree.remote_url), ("wt", "https://example.com/org/app.git"))
+
+    def test_url_rewrites_fall_back_to_git(self):
+        """With insteadOf in the config, the URL git would use is returned."""
+        app = os.path.join(self.root, "app")
+        git(app, "config", "url.git@example.com:.insteadOf", "https://example.com/")
+        self.assertEqual(read_repository(app).remote_url, "git@example.com:org/app.git")
+
+    def test_results_stream_and_stop_early(self):
+        """The first result arrives without waiting for the scan; closing stops it."""
+        iterator = iter_repositories([self.root, self.root], max_depth=6, max_workers=2)
+        first = next(iterator)
+        self.assertTrue(first.path.startswith(self.root))
+        iterator.close()
+
+    def test_registration(self):
+        """The manager and registry register what the crawler finds."""
+        manager = RepositoryManager(os.path.join(self.test_dir, "manager"))
+        streamed = []
+        repos = manager.auto_discover_repositories([self.root], on_found=streamed.append)
+        self.assertEqual(sorted(repo["name"] for repo in repos), ["app", "app-wt", "deep"])
+        self.assertEqual(streamed, repos)
+        self.assertEqual(manager.get_repository("app")["current_branch"], "develop")
+
+        # Rediscovery keeps the known change state instead of resetting it
+        app = manager.get_repository("app")
+        app["has_changes"] = True
+        manager.cache["app"] = app
+        manager.auto_discover_repositories([self.root])
+        self.assertIs(manager.get_repository("app")["has_changes"], True)
+        self.assertEqual(manager.get_repository_stats()["repositories_with_changes"], 1)
+        manager.cache.close()
+
+        registry = RepositoryRegistry(os.path.join(self.test_dir, "registry"))
+        self.addCleanup(registry.close)
+        found = read_repository(os.path.join(self.root, "a", "b", "c", "deep"))
+        repo_info = registry.register_discovered(found)
+        self.assertEqual((repo_info.name, repo_info.commit_count), ("deep", 1))
+        self.assertEqual(registry.register_discovered(found).repo_id, repo_info.repo_id)
+        self.assertEqual(len(registry.list_repositories()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
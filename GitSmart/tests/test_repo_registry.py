@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the SQLite-backed repository registry (GitSmart.repo_registry).
+"""
+
+import unittest
+import tempfile
+import shutil
+import gc
+import json
+import time
+import weakref
+import os
+import sys
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from unittest.mock import patch
+
+from GitSmart import repo_registry
+from GitSmart.repo_registry import RepositoryRegistry, RepositoryInfo
+
+
+class TestRepositoryRegistry(unittest.TestCase):
+    """Test indexed lookups and persistence of the registry."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="gitsmart_test_")
+        self.registry_dir = os.path.join(self.test_dir, "registry")
+        self.repo_path = os.path.join(self.test_dir, "project")
+        os.mkdir(self.repo_path)
+        self.registry = RepositoryRegistry(self.registry_dir)
+
+    def tearDown(self):
+        self.registry.close()
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _repo(self, repo_id="abc123", name="project", aliases=None, last_accessed=1.0):
+        return RepositoryInfo(
+            repo_id=repo_id,
+            name=name,
+            path=self.repo_path,
+            remote_url="https://example.com/project.git",
+            last_accessed=last_accessed,
+            created_at=1.0,
+            branch_count=2,
+            commit_count=10,
+            file_count=5,
+            aliases=list(aliases or [])
+        )
+
+    def test_lookups_by_name_alias_path_and_remote(self):
+        """Names and aliases match case-insensitively; paths are normalized."""
+        self.registry._put(self._repo(aliases=["Proj", "p"]))
+
+        self.assertEqual(self.registry.find_repository_by_name("PROJECT").repo_id, "abc123")
+        self.assertEqual(self.registry.find_repository_by_name("proj").repo_id, "abc123")
+        self.assertIsNone(self.registry.find_repository_by_name("other"))
+        self.assertEqual(
+            self.registry.find_repository_by_path(os.path.join(self.repo_path, ".")).repo_id, "abc123"
+        )
+        self.assertEqual(
+            self.registry.find_repository_by_remote("https://example.com/project.git").aliases, ["Proj", "p"]
+        )
+
+    def test_lookup_touches_last_accessed_only(self):
+        """A lookup bumps last_accessed in a batch, leaving the other fields alone."""
+        self.registry._put(self._repo(aliases=["p"]))
+        before = time.time()
+        self.registry.find_repository_by_name("project")
+        self.assertEqual(self.registry.store.get("abc123")["last_accessed"], 1.0)
+
+        self.registry.flush()
+        record = self.registry.store.get("abc123")
+        self.assertGreaterEqual(record["last_accessed"], before)
+        self.assertEqual(record["commit_count"], 10)
+        self.assertEqual(record["aliases"], ["p"])
+
+    def test_list_remove_and_alias(self):
+        """Listing is ordered by last access; aliases and removals persist."""
+        self.registry._put(self._repo("one", "first", last_accessed=1.0))
+        self.registry._put(self._repo("two", "second", last_accessed=2.0))
+        self.assertEqual([repo.repo_id for repo in self.registry.list_repositories()], ["two", "one"])
+
+        self.assertTrue(self.registry.add_alias("first", "primary"))
+        self.assertEqual(self.registry.find_repository_by_name("primary").repo_id, "one")
+
+        self.assertTrue(self.registry.remove_repository("second"))
+        self.assertEqual([repo.repo_id for repo in self.registry.list_repositories()], ["one"])
+
+    def test_reopen_and_json_migration(self):
+        """Data survives a reopen, and repositories.json entries are imported."""
+        self.registry._put(self._repo())
+        self.registry.close()
+
+        other_dir = os.path.join(self.test_dir, "legacy")
+        os.mkdir(other_dir)
+        with open(os.path.join(other_dir, "repositories.json"), "w") as f:
+            json.dump({"repositories": {"abc123": self._repo(name="legacy").to_dict()}}, f)
+
+        self.registry = RepositoryRegistry(self.registry_dir)
+        self.assertEqual(self.registry.find_repository_by_name("project").repo_id, "abc123")
+        self.registry.close()
+
+        self.registry = RepositoryRegistry(other_dir)
+        self.assertEqual(self.registry.find_repository_by_name("legacy").repo_id, "abc123")
+
+    def test_removal_survives_stale_snapshot(self):
+        """A snapshot written before a removal does not bring the repository back."""
+        self.registry._put(self._repo())
+        self.registry._save_registry()
+        self.registry.flush()
+        self.assertTrue(self.registry.remove_repository("project"))
+
+        other = RepositoryRegistry(self.registry_dir)
+        self.addCleanup(other.close)
+        self.assertEqual(other.list_repositories(), [])
+        self.assertEqual(self.registry.list_repositories(), [])
+
+    def test_snapshot_is_debounced_and_atomic(self):
+        """Several saves produce one snapshot, written through a rename."""
+        snapshot = os.path.join(self.registry_dir, "repositories.json")
+        self.registry._put(self._repo())
+        for _ in range(5):
+            self.registry._save_registry()
+            self.registry.add_alias("project", "alias")
+        self.assertFalse(os.path.exists(snapshot))
+
+        with patch("GitSmart.repo_registry.os.replace", wraps=os.replace) as replace:
+            self.registry.flush()
+            self.registry.flush()
+        self.assertEqual(replace.call_count, 1)
+        with open(snapshot) as f:
+            data = json.load(f)
+        self.assertEqual(data["repositories"]["abc123"]["aliases"], ["alias"])
+        self.assertEqual([name for name in os.listdir(self.registry_dir) if name.endswith(".tmp")], [])
+
+    def test_close_flushes_pending_changes(self):
+        """Pending access times and the snapshot are written on close."""
+        self.registry._put(self._repo())
+        self.registry.find_repository_by_name("project")
+        self.assertTrue(self.registry.add_alias("project", "alias"))
+        self.registry.close()
+
+        with open(os.path.join(self.registry_dir, "repositories.json")) as f:
+            data = json.load(f)
+        self.assertGreater(data["repositories"]["abc123"]["last_accessed"], 1.0)
+        self.assertEqual(data["repositories"]["abc123"]["aliases"], ["alias"])
+
+    def test_touch_is_flushed_by_timer(self):
+        """A lookup alone arms the debounced flush that stores its access time."""
+        self.registry.close()
+        self.registry = RepositoryRegistry(self.registry_dir, snapshot_delay=0.05)
+        self.registry._put(self._repo())
+        self.registry.find_repository_by_name("project")
+
+        deadline = time.time() + 2
+        while self.registry.store.get("abc123")["last_accessed"] == 1.0 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertGreater(self.registry.store.get("abc123")["last_accessed"], 1.0)
+
+    def test_unused_registry_is_not_kept_alive(self):
+        """Open registries are tracked for exit without being pinned; close drops them."""
+        other = RepositoryRegistry(os.path.join(self.test_dir, "other"))
+        self.assertIn(other, repo_registry._open_registries)
+        ref = weakref.ref(other)
+        store = other.store
+        del other
+        gc.collect()
+        self.assertIsNone(ref())
+        store.close()
+
+        self.registry.close()
+        self.assertNotIn(self.registry, repo_registry._open_registries)
+
+    def test_lookups_use_indexes(self):
+        """Name, alias and path lookups are index searches, not table scans."""
+        conn = self.registry.store._conn
+        queries = [
+            ("SELECT * FROM repositories WHERE name_lower = ?", ("x",)),
+            ("SELECT * FROM repositories WHERE path = ?", ("x",)),
+            ("SELECT repo_id FROM aliases WHERE alias_lower = ?", ("x",)),
+        ]
+        for sql, params in queries:
+            plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+            self.assertIn("USING", plan, sql)
+            self.assertNotIn("SCAN", plan, sql)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
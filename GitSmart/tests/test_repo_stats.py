@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Unit tests for repository stats collection (GitSmart.repo_stats).
+"""
+
+import unittest
+import subprocess
+import tempfile
+import shutil
+import os
+import sys
+from unittest.mock import patch
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart import repo_stats
+from GitSmart.repo_stats import (
+    read_index_entry_count, read_head_oid, refresh_repo_stats, refresh_stats_many
+)
+from GitSmart.repo_registry import RepositoryRegistry
+
+
+def make_repo(path, files, commits=1, branches=()):
+    """Create a repository with `files` tracked files, `commits` commits and extra branches."""
+    os.makedirs(path)
+    run = lambda *args: subprocess.run(["git", "-C", path] + list(args), check=True, capture_output=True)
+    run("init")
+    run("config", "user.name", "Test User")
+    run("config", "user.email", "test@example.com")
+    for index in range(files):
+        with open(os.path.join(path, f"file_{index}.txt"), "w") as f:
+            f.write(f"content {index}\n")
+    run("add", ".")
+    for index in range(commits):
+        run("commit", "--allow-empty", "-m", f"commit {index}")
+    for branch in branches:
+        run("branch", branch)
+
+
+class TestRepoStats(unittest.TestCase):
+    """Test stats collection without changing directory."""
+
+    def setUp(self):
+        self.original_dir = os.getcwd()
+        self.test_dir = tempfile.mkdtemp(prefix="gitsmart_test_")
+        self.repo = os.path.join(self.test_dir, "repo")
+        make_repo(self.repo, files=3, commits=2, branches=["feature"])
+
+    def tearDown(self):
+        os.chdir(self.original_dir)
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_refresh_repo_stats(self):
+        """Counts match git and the working directory is left alone."""
+        self.assertEqual(refresh_repo_stats(self.repo).counts, (2, 2, 3))
+        self.assertEqual(os.getcwd(), self.original_dir)
+
+    def test_file_count_from_index_header(self):
+        """The index header count is used; ls-files is only a fallback."""
+        self.assertEqual(read_index_entry_count(os.path.join(self.repo, ".git")), 3)
+        with patch("GitSmart.repo_stats.read_index_entry_count", return_value=None):
+            self.assertEqual(refresh_repo_stats(self.repo).file_count, 3)
+
+        empty = os.path.join(self.test_dir, "empty")
+        make_repo(empty, files=0, commits=0)
+        self.assertEqual(refresh_repo_stats(empty).counts, (0, 0, 0))
+
+    def test_refresh_stats_many_and_registry_refresh(self):
+        """Several repositories are refreshed in one call and stored in the registry."""
+        other = os.path.join(self.test_dir, "other")
+        make_repo(other, files=1, commits=3)
+        snapshots = refresh_stats_many([self.repo, other, self.repo], max_workers=2)
+        self.assertEqual({path: snapshot.counts for path, snapshot in snapshots.items()}, {
+            self.repo: (2, 2, 3),
+            other: (1, 3, 1),
+        })
+
+        registry = RepositoryRegistry(os.path.join(self.test_dir, "registry"))
+        self.addCleanup(registry.close)
+        registry.register_repository_by_name("repo", self.repo)
+        registry.register_repository_by_name("other", other)
+
+        subprocess.run(["git", "-C", other, "commit", "--allow-empty", "-m", "more"], check=True, capture_output=True)
+        self.assertEqual(registry.refresh_repository_stats(max_workers=2), 2)
+        self.assertEqual(registry.find_repository_by_name("other").commit_count, 4)
+        self.assertEqual(os.getcwd(), self.original_dir)
+
+        # The collector state is saved per path and dropped with the repository
+        states = registry.store.get_stats_states([other])
+        self.assertEqual(states[other]["commit_count"], 4)
+        self.assertTrue(registry.remove_repository("other"))
+        self.assertEqual(registry.store.get_stats_states([other]), {})
+
+
+class TestIncrementalRepoStats(unittest.TestCase):
+    """Test reuse of counts from the previous snapshot."""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="gitsmart_test_")
+        self.repo = os.path.join(self.test_dir, "repo")
+        make_repo(self.repo, files=2, commits=3)
+        self.previous = refresh_repo_stats(self.repo)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def git(self, *args):
+        return subprocess.run(
+            ["git", "-C", self.repo] + list(args), check=True, capture_output=True, text=True
+        ).stdout.strip()
+
+    def refresh(self):
+        with patch("GitSmart.repo_stats._git", wraps=repo_stats._git) as git:
+            snapshot = refresh_repo_stats(self.repo, self.previous)
+        return snapshot, [call.args[1] for call in git.call_args_list]
+
+    def test_head_read_from_git_dir(self):
+        """HEAD is resolved from loose and packed refs without running git."""
+        head = self.git("rev-parse", "HEAD")
+        git_dir = os.path.join(self.repo, ".git")
+        self.assertEqual(read_head_oid(git_dir), (True, head))
+        self.git("pack-refs", "--all")
+        self.assertEqual(read_head_oid(git_dir), (True, head))
+        self.assertEqual(self.previous.head_oid, head)
+
+    def test_nothing_changed_runs_no_git(self):
+        snapshot, calls = self.refresh()
+        self.assertIs(snapshot, self.previous)
+        self.assertEqual(calls, [])
+
+    def test_head_advanced_counts_new_commits_only(self):
+        """A fast-forward counts old..new; branches and files are reused."""
+        old_head = self.previous.head_oid
+        for index in range(2):
+            self.git("commit", "--allow-empty", "-m", f"new {index}")
+
+        snapshot, calls = self.refresh()
+        self.assertEqual(snapshot.counts, (1, 5, 2))
+        self.assertIn(["rev-list", "--count", f"{old_head}..{snapshot.head_oid}"], calls)
+        self.assertNotIn(["rev-list", "--count", snapshot.head_oid], calls)
+        self.assertFalse(any(args[0] == "for-each-ref" for args in calls))
+
+    def test_history_rewrite_and_other_changes_recount(self):
+        """Moving HEAD backwards recounts; new refs and staged files update their counts."""
+        self.git("reset", "--hard", "HEAD~2")
+        self.git("branch", "feature")
+        with open(os.path.join(self.repo, "extra.txt"), "w") as f:
+            f.write("extra\n")
+        self.git("add", "extra.txt")
+
+        snapshot, calls = self.refresh()
+        self.assertEqual(snapshot.counts, (2, 1, 3))
+        self.assertEqual(snapshot.counts, refresh_repo_stats(self.repo).counts)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the token counting service and token-budgeted truncation.
+"""
+
+import unittest
+import os
+import sys
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.tokens import count_tokens, count_lines_tokens, TokenBudget
+from GitSmart.ai_utils import truncate_diff, count_diff_prompt_tokens, format_diff_with_codeblocks
+
+
+def make_diff(files: int, lines_per_file: int) -> str:
+    parts = []
+    for f in range(files):
+        parts.append(f"diff --git a/src/module_{f}.py b/src/module_{f}.py\n")
+        parts.append(f"--- a/src/module_{f}.py\n+++ b/src/module_{f}.py\n")
+        parts.append(f"@@ -1,0 +1,{lines_per_file} @@\n")
+        for i in range(lines_per_file):
+            parts.append(f"+def function_{f}_{i}(value):  # returns value * {i}\n")
+    return "".join(parts)
+
+
+class TestTokenService(unittest.TestCase):
+    """Test memoized counting and the incremental budget."""
+
+    def test_counts_are_memoized_and_stable(self):
+        """Counting the same chunk twice gives the same answer."""
+        text = "def add(a, b):\n    return a + b\n"
+        first = count_tokens(text)
+        self.assertGreater(first, 0)
+        self.assertEqual(count_tokens(text), first)
+        self.assertEqual(count_tokens(""), 0)
+
+    def test_line_counts(self):
+        """Per-line counts are positive and include the newline."""
+        counts = count_lines_tokens(["+x = 1", "", "-y = 2"])
+        self.assertEqual(len(counts), 3)
+        self.assertTrue(all(count >= 1 for count in counts))
+
+    def test_budget(self):
+        """Pieces are only added while they fit."""
+        budget = TokenBudget(10)
+        budget.reserve(4)
+        self.assertTrue(budget.try_add(6))
+        self.assertFalse(budget.try_add(1))
+        self.assertEqual(budget.remaining, 0)
+
+
+class TestTruncateDiff(unittest.TestCase):
+    """Test that truncation lands inside the budget in a single pass."""
+
+    def test_small_diff_is_untouched(self):
+        diff = make_diff(1, 3)
+        self.assertEqual(truncate_diff(diff, "system", "appendix", 10000), diff)
+
+    def test_truncation_fits_budget(self):
+        """The truncated, formatted request fits the limit without another pass."""
+        diff = make_diff(5, 400)
+        system, appendix, limit = "You write commit messages.", "Return a commit message.", 2000
+
+        truncated = truncate_diff(diff, system, appendix, limit)
+
+        self.assertLess(len(truncated), len(diff))
+        request = count_tokens(system) + count_tokens(appendix) + count_diff_prompt_tokens(truncated)
+        self.assertLessEqual(request, limit)
+        # Every file is still shown, each cut to a share of the budget
+        for f in range(5):
+            self.assertIn(f"diff --git a/src/module_{f}.py", truncated)
+        self.assertIn("... (hunk truncated)", truncated)
+        self.assertTrue(format_diff_with_codeblocks(truncated).endswith("```"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the auto-refresh repository watcher.
+"""
+
+import unittest
+import tempfile
+import shutil
+import threading
+import time
+import os
+import sys
+
+# Add GitSmart to path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from GitSmart.watcher import RepositoryWatcher, WATCHDOG_AVAILABLE
+
+
+class TestRepositoryWatcher(unittest.TestCase):
+    """Test path filtering, debouncing and the polling fallback."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.test_dir = os.path.realpath(tempfile.mkdtemp(prefix="gitsmart_test_"))
+        os.makedirs(os.path.join(self.test_dir, ".git", "refs", "heads"))
+
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_relevant_paths(self):
+        """Index, HEAD and refs matter; git internals and GitSmart caches do not."""
+        watcher = RepositoryWatcher(self.test_dir, backend="polling")
+        join = os.path.join
+
+        self.assertTrue(watcher.is_relevant_path(join(self.test_dir, "src", "app.py")))
+        self.assertTrue(watcher.is_relevant_path(join(self.test_dir, ".git", "index")))
+        self.assertTrue(watcher.is_relevant_path(join(self.test_dir, ".git", "HEAD")))
+        self.assertTrue(watcher.is_relevant_path(join(self.test_dir, ".git", "refs", "heads", "main")))
+        self.assertFalse(watcher.is_relevant_path(join(self.test_dir, ".git", "objects", "ab", "cdef")))
+        self.assertFalse(watcher.is_relevant_path(join(self.test_dir, ".git", "index.lock")))
+        self.assertFalse(watcher.is_relevant_path(join(self.test_dir, ".gitsmart", "model_cache", "cache.db")))
+        self.assertFalse(watcher.is_relevant_path(os.path.dirname(self.test_dir)))
+        # Nested git directories are internals; build-like directories may hold tracked files
+        self.assertFalse(watcher.is_relevant_path(join(self.test_dir, "vendor", "lib", ".git", "index")))
+        self.assertTrue(watcher.is_relevant_path(join(self.test_dir, "build", "gen.py")))
+        self.assertTrue(watcher.is_relevant_path(join(self.test_dir, "src", "dist", "x.c")))
+        self.assertTrue(watcher.is_relevant_path(join(self.test_dir, "target", "a.rs")))
+
+    def test_worktree_change_is_tracked_separately(self):
+        """Only events on worktree files ask for a forced status check."""
+        watcher = RepositoryWatcher(self.test_dir, backend="polling")
+        watcher.notify(worktree=False)
+        self.assertFalse(watcher.take_worktree_change())
+        watcher.notify(worktree=True)
+        watcher.notify(worktree=False)
+        self.assertTrue(watcher.take_worktree_change())
+        self.assertFalse(watcher.take_worktree_change())
+
+    @unittest.skipUnless(WATCHDOG_AVAILABLE, "watchdog is not installed")
+    def test_git_internals_are_not_watched(self):
+        """Git objects and the GitSmart cache get no watch; other directories do."""
+        for name in ("src", "build", ".gitsmart", os.path.join(".git", "objects")):
+            os.makedirs(os.path.join(self.test_dir, name), exist_ok=True)
+        watcher = RepositoryWatcher(self.test_dir, backend="events")
+        self.assertEqual(watcher.start(), "events")
+        self.addCleanup(watcher.stop)
+
+        watched = {os.path.relpath(path, self.test_dir) for path in watcher._watched}
+        self.assertEqual(watched, {".", "src", "build", ".git", os.path.join(".git", "refs")})
+
+        os.makedirs(os.path.join(self.test_dir, "docs"))
+        self.assertTrue(watcher.wait_for_change(timeout=2))
+        self.assertTrue(watcher.take_worktree_change())
+        deadline = time.monotonic() + 2
+        while os.path.join(self.test_dir, "docs") not in watcher._watched and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIn(os.path.join(self.test_dir, "docs"), watcher._watched)
+
+    def test_polling_backend_wakes_every_interval(self):
+        """The polling fallback asks for a check once per interval until stopped."""
+        watcher = RepositoryWatcher(self.test_dir, backend="polling", poll_interval=0.01)
+        self.assertEqual(watcher.start(), "polling")
+        self.assertTrue(watcher.wait_for_change())
+        watcher.stop()
+        self.assertFalse(watcher.wait_for_change())
+
+    def test_event_burst_is_debounced(self):
+        """A burst of events produces a single change notification."""
+        watcher = RepositoryWatcher(self.test_dir, backend="polling", debounce=0.05)
+        # Exercise the event path without depending on a platform observer
+        watcher.backend = "events"
+
+        def burst():
+            for _ in range(5):
+                watcher.notify()
+                time.sleep(0.01)
+
+        thread = threading.Thread(target=burst)
+        thread.start()
+        self.assertTrue(watcher.wait_for_change(timeout=1))
+        thread.join()
+        self.assertFalse(watcher.wait_for_change(timeout=0.1))
+
+    def test_stop_wakes_waiter(self):
+        """Stopping the watcher releases a blocked waiter without a change."""
+        watcher = RepositoryWatcher(self.test_dir, backend="polling")
+        watcher.backend = "events"
+        threading.Timer(0.05, watcher.stop).start()
+        self.assertFalse(watcher.wait_for_change(timeout=2))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,122 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+from .config import logger
+
+"""
+tokens.py
+
+- The single token-counting service used for prompt budgeting
+- Loads the tokenizer once per process (falls back to a character
+  estimate if tiktoken or its encoding data is unavailable)
+- Memoizes counts per text chunk (e.g. one file's diff), so re-counting a
+  prompt after small edits only tokenizes the parts that changed
+- TokenBudget tracks what is left of a limit as pieces are added
+"""
+
+ENCODING_NAME = "cl100k_base"
+# Used only when the real tokenizer cannot be loaded
+CHARACTERS_PER_TOKEN = 4.0
+
+_MEMO_SIZE = 8192
+_memo: "OrderedDict[bytes, int]" = OrderedDict()
+_memo_lock = threading.Lock()
+_encoder = None
+_encoder_loaded = False
+_encoder_lock = threading.Lock()
+
+
+def get_encoder():
+    """Return the cached tiktoken encoding, or None if it cannot be loaded."""
+    global _encoder, _encoder_loaded
+    if _encoder_loaded:
+        return _encoder
+    with _encoder_lock:
+        if not _encoder_loaded:
+            if TIKTOKEN_AVAILABLE:
+                try:
+                    _encoder = tiktoken.get_encoding(ENCODING_NAME)
+                except Exception as e:
+                    # Typically offline on first use: the encoding data is downloaded
+                    logger.warning(f"Tokenizer unavailable ({e}), estimating tokens from characters")
+            _encoder_loaded = True
+    return _encoder
+
+
+def _count_uncached(text: str) -> int:
+    encoder = get_encoder()
+    if encoder is None:
+        return int(len(text) / CHARACTERS_PER_TOKEN + 0.999)
+    return len(encoder.encode_ordinary(text))
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in `text`, memoized by content."""
+    if not text:
+        return 0
+    key = hashlib.blake2b(text.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+    with _memo_lock:
+        cached = _memo.get(key)
+        if cached is not None:
+            _memo.move_to_end(key)
+            return cached
+
+    count = _count_uncached(text)
+    with _memo_lock:
+        _memo[key] = count
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+    return count
+
+
+def count_lines_tokens(lines: List[str]) -> List[int]:
+    """
+    Count tokens per line in one batch call (each line counted with its
+    newline). Not memoized: lines are too small and numerous to be worth it.
+    """
+    encoder = get_encoder()
+    if encoder is None:
+        return [int((len(line) + 1) / CHARACTERS_PER_TOKEN + 0.999) for line in lines]
+    return [len(tokens) for tokens in encoder.encode_ordinary_batch([line + "\n" for line in lines])]
+
+
+class TokenBudget:
+    """
+    Incremental token budget.
+
+    Reserve fixed parts of a prompt up front, then add optional pieces while
+    they fit. Counts are memoized, so adding the same chunk again is cheap.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.limit - self.used
+
+    def reserve(self, text_or_tokens) -> int:
+        """Unconditionally account for text (or a token count). Returns its tokens."""
+        tokens = text_or_tokens if isinstance(text_or_tokens, int) else count_tokens(text_or_tokens)
+        self.used += tokens
+        return tokens
+
+    def fits(self, tokens: int) -> bool:
+        return tokens <= self.remaining
+
+    def try_add(self, text_or_tokens) -> bool:
+        """Account for a piece only if it fits in what is left."""
+        tokens = text_or_tokens if isinstance(text_or_tokens, int) else count_tokens(text_or_tokens)
+        if not self.fits(tokens):
+            return False
+        self.used += tokens
+        return True
@@ -1,15 +1,17 @@
 import os
 import subprocess
 
-def get_git_root() -> str:
+def get_git_root(cwd: str = None) -> str:
     """
-    Returns the absolute path to the root of the current git repository.
+    Returns the absolute path to the root of the git repository containing
+    `cwd` (the current directory by default).
     Raises RuntimeError if not in a git repo.
     """
     try:
         root = subprocess.check_output(
             ["git", "rev-parse", "--show-toplevel"],
-            universal_newlines=True
+            universal_newlines=True,
+            cwd=cwd
         ).strip()
         return root
     except subprocess.CalledProcessError:
@@ -17,3 +19,17 @@ def get_git_root() -> str:
 
 def chdir_to_git_root():
     os.chdir(get_git_root())
+
+def get_git_dir() -> str:
+    """
+    Returns the absolute path to the current repository's git directory.
+    Raises RuntimeError if not in a git repo.
+    """
+    try:
+        git_dir = subprocess.check_output(
+            ["git", "rev-parse", "--absolute-git-dir"],
+            universal_newlines=True
+        ).strip()
+        return git_dir
+    except subprocess.CalledProcessError:
+        raise RuntimeError("Not inside a git repository.")
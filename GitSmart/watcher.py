@@ -0,0 +1,218 @@
+import os
+import time
+import threading
+from typing import Optional
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+    class FileSystemEventHandler:
+        pass
+
+from .config import logger, DEBUG
+
+"""
+watcher.py
+
+- Watches a repository for changes that can affect `git status`
+- Uses filesystem events (inotify/FSEvents/kqueue via watchdog) when available
+- Falls back to plain interval polling otherwise
+- Debounces bursts of events (editors, checkouts) into a single notification
+- Git internals such as objects/ and GitSmart's own .gitsmart caches never
+  trigger a check and are not watched at all, which keeps inotify watch
+  usage down; every other worktree directory may hold tracked files
+"""
+
+# Paths inside the git directory whose changes matter for status
+_GIT_DIR_FILES = {"index", "HEAD", "packed-refs"}
+# Worktree directories whose churn never affects tracked-file status
+_IGNORED_WORKTREE_DIRS = {".git", ".gitsmart"}
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Forward relevant filesystem events to the owning watcher."""
+
+    def __init__(self, watcher: "RepositoryWatcher"):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        paths = [getattr(event, "src_path", None), getattr(event, "dest_path", None)]
+        relevant = [os.fsdecode(path) for path in paths if path and self.watcher.is_relevant_path(os.fsdecode(path))]
+        if not relevant:
+            return
+        if event.is_directory and event.event_type in ("created", "moved"):
+            self.watcher.watch_new_directory(relevant[-1])
+        self.watcher.notify(worktree=any(not self.watcher.is_git_path(path) for path in relevant))
+
+
+class RepositoryWatcher:
+    """
+    Signal when something that can change `git status` happened in a repository.
+
+    Consumers call wait_for_change() in a loop. With the event backend it only
+    returns True after a debounced burst of relevant events; with the polling
+    backend it returns True once per poll interval so the caller can check.
+
+    take_worktree_change() tells whether any of those events was a worktree
+    file; changes to the index, HEAD and refs alone already move the
+    repository fingerprint.
+    """
+
+    def __init__(
+        self,
+        repo_root: str,
+        git_dir: Optional[str] = None,
+        backend: str = "auto",
+        debounce: float = 0.3,
+        poll_interval: float = 1.0
+    ):
+        self.repo_root = os.path.abspath(repo_root)
+        self.git_dir = os.path.abspath(git_dir or os.path.join(self.repo_root, ".git"))
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.backend = self._resolve_backend(backend)
+
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._last_event = 0.0
+        self._worktree_changed = False
+        self._observer = None
+        self._handler = None
+        self._watched = set()
+
+    def _resolve_backend(self, backend: str) -> str:
+        """Pick the event backend if requested/available, otherwise polling."""
+        if backend not in ("auto", "events", "polling"):
+            logger.warning(f"Unknown auto-refresh backend '{backend}', using polling")
+            return "polling"
+        if backend == "polling":
+            return "polling"
+        if not WATCHDOG_AVAILABLE:
+            if backend == "events":
+                logger.warning("watchdog is not installed - auto-refresh falls back to polling")
+            return "polling"
+        return "events"
+
+    def is_git_path(self, path: str) -> bool:
+        """True for paths inside the git directory."""
+        path = os.path.abspath(path)
+        return path == self.git_dir or path.startswith(self.git_dir + os.sep)
+
+    def is_relevant_path(self, path: str) -> bool:
+        """Return True if a change at `path` can affect the repository status."""
+        path = os.path.abspath(path)
+        if self.is_git_path(path):
+            rel = os.path.relpath(path, self.git_dir).replace(os.sep, "/")
+            return rel in _GIT_DIR_FILES or rel.startswith("refs/")
+        if not path.startswith(self.repo_root + os.sep):
+            return False
+        parts = os.path.relpath(path, self.repo_root).split(os.sep)
+        return not any(part in _IGNORED_WORKTREE_DIRS for part in parts)
+
+    def notify(self, worktree: bool = True):
+        """Record a relevant event; wait_for_change() debounces these."""
+        with self._lock:
+            self._last_event = time.monotonic()
+            self._worktree_changed = self._worktree_changed or worktree
+        self._changed.set()
+
+    def take_worktree_change(self) -> bool:
+        """Whether a worktree file changed since the last call."""
+        with self._lock:
+            changed, self._worktree_changed = self._worktree_changed, False
+        return changed
+
+    def _schedule(self, path: str, recursive: bool):
+        if path in self._watched or not os.path.isdir(path):
+            return
+        self._observer.schedule(self._handler, path, recursive=recursive)
+        self._watched.add(path)
+
+    def watch_new_directory(self, path: str):
+        """Start watching a directory created at the top of the worktree."""
+        path = os.path.abspath(path)
+        if self._observer is None or os.path.dirname(path) != self.repo_root:
+            return  # deeper directories are covered by a recursive watch
+        try:
+            self._schedule(path, recursive=True)
+        except Exception as e:
+            if DEBUG:
+                logger.error(f"Cannot watch {path}: {e}")
+
+    def _schedule_watches(self):
+        """
+        Watch the worktree root itself, each top-level directory that is not
+        ignored (recursively), and only the parts of the git directory that
+        matter, instead of one recursive watch over everything.
+        """
+        self._schedule(self.repo_root, recursive=False)
+        with os.scandir(self.repo_root) as entries:
+            for entry in entries:
+                if entry.name not in _IGNORED_WORKTREE_DIRS and entry.is_dir(follow_symlinks=False):
+                    self._schedule(entry.path, recursive=True)
+        self._schedule(self.git_dir, recursive=False)
+        self._schedule(os.path.join(self.git_dir, "refs"), recursive=True)
+
+    def start(self) -> str:
+        """Start watching. Returns the backend actually in use."""
+        if self.backend == "events":
+            try:
+                self._handler = _ChangeHandler(self)
+                self._observer = Observer()
+                self._schedule_watches()
+                self._observer.daemon = True
+                self._observer.start()
+            except Exception as e:
+                # Typically inotify watch limits on very large trees
+                logger.warning(f"Filesystem watcher unavailable ({e}), falling back to polling")
+                self._observer = None
+                self._watched.clear()
+                self.backend = "polling"
+
+        if DEBUG:
+            logger.debug(f"Repository watcher started for {self.repo_root} using {self.backend} backend")
+        return self.backend
+
+    def stop(self):
+        """Stop watching and wake up any waiter."""
+        self._stopped.set()
+        self._changed.set()
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+                self._observer.join(timeout=2)
+            except Exception as e:
+                if DEBUG:
+                    logger.error(f"Error stopping repository watcher: {e}")
+            self._observer = None
+            self._watched.clear()
+
+    def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a (debounced) change is seen, the timeout expires or stop() is called.
+
+        Returns True when the caller should re-check the repository status.
+        """
+        if self.backend == "polling":
+            return not self._stopped.wait(timeout=self.poll_interval)
+
+        if not self._changed.wait(timeout=timeout):
+            return False
+        if self._stopped.is_set():
+            return False
+
+        # Debounce: wait until no new events arrived for `debounce` seconds
+        while True:
+            with self._lock:
+                quiet_for = time.monotonic() - self._last_event
+                if quiet_for >= self.debounce:
+                    # Cleared under the lock so an event racing with us re-arms the flag
+                    self._changed.clear()
+                    return True
+            if self._stopped.wait(timeout=self.debounce - quiet_for):
+                return False
@@ -17,6 +17,10 @@ setup(
         "flask>=2.0.0",
         "flask-cors>=3.0.0",
     ],
+    extras_require={
+        # Filesystem events for auto-refresh; without it the repository is polled
+        "watch": ["watchdog>=2.1.0"],
+    },
     entry_points={
         "console_scripts": [
             "gitsmart = GitSmart.main:entry_point",